@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+ASSET_BUNDLE_PATH = "./src/assets/countries.bundle" # Được ưu tiên hơn các file rời nếu tồn tại
+
+BUNDLE_MAGIC = b"WBND"
+BUNDLE_VERSION = 1
+# magic, version, số mục, vị trí và độ dài của bảng chỉ mục (ở cuối file)
+BUNDLE_HEADER = struct.Struct("<4sHIQQ")
+# Mỗi mục trong chỉ mục: độ dài tên, vị trí, độ dài, crc32; sau đó là tên (utf-8)
+INDEX_ENTRY = struct.Struct("<HQQI")
+BLOB_ALIGNMENT = 8 # Mỗi mục bắt đầu ở vị trí chia hết cho 8
+
+TABLE_ENTRY = "meta/country.bin" # Snapshot của CountryTable (cùng định dạng country.bin)
+ALIASES_ENTRY = "meta/country_aliases.json"
+
+def svg_entry(countryCode):
+    return f"svg/{countryCode}"
+
+def raster_entry(countryCode, size, background_color="white"):
+    background = str(background_color).lstrip("#").lower()
+    return f"raster/{countryCode}-{size}-{background}"
+
+class AssetBundle:
+    """
+    Đọc file bundle qua mmap: chỉ mục (tên -> vị trí, độ dài, crc32) được nạp một lần khi mở,
+    mỗi lần tra chỉ trả về memoryview trỏ thẳng vào vùng nhớ được map, không open/stat file nào khác.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, count, indexOffset, indexLength = BUNDLE_HEADER.unpack_from(self.map)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} asset bundle")
+
+        self.entries = {} # (tên, (vị trí, độ dài, crc32))
+        offset = indexOffset
+        for _ in range(count):
+            nameLength, blobOffset, blobLength, crc = INDEX_ENTRY.unpack_from(self.map, offset)
+            offset += INDEX_ENTRY.size
+            name = bytes(self.view[offset:offset + nameLength]).decode("utf-8")
+            offset += nameLength
+            self.entries[name] = (blobOffset, blobLength, crc)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, name):
+        """memoryview (không copy) của một mục, None nếu không có"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return self.view[offset:offset + length]
+
+    def digest(self, name):
+        """Khóa nội dung rẻ (crc32 + độ dài) của một mục, dùng làm khóa cache / ETag"""
+        _, length, crc = self.entries[name]
+        return f"{crc:08x}{length:08x}"
+
+    def svg(self, countryCode):
+        return self.get(svg_entry(countryCode))
+
+    def raster(self, countryCode, size, background_color="white"):
+        return self.get(raster_entry(countryCode, size, background_color))
+
+    def country_table(self, json_path=None):
+        """
+        CountryTable đọc thẳng từ bundle (các cột là view trên mmap).
+        Nếu json_path có tồn tại mà đã đổi so với lúc đóng gói thì trả về None để đọc lại JSON.
+        """
+        from country_table import CountryTable
+        data = self.get(TABLE_ENTRY)
+        if data is None:
+            return None
+        if json_path is not None and os.path.exists(json_path):
+            stat = os.stat(json_path)
+            return CountryTable.from_snapshot(data, stat.st_mtime_ns, stat.st_size)
+        return CountryTable.from_snapshot(data)
+
+    def verify(self):
+        """Kiểm tra crc32 của mọi mục; trả về danh sách tên mục bị hỏng"""
+        return [name for name, (offset, length, crc) in self.entries.items()
+                if zlib.crc32(self.view[offset:offset + length]) != crc]
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_bundle = None
+_bundleChecked = False
+_bundleLock = threading.Lock() # Bundle có thể được mở lần đầu từ worker thread prefetch
+
+def get_asset_bundle():
+    """AssetBundle của ASSET_BUNDLE_PATH nếu file tồn tại, nếu không thì None; chỉ mở một lần mỗi tiến trình"""
+    global _bundle, _bundleChecked
+    if not _bundleChecked:
+        with _bundleLock:
+            if not _bundleChecked:
+                if os.path.exists(ASSET_BUNDLE_PATH):
+                    try:
+                        _bundle = AssetBundle(ASSET_BUNDLE_PATH)
+                    except (OSError, ValueError) as e:
+                        print(f"Could not open asset bundle {ASSET_BUNDLE_PATH}: {e}")
+                _bundleChecked = True
+    return _bundle
+
+def load_country_table(json_path, snapshot_path=None):
+    """CountryTable từ bundle nếu có và còn khớp country.json, nếu không thì CountryTable.load"""
+    from country_table import CountryTable
+    bundle = get_asset_bundle()
+    table = bundle.country_table(json_path) if bundle is not None else None
+    return table if table is not None else CountryTable.load(json_path, snapshot_path)
+
+def load_aliases(path):
+    """dict (tên khác, mã nước) từ file alias, hoặc từ bundle khi không có file rời"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    bundle = get_asset_bundle()
+    data = bundle.get(ALIASES_ENTRY) if bundle is not None else None
+    return json.loads(bytes(data)) if data is not None else {}
+
+def write_bundle(path, blobs):
+    """Ghi bundle nguyên tử từ iterable (tên, bytes); trả về sha256 của cả file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    index = []
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * BUNDLE_HEADER.size)
+        for name, data in blobs:
+            padding = -f.tell() % BLOB_ALIGNMENT
+            f.write(b"\0" * padding)
+            index.append((name.encode("utf-8"), f.tell(), len(data), zlib.crc32(data)))
+            f.write(data)
+        indexOffset = f.tell()
+        for name, offset, length, crc in index:
+            f.write(INDEX_ENTRY.pack(len(name), offset, length, crc))
+            f.write(name)
+        indexLength = f.tell() - indexOffset
+        f.seek(0)
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index), indexOffset, indexLength))
+    os.replace(tmp_path, path)
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_bundle(path, json_path, aliases_path, raster_sizes=(), background_color="white"):
+    """
+    Đóng gói bảng quốc gia, alias, SVG của mọi nước (bản đơn giản hóa nếu có)
+    và, nếu raster_sizes khác rỗng, ảnh PNG đã render sẵn ở các kích thước đó.
+    """
+    from country_table import CountryTable
+    from render import country_svg_path, load_country_image
+
+    table = CountryTable.from_json(json_path)
+    stat = os.stat(json_path)
+
+    def blobs():
+        yield TABLE_ENTRY, table.snapshot_bytes(stat.st_mtime_ns, stat.st_size)
+        if os.path.exists(aliases_path):
+            with open(aliases_path, "rb") as f:
+                yield ALIASES_ENTRY, f.read()
+        for code in table.codes:
+            svg_path = country_svg_path(code)
+            if not os.path.exists(svg_path):
+                print(f"Missing SVG for {code}: {svg_path}")
+                continue
+            with open(svg_path, "rb") as f:
+                yield svg_entry(code), f.read()
+            for size in raster_sizes:
+                buffer = io.BytesIO()
+                load_country_image(code, size, background_color).save(buffer, format="PNG")
+                yield raster_entry(code, size, background_color), buffer.getvalue()
+
+    return write_bundle(path, blobs())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack country data and SVGs into a single memory-mapped bundle")
+    parser.add_argument("--build", action="store_true", help="build the bundle from the loose assets")
+    parser.add_argument("--verify", action="store_true", help="check the CRC of every entry")
+    parser.add_argument("--output", default=ASSET_BUNDLE_PATH)
+    parser.add_argument("--json", default="./src/assets/country.json")
+    parser.add_argument("--aliases", default="./src/assets/country_aliases.json")
+    parser.add_argument("--raster-size", type=int, action="append", default=[], help="also pack pre-rendered PNGs of this size")
+    args = parser.parse_args()
+
+    if args.build:
+        start = time.perf_counter()
+        digest = build_bundle(args.output, args.json, args.aliases, tuple(args.raster_size))
+        print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB) in {time.perf_counter() - start:.2f}s")
+        print(f"sha256 {digest}")
+    if args.verify:
+        with AssetBundle(args.output) as bundle:
+            broken = bundle.verify()
+            print(f"{len(bundle)} entries, {len(broken)} corrupt" + (f": {', '.join(broken)}" if broken else ""))
+    if not (args.build or args.verify):
+        parser.print_help()
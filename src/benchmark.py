@@ -0,0 +1,377 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+from compute import get_arrow_direction, get_distance_and_arrow, DistanceTable
+from country_table import CountryTable
+from dataset_pack import DatasetPack, PackNameIndex, generate_synthetic_pack
+from game_session import GameSession
+from render import COUNTRY_IMAGE_PATH, BASE_IMAGE_SIZE, country_svg_path, render_svg
+from search import FuzzyIndex, PrefixIndex
+from spatial import SphericalIndex
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin"
+DISTANCE_TABLE_PATH = "./src/assets/distance_table.npz"
+
+LOWER_IS_BETTER = "lower"
+HIGHER_IS_BETTER = "higher"
+
+BENCHMARK_SEED = 1234 # Cố định để các lần chạy đo cùng một tập dữ liệu
+LARGEST_ASSET_COUNT = 5 # Số SVG lớn nhất được nêu riêng trong báo cáo
+GUESS_LIST_CHECKPOINTS = (1, 10, 25, 50, 100) # Số lượt đã đoán tại đó đo chi phí cập nhật danh sách
+PACK_SIZES = (1000, 10000, 50000) # Kích thước gói giả lập: độ trễ phải giữ nguyên khi gói lớn lên
+
+def time_call(func, number=1, repeat=5):
+    """Thời gian (giây) của một lần gọi func: trung vị của repeat lần đo, mỗi lần gọi number lần"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings)
+
+def metric(value, unit, better=LOWER_IS_BETTER):
+    return {"value": value, "unit": unit, "better": better}
+
+def load_country_data():
+    return CountryTable.load(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+
+def bench_compute(repeat):
+    """Thông lượng của get_distance_and_arrow, get_arrow_direction và tra bảng DistanceTable"""
+    countryData = load_country_data()
+    rng = random.Random(BENCHMARK_SEED)
+    codes = countryData.codes
+    pairs = [(countryData[rng.choice(codes)], countryData[rng.choice(codes)]) for _ in range(5000)]
+    codePairs = [(rng.choice(codes), rng.choice(codes)) for _ in range(5000)]
+    bearings = [rng.uniform(0, 360) for _ in range(20000)]
+    table = DistanceTable.load_or_build(countryData, DISTANCE_TABLE_PATH)
+
+    def distances():
+        for origin, destination in pairs:
+            get_distance_and_arrow(origin, destination)
+
+    def arrows():
+        for bearing in bearings:
+            get_arrow_direction(bearing)
+
+    def lookups():
+        for guess, secret in codePairs:
+            table.lookup(guess, secret)
+
+    return {
+        "compute.get_distance_and_arrow": metric(len(pairs) / time_call(distances, repeat=repeat), "ops/s", HIGHER_IS_BETTER),
+        "compute.get_arrow_direction": metric(len(bearings) / time_call(arrows, repeat=repeat), "ops/s", HIGHER_IS_BETTER),
+        "compute.distance_table_lookup": metric(len(codePairs) / time_call(lookups, repeat=repeat), "ops/s", HIGHER_IS_BETTER),
+        "compute.distance_table_build": metric(time_call(lambda: DistanceTable.build(countryData), repeat=repeat) * 1000, "ms"),
+    }
+
+def bench_spatial(repeat):
+    """Dựng SphericalIndex và độ trễ truy vấn k nước gần nhất / trong bán kính"""
+    countryData = load_country_data()
+    spatialIndex = SphericalIndex.from_countries(countryData)
+    codes = countryData.codes
+
+    def nearest():
+        for code in codes:
+            spatialIndex.nearest_to_country(code, 5)
+
+    def within():
+        for code in codes:
+            spatialIndex.within_country(code, 1000)
+
+    return {
+        "spatial.build": metric(time_call(lambda: SphericalIndex.from_countries(countryData), repeat=repeat) * 1000, "ms"),
+        "spatial.nearest_5": metric(time_call(nearest, repeat=repeat) / len(codes) * 1e6, "us"),
+        "spatial.within_1000km": metric(time_call(within, repeat=repeat) / len(codes) * 1e6, "us"),
+    }
+
+def bench_pack(repeat):
+    """
+    Gói dữ liệu giả lập ở nhiều kích thước: thời gian / bộ nhớ lúc mở, nạp một shard,
+    tra theo mã, autocomplete, tra tên và tính phản hồi (các shard đã nạp).
+    """
+    import tracemalloc
+    results = {}
+    workDir = tempfile.mkdtemp(prefix="worldle-pack-")
+    try:
+        for size in PACK_SIZES:
+            path = os.path.join(workDir, str(size))
+            generate_synthetic_pack(path, size, BENCHMARK_SEED)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            pack = DatasetPack(path)
+            openTime = time.perf_counter() - start
+            openBytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            shardLoad = time_call(lambda: (pack.loadedShards.clear(), pack.shard(0)), repeat=repeat)
+
+            # Mô phỏng vài ván: chỉ các shard được đụng tới mới nằm trong bộ nhớ
+            rng = random.Random(BENCHMARK_SEED)
+            pack.loadedShards.clear()
+            codes = [pack.random_code(rng) for _ in range(20)]
+            names = [pack[code]["Country Name"] for code in codes]
+            nameIndex = PackNameIndex(pack)
+            session = GameSession(pack)
+            session.start(codes[0])
+            for name in names:
+                nameIndex.resolve(name) # Nạp sẵn các shard tên được dùng
+
+            def lookup():
+                for code in codes:
+                    pack[code]["Latitude"]
+
+            def autocomplete():
+                for name in names:
+                    for length in (1, 2, 3):
+                        nameIndex.search(name[:length], 20)
+
+            def resolve():
+                for name in names:
+                    nameIndex.resolve(name)
+
+            typos = [name[:2] + name[3:] for name in names] # Thiếu ký tự thứ ba
+            start = time.perf_counter()
+            for typo in typos:
+                nameIndex.resolve(typo) # Lần đầu: đọc FuzzyIndex dựng sẵn của các shard tên liên quan
+            fuzzyCold = (time.perf_counter() - start) / len(typos)
+
+            def resolve_typo():
+                for typo in typos:
+                    nameIndex.resolve(typo)
+
+            def feedback():
+                for code in codes:
+                    session.feedback(code)
+
+            results[f"pack.{size}.open"] = metric(openTime * 1000, "ms")
+            results[f"pack.{size}.open_memory"] = metric(openBytes / 1024, "KB")
+            results[f"pack.{size}.shard_load"] = metric(shardLoad * 1000, "ms")
+            results[f"pack.{size}.lookup"] = metric(time_call(lookup, repeat=repeat) / len(codes) * 1e6, "us")
+            results[f"pack.{size}.autocomplete"] = metric(time_call(autocomplete, repeat=repeat) / (len(names) * 3) * 1e6, "us")
+            results[f"pack.{size}.resolve"] = metric(time_call(resolve, repeat=repeat) / len(names) * 1e6, "us")
+            results[f"pack.{size}.resolve_typo_cold"] = metric(fuzzyCold * 1000, "ms")
+            results[f"pack.{size}.resolve_typo"] = metric(time_call(resolve_typo, repeat=repeat) / len(typos) * 1e6, "us")
+            results[f"pack.{size}.feedback"] = metric(time_call(feedback, repeat=repeat) / len(codes) * 1e6, "us")
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+    return results
+
+def bench_load_assets(repeat):
+    """
+    GameApp.load_assets khi chưa có file tạo sẵn (cold: parse JSON, dựng bảng khoảng cách)
+    và khi đã có (warm: đọc snapshot). Chạy trên một đối tượng thay thế nên không cần cửa sổ Tk.
+    """
+    import main
+    savedPaths = (main.COUNTRY_SNAPSHOT_PATH, main.DISTANCE_TABLE_PATH)
+    workDir = tempfile.mkdtemp(prefix="worldle-bench-")
+    main.COUNTRY_SNAPSHOT_PATH = os.path.join(workDir, "country.bin")
+    main.DISTANCE_TABLE_PATH = os.path.join(workDir, "distance_table.npz")
+
+    def load():
+        main.GameApp.load_assets(types.SimpleNamespace(countryNametoCode={}))
+
+    def load_cold():
+        for path in (main.COUNTRY_SNAPSHOT_PATH, main.DISTANCE_TABLE_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+        load()
+
+    try:
+        cold = time_call(load_cold, repeat=repeat)
+        load()
+        warm = time_call(load, repeat=repeat)
+    finally:
+        main.COUNTRY_SNAPSHOT_PATH, main.DISTANCE_TABLE_PATH = savedPaths
+        shutil.rmtree(workDir, ignore_errors=True)
+    return {
+        "load_assets.cold": metric(cold * 1000, "ms"),
+        "load_assets.warm": metric(warm * 1000, "ms"),
+    }
+
+def bench_autocomplete(repeat):
+    """Độ trễ tra tiền tố theo độ dài tiền tố, phần diff gợi ý và tra tên gần đúng"""
+    from difflib import SequenceMatcher
+    from main import SUGGESTION_LIMIT
+    countryData = load_country_data()
+    entries = list(zip(countryData.names, countryData.codes))
+    index = PrefixIndex(entries)
+    resolver = FuzzyIndex(entries)
+    rng = random.Random(BENCHMARK_SEED)
+    names = [rng.choice(countryData.names) for _ in range(500)]
+
+    results = {}
+    for length in range(1, 7):
+        prefixes = [name[:length] for name in names]
+        def search():
+            for prefix in prefixes:
+                index.search(prefix, SUGGESTION_LIMIT)
+        results[f"autocomplete.prefix_{length}"] = metric(time_call(search, repeat=repeat) / len(prefixes) * 1e6, "us")
+
+    # Gõ từng ký tự của một tên: diff giữa danh sách gợi ý trước và sau mỗi phím
+    typed = [(index.search(name[:k], SUGGESTION_LIMIT), index.search(name[:k + 1], SUGGESTION_LIMIT))
+             for name in names[:100] for k in range(1, min(len(name), 6))]
+    def diff():
+        for old, new in typed:
+            SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+    results["autocomplete.suggestion_diff"] = metric(time_call(diff, repeat=repeat) / len(typed) * 1e6, "us")
+
+    typos = []
+    for name in names[:200]:
+        i = rng.randrange(len(name))
+        typos.append(name[:i] + name[i + 1:]) # Thiếu một ký tự
+    def fuzzy():
+        for typo in typos:
+            resolver.resolve(typo)
+    results["autocomplete.fuzzy_resolve"] = metric(time_call(fuzzy, repeat=repeat) / len(typos) * 1e6, "us")
+    return results
+
+def bench_raster(repeat):
+    """Thời gian cairosvg raster hóa từng asset (đúng file mà game dùng) ở BASE_IMAGE_SIZE"""
+    import cairosvg # Báo thiếu thư viện trước khi đo
+    countryCodes = sorted(name[:-4] for name in os.listdir(COUNTRY_IMAGE_PATH) if name.endswith(".svg"))
+    results = {}
+    assets = []
+    for code in countryCodes:
+        svg_path = country_svg_path(code)
+        seconds = time_call(lambda: render_svg(svg_path, BASE_IMAGE_SIZE), repeat=repeat)
+        results[f"raster.{code}"] = metric(seconds * 1000, "ms")
+        assets.append((os.path.getsize(f"{COUNTRY_IMAGE_PATH}{code}.svg"), os.path.getsize(svg_path), seconds, code))
+    results["raster.total"] = metric(sum(a[2] for a in assets) * 1000, "ms")
+
+    largest = sorted(assets, reverse=True)[:LARGEST_ASSET_COUNT]
+    details = [{"asset": code, "originalBytes": original, "renderedBytes": rendered, "ms": round(seconds * 1000, 3)}
+               for original, rendered, seconds, code in largest]
+    return results, {"largestAssets": details}
+
+def bench_guess_list(repeat):
+    """
+    Chi phí updateGuessList (cộng vẽ lại) theo số lượt đã đoán, trên GameApp thật.
+    Cần màn hình; không render ảnh nên không cần cairo.
+    """
+    import main
+    app = main.GameApp()
+    try:
+        app.withdraw()
+        app.load_assets() # Nạp trước để finish_startup không prefetch ảnh
+        rng = random.Random(BENCHMARK_SEED)
+        app.session.start(rng.choice(app.countryData.codes))
+        app.create_game_widget()
+        app.show_screen(app.gameScreen)
+
+        samples = {k: [] for k in GUESS_LIST_CHECKPOINTS}
+        for _ in range(repeat):
+            secret = rng.choice(app.countryData.codes)
+            app.session.start(secret)
+            app.updateGuessList()
+            wrong = [code for code in app.countryData.codes if code != secret]
+            rng.shuffle(wrong)
+            for count, code in enumerate(wrong[:max(GUESS_LIST_CHECKPOINTS)], start=1):
+                app.session.submit(code)
+                start = time.perf_counter()
+                app.updateGuessList()
+                app.update_idletasks()
+                if count in samples:
+                    samples[count].append(time.perf_counter() - start)
+    finally:
+        app.destroy()
+    return {f"guess_list.update_at_{k}": metric(statistics.median(v) * 1000, "ms") for k, v in samples.items() if v}
+
+BENCHMARKS = {
+    "compute": bench_compute,
+    "spatial": bench_spatial,
+    "pack": bench_pack,
+    "load_assets": bench_load_assets,
+    "autocomplete": bench_autocomplete,
+    "raster": bench_raster,
+    "guess_list": bench_guess_list,
+}
+
+def environment():
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpuCount": os.cpu_count(),
+        "numpy": numpy.__version__,
+    }
+
+def run_benchmarks(names, repeat):
+    """Chạy các nhóm benchmark; nhóm thiếu phụ thuộc (cairo, màn hình) được ghi vào skipped thay vì làm hỏng cả lần chạy"""
+    report = {"environment": environment(), "repeat": repeat, "metrics": {}, "details": {}, "skipped": {}}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            result = BENCHMARKS[name](repeat)
+        except Exception as e: # ImportError/OSError khi thiếu libcairo, TclError khi không có màn hình...
+            reason = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            report["skipped"][name] = reason
+            print(f"{name:<14} skipped ({reason})")
+            continue
+        metrics, details = result if isinstance(result, tuple) else (result, None)
+        report["metrics"].update(metrics)
+        if details:
+            report["details"][name] = details
+        print(f"{name:<14} {len(metrics)} metrics in {time.perf_counter() - start:.1f}s")
+    return report
+
+def compare(report, baseline, threshold):
+    """
+    So sánh với báo cáo gốc. Trả về danh sách (tên, gốc, hiện tại, tỉ lệ thay đổi, hồi quy?);
+    hồi quy khi kết quả xấu đi hơn threshold (0.1 = 10%) theo chiều 'better' của metric.
+    """
+    rows = []
+    for name, current in sorted(report["metrics"].items()):
+        old = baseline.get("metrics", {}).get(name)
+        if old is None or not old["value"]:
+            continue
+        change = current["value"] / old["value"] - 1
+        worse = change > threshold if current["better"] == LOWER_IS_BETTER else change < -threshold
+        rows.append((name, old["value"], current["value"], change, worse))
+    return rows
+
+def print_metrics(report):
+    for name, entry in sorted(report["metrics"].items()):
+        print(f"  {name:<36} {entry['value']:>14,.3f} {entry['unit']}")
+    for group in report["details"].values():
+        for asset in group.get("largestAssets", []):
+            print(f"  largest SVG {asset['asset']}: {asset['originalBytes'] / 1024:.0f} KB "
+                  f"(renders {asset['renderedBytes'] / 1024:.0f} KB) in {asset['ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the game's hot paths")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS), help="benchmark groups to run")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per benchmark (the median is reported)")
+    parser.add_argument("--output", default="benchmark.json", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.only, args.repeat)
+    print_metrics(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            rows = compare(report, json.load(f), args.threshold)
+        regressions = [row for row in rows if row[4]]
+        for name, old, new, change, worse in rows:
+            print(f"  {'REGRESSION' if worse else 'ok':<10} {name:<36} {old:>12,.3f} -> {new:>12,.3f} ({change:+.1%})")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
@@ -1,4 +1,26 @@
+import hashlib
 import math
+import os
+import zipfile
+
+# numpy chỉ được import trong các hàm của DistanceTable (import muộn để không làm chậm lúc khởi động game)
+
+EARTH_RADIUS_KM = 6371.0
+
+ARROW_DIRECTIONS = [
+    "↑",       # 337.5 - 22.5
+    "↗",  # 22.5 - 67.5
+    "→",      # 67.5 - 112.5
+    "↘",  # 112.5 - 157.5
+    "↓",       # 157.5 - 202.5
+    "↙",  # 202.5 - 247.5
+    "←",      # 247.5 - 292.5
+    "↖"   # 292.5 - 337.5
+]
+
+def get_arrow_index(bearing):
+    """Chỉ số (0-7) trong ARROW_DIRECTIONS ứng với góc phương vị"""
+    return int(((bearing + 22.5) % 360) / 45)
 
 def get_arrow_direction(bearing):
     """
@@ -15,18 +37,7 @@ def get_arrow_direction(bearing):
     #     "⬅️ (Tây)",      # 247.5 - 292.5
     #     "↖️ (Tây Bắc)"   # 292.5 - 337.5
     # ]
-    directions = [
-        "↑",       # 337.5 - 22.5
-        "↗",  # 22.5 - 67.5
-        "→",      # 67.5 - 112.5
-        "↘",  # 112.5 - 157.5
-        "↓",       # 157.5 - 202.5
-        "↙",  # 202.5 - 247.5
-        "←",      # 247.5 - 292.5
-        "↖"   # 292.5 - 337.5
-    ]
-    index = int(((bearing + 22.5) % 360) / 45)
-    return directions[index]
+    return ARROW_DIRECTIONS[get_arrow_index(bearing)]
 
 def get_distance_and_arrow(country_origin, country_destination):
     """
@@ -48,7 +59,7 @@ def get_distance_and_arrow(country_origin, country_destination):
     lon2_deg = country_destination["Longitude"]
 
     # --- 2. Hằng số và Chuyển đổi Radian ---
-    R = 6371.0  # Bán kính Trái Đất (km)
+    R = EARTH_RADIUS_KM  # Bán kính Trái Đất (km)
     
     lat1_rad = math.radians(lat1_deg)
     lon1_rad = math.radians(lon1_deg)
@@ -73,3 +84,102 @@ def get_distance_and_arrow(country_origin, country_destination):
     arrow = get_arrow_direction(bearing_deg)
 
     return round(distance_km, 1), arrow
+
+class DistanceTable:
+    """
+    Bảng khoảng cách và hướng tính sẵn cho mọi cặp quốc gia (N x N).
+
+    Hàng là nước BÍ MẬT, cột là nước ĐOÁN:
+        - distances[s, g]: khoảng cách (km, làm tròn 0.1) từ nước g tới nước s
+        - arrows[s, g]: chỉ số trong ARROW_DIRECTIONS của hướng từ g tới s
+    nên distances_from(secret) trả về toàn bộ phản hồi của một ván chỉ bằng một lần tra.
+    Kết quả trùng với get_distance_and_arrow(countryData[g], countryData[s]).
+    """
+
+    def __init__(self, codes, distances, arrows, key=None):
+        self.codes = list(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.distances = distances
+        self.arrows = arrows
+        self.key = key
+
+    @staticmethod
+    def data_key(countryData):
+        """Hash của mã nước và tọa độ, dùng để biết bảng đã lưu còn khớp dữ liệu hay không"""
+        digest = hashlib.sha1()
+        for code, data in countryData.items():
+            digest.update(f"{code}:{data['Latitude']!r}:{data['Longitude']!r};".encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, countryData):
+        """Tính cả bảng bằng NumPy, cùng công thức Haversine/phương vị với get_distance_and_arrow"""
+        import numpy as np
+        codes = list(countryData.keys())
+        if hasattr(countryData, "latitude"):
+            # CountryTable: tọa độ đã nằm sẵn trong mảng liền nhau
+            lat = np.radians(countryData.latitude)
+            lon = np.radians(countryData.longitude)
+        else:
+            lat = np.radians(np.array([countryData[c]["Latitude"] for c in codes], dtype=np.float64))
+            lon = np.radians(np.array([countryData[c]["Longitude"] for c in codes], dtype=np.float64))
+
+        # Nước đoán (gốc) theo cột, nước bí mật (đích) theo hàng
+        lat1, lon1 = lat[np.newaxis, :], lon[np.newaxis, :]
+        lat2, lon2 = lat[:, np.newaxis], lon[:, np.newaxis]
+
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        distances = np.round(EARTH_RADIUS_KM * c, 1)
+
+        Y = np.sin(dlon) * np.cos(lat2)
+        X = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+        bearing = (np.degrees(np.arctan2(Y, X)) + 360) % 360
+        arrows = (((bearing + 22.5) % 360) // 45).astype(np.uint8)
+
+        return cls(codes, distances, arrows, cls.data_key(countryData))
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["codes"].tolist(), data["distances"], data["arrows"], str(data["key"]))
+
+    def save(self, path):
+        """Ghi nguyên tử (file tạm rồi os.replace) để không bao giờ để lại file npz dở dang"""
+        import numpy as np
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f: # Truyền file object để np.savez không tự thêm đuôi .npz
+            np.savez(f, codes=np.array(self.codes), distances=self.distances, arrows=self.arrows, key=np.array(self.key))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_build(cls, countryData, path=None):
+        """Đọc bảng đã lưu nếu còn khớp countryData, nếu không thì tính lại (và lưu nếu có path)"""
+        key = cls.data_key(countryData)
+        if path is not None:
+            try:
+                table = cls.load(path)
+                if table.key == key:
+                    return table
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+                pass # Chưa có file hoặc file hỏng (bị cắt ngắn, ghi dở)
+        table = cls.build(countryData)
+        if path is not None:
+            try:
+                table.save(path)
+            except OSError as e:
+                print(f"Could not save distance table {path}: {e}")
+        return table
+
+    def distances_from(self, secretCode):
+        """Trả về (distances, arrows): khoảng cách và chỉ số hướng từ mọi nước tới secretCode, theo thứ tự self.codes"""
+        i = self.index[secretCode]
+        return self.distances[i], self.arrows[i]
+
+    def lookup(self, guessCode, secretCode):
+        """Giống get_distance_and_arrow nhưng chỉ là tra bảng"""
+        i, j = self.index[secretCode], self.index[guessCode]
+        return float(self.distances[i, j]), ARROW_DIRECTIONS[self.arrows[i, j]]
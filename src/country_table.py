@@ -0,0 +1,190 @@
+import json
+import os
+import struct
+import sys
+
+# numpy chỉ được import trong các hàm tạo/đọc/ghi bảng (import muộn để không làm chậm lúc khởi động game)
+
+SNAPSHOT_MAGIC = b"CTBL"
+SNAPSHOT_VERSION = 1
+# magic, version, số nước, mtime_ns và kích thước của file JSON nguồn, độ dài khối codes, độ dài khối names
+SNAPSHOT_HEADER = struct.Struct("<4sHIqqII")
+
+class CountryRecord:
+    """
+    Một hàng của CountryTable. Đọc được như dict cũ (record["Country Name"], record["Latitude"], ...)
+    nhưng chỉ giữ tham chiếu tới bảng và chỉ số hàng.
+    """
+    __slots__ = ("table", "id")
+
+    def __init__(self, table, id):
+        self.table = table
+        self.id = id
+
+    def __getitem__(self, field):
+        table = self.table
+        if field == "Country Name":
+            return table.names[self.id]
+        if field == "Latitude":
+            return float(table.latitude[self.id])
+        if field == "Longitude":
+            return float(table.longitude[self.id])
+        if field == "Area":
+            return float(table.area[self.id])
+        if field == "Population":
+            return int(table.population[self.id])
+        if field == "Country Code":
+            return table.codes[self.id]
+        raise KeyError(field)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    @property
+    def code(self):
+        return self.table.codes[self.id]
+
+    def __repr__(self):
+        return f"CountryRecord({self.code!r}, {self['Country Name']!r})"
+
+class CountryTable:
+    """
+    Bảng quốc gia dạng cột: vĩ độ, kinh độ, diện tích, dân số nằm trong các mảng NumPy liền nhau,
+    mã nước và tên được intern, mỗi nước có một id nguyên (vị trí trong bảng).
+    Dùng như dict (countryCode, record) để code cũ không phải đổi.
+    """
+
+    def __init__(self, codes, names, latitude, longitude, area, population):
+        self.codes = [sys.intern(code) for code in codes]
+        self.names = [sys.intern(name) for name in names]
+        self.latitude = latitude
+        self.longitude = longitude
+        self.area = area
+        self.population = population
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_records(cls, records):
+        """records: danh sách dict như trong country.json"""
+        import numpy as np
+        return cls(
+            [record["Country Code"].lower() for record in records],
+            [record["Country Name"] for record in records],
+            np.array([record["Latitude"] for record in records], dtype=np.float64),
+            np.array([record["Longitude"] for record in records], dtype=np.float64),
+            np.array([record["Area"] for record in records], dtype=np.float64),
+            np.array([record["Population"] for record in records], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_records(json.load(f))
+
+    @classmethod
+    def load(cls, json_path, snapshot_path=None):
+        """
+        Đọc snapshot nhị phân nếu nó còn khớp với country.json (so mtime và kích thước),
+        nếu không thì parse JSON và ghi lại snapshot.
+        """
+        if snapshot_path is None:
+            return cls.from_json(json_path)
+        stat = os.stat(json_path)
+        table = cls.load_snapshot(snapshot_path, stat.st_mtime_ns, stat.st_size)
+        if table is not None:
+            return table
+        table = cls.from_json(json_path)
+        try:
+            table.save_snapshot(snapshot_path, stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            print(f"Could not write country snapshot {snapshot_path}: {e}")
+        return table
+
+    @classmethod
+    def load_snapshot(cls, path, source_mtime_ns, source_size):
+        """Đọc snapshot bằng một lần read; trả về None nếu không có, hỏng hoặc đã cũ"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return cls.from_snapshot(data, source_mtime_ns, source_size)
+
+    @classmethod
+    def from_snapshot(cls, data, source_mtime_ns=None, source_size=None):
+        """
+        Dựng bảng từ snapshot trong bộ nhớ (bytes, hoặc memoryview của mmap: các cột số không bị copy).
+        source_mtime_ns/source_size là None thì không kiểm tra snapshot còn khớp JSON nguồn hay không.
+        """
+        import numpy as np
+        if len(data) < SNAPSHOT_HEADER.size:
+            return None
+        magic, version, count, mtime_ns, size, codesLength, namesLength = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            return None
+        if source_mtime_ns is not None and (mtime_ns != source_mtime_ns or size != source_size):
+            return None
+        if len(data) != SNAPSHOT_HEADER.size + count * 8 * 4 + codesLength + namesLength:
+            return None
+
+        offset = SNAPSHOT_HEADER.size
+        columns = []
+        for dtype in ("<f8", "<f8", "<f8", "<i8"):
+            columns.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+            offset += count * 8
+        codes = bytes(data[offset:offset + codesLength]).decode("utf-8").split("\0") if count else []
+        offset += codesLength
+        names = bytes(data[offset:offset + namesLength]).decode("utf-8").split("\0") if count else []
+        return cls(codes, names, *columns)
+
+    def snapshot_bytes(self, source_mtime_ns, source_size):
+        import numpy as np
+        codesBlob = "\0".join(self.codes).encode("utf-8")
+        namesBlob = "\0".join(self.names).encode("utf-8")
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self.codes),
+            source_mtime_ns, source_size, len(codesBlob), len(namesBlob)
+        )
+        columns = [
+            np.ascontiguousarray(column, dtype=dtype).tobytes()
+            for column, dtype in ((self.latitude, "<f8"), (self.longitude, "<f8"), (self.area, "<f8"), (self.population, "<i8"))
+        ]
+        return b"".join([header, *columns, codesBlob, namesBlob])
+
+    def save_snapshot(self, path, source_mtime_ns, source_size):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.snapshot_bytes(source_mtime_ns, source_size))
+        os.replace(tmp_path, path)
+
+    # Giao diện giống dict (countryCode, record)
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __getitem__(self, code):
+        return CountryRecord(self, self.index[code])
+
+    def get(self, code, default=None):
+        i = self.index.get(code)
+        return default if i is None else CountryRecord(self, i)
+
+    def keys(self):
+        return self.codes
+
+    def values(self):
+        return [CountryRecord(self, i) for i in range(len(self.codes))]
+
+    def items(self):
+        return [(code, CountryRecord(self, i)) for i, code in enumerate(self.codes)]
+
+    def record(self, id):
+        return CountryRecord(self, id)
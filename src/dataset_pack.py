@@ -0,0 +1,451 @@
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import time
+import zlib
+from collections import OrderedDict
+
+from country_table import CountryTable
+from search import FuzzyIndex, PrefixIndex, allowed_distance, edit_distance, fold_name, normalize_name
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_IMAGE_PATH = "./src/assets/countries/"
+
+PACK_FORMAT = "worldle-pack"
+PACK_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+DEFAULT_SHARD_SIZE = 1024 # Số mục trung bình trong một shard dữ liệu
+NAME_SHARD_SIZE = 256 # Số tên tối đa trong một shard tên (trừ khi các tên trùng nhau tới MAX_NAME_KEY_LENGTH ký tự)
+MAX_NAME_KEY_LENGTH = 8
+TYPO_MAX_DISTANCE = 2 # Khoảng cách sửa lỗi gõ tối đa, như FuzzyIndex mặc định
+MAX_LOADED_SHARDS = 32 # Số shard (mỗi loại) giữ trong bộ nhớ, shard ít dùng nhất bị bỏ trước
+SYNTHETIC_SVG_PATH = "svg/{shard}/{code}.svg"
+
+def record_shard_index(countryCode, shardCount):
+    """Shard chứa một mã: crc32 của mã (chữ thường) nên tra theo mã không cần chỉ mục nào"""
+    return zlib.crc32(countryCode.lower().encode("utf-8")) % shardCount
+
+def disambiguated_name(name, countryCode):
+    """Tên hiển thị của một mục trùng tên với mục khác trong gói, ví dụ Springfield (US-MO-SPR)"""
+    return f"{name} ({countryCode.upper()})"
+
+def shard_key_for(shards, folded):
+    """Khóa của shard (trong dict khóa -> shard chia bởi split_name_shards) chứa chuỗi folded; None nếu không có"""
+    if folded + "_" in shards:
+        return folded + "_"
+    for length in range(min(len(folded), MAX_NAME_KEY_LENGTH), 0, -1):
+        if folded[:length] in shards:
+            return folded[:length]
+    return None
+
+def typo_keys(folded):
+    """
+    MAX_NAME_KEY_LENGTH ký tự đầu của tên đã fold, cùng mọi chuỗi thu được khi xóa một ký tự trong đoạn đó
+    (cắt lại còn MAX_NAME_KEY_LENGTH). Tên và truy vấn khác nhau một ký tự thay / thiếu / thừa / đảo trong đoạn
+    này luôn có chung ít nhất một khóa, kể cả khi lỗi gõ làm truy vấn rơi vào shard tên khác.
+    """
+    head = folded[:MAX_NAME_KEY_LENGTH + 1]
+    keys = {folded[:MAX_NAME_KEY_LENGTH]}
+    for i in range(min(len(folded), MAX_NAME_KEY_LENGTH)):
+        keys.add((head[:i] + head[i + 1:])[:MAX_NAME_KEY_LENGTH])
+    keys.discard("")
+    return keys
+
+def split_name_shards(entries, shard_size=NAME_SHARD_SIZE):
+    """
+    Chia các mục (tên đã fold, ...) thành các shard tên: khóa là tiền tố của tên đã fold,
+    bắt đầu từ ký tự đầu và được nối dài thêm từng ký tự cho tới khi shard không quá shard_size tên.
+    Tên đã fold đúng bằng tiền tố của một nhóm bị chia nằm ở khóa tiền tố + "_"; tên không có chữ / số ở khóa "_".
+    Không khóa nào là tiền tố của khóa khác (trừ dạng "_"), nên mỗi tên thuộc đúng một shard.
+    """
+    shards = {}
+
+    def split(key, group):
+        if len(group) <= shard_size or len(key) >= MAX_NAME_KEY_LENGTH:
+            shards[key] = group
+            return
+        children = {}
+        for entry in group:
+            folded = entry[0]
+            children.setdefault(folded[:len(key) + 1] if len(folded) > len(key) else key + "_", []).append(entry)
+        for childKey, child in children.items():
+            if childKey.endswith("_"):
+                shards[childKey] = child
+            else:
+                split(childKey, child)
+
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry[0][:1] or "_", []).append(entry)
+    for key, group in groups.items():
+        if key == "_":
+            shards[key] = group
+        else:
+            split(key, group)
+    return shards
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+class DatasetPack:
+    """
+    Một gói dữ liệu lớn (tỉnh, quận huyện, thành phố...) đọc lười theo shard.
+    Lúc mở chỉ đọc manifest; bản ghi nằm trong các shard (định dạng như country.json) được chọn theo
+    crc32 của mã, mỗi shard được nạp thành một CountryTable khi lần đầu có mã của nó được tra.
+    Dùng như dict (countryCode, record) giống CountryTable nên GameSession và màn hình chơi không phải đổi;
+    riêng keys() / duyệt toàn bộ sẽ nạp mọi shard nên chỉ dành cho công cụ offline.
+    """
+
+    def __init__(self, path, max_loaded_shards=MAX_LOADED_SHARDS):
+        self.root = path
+        with open(os.path.join(path, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != PACK_FORMAT or manifest.get("version") != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} dataset pack")
+        self.name = manifest["name"]
+        self.entryCount = manifest["entryCount"]
+        self.recordShards = manifest["recordShards"] # [{"file", "count"}], vị trí = chỉ số shard
+        self.nameShards = manifest["nameShards"] # (khóa, {"file", "fuzzyFile", "count"})
+        self.nameShardKeys = sorted(self.nameShards)
+        self.typoShards = manifest["typoShards"] # [{"start", "file", "count"}] theo thứ tự khóa, chỉ mục lỗi gõ ở đầu tên
+        self.typoShardStarts = [shard["start"] for shard in self.typoShards]
+        self.svgTemplate = manifest.get("svgPath") # Đường dẫn tương đối so với gói, có {shard} và {code}
+        self.cumulativeCounts = list(itertools.accumulate(shard["count"] for shard in self.recordShards))
+        self.maxLoadedShards = max_loaded_shards
+        self.loadedShards = OrderedDict() # (chỉ số shard, CountryTable), LRU
+        self.shardLoads = 0 # Số lần đọc shard từ đĩa, để đo
+
+    def __len__(self):
+        return self.entryCount
+
+    def shard(self, index):
+        """CountryTable của một shard dữ liệu, đọc từ đĩa nếu chưa có trong bộ nhớ"""
+        table = self.loadedShards.get(index)
+        if table is not None:
+            self.loadedShards.move_to_end(index)
+            return table
+        with open(os.path.join(self.root, self.recordShards[index]["file"]), "r", encoding="utf-8") as f:
+            table = CountryTable.from_records(json.load(f))
+        self.shardLoads += 1
+        self.loadedShards[index] = table
+        if len(self.loadedShards) > self.maxLoadedShards:
+            self.loadedShards.popitem(last=False) # Bản ghi đang được giữ vẫn tham chiếu tới bảng của nó
+        return table
+
+    def shard_of(self, countryCode):
+        return self.shard(record_shard_index(countryCode, len(self.recordShards)))
+
+    def __contains__(self, code):
+        return code in self.shard_of(code)
+
+    def __getitem__(self, code):
+        return self.shard_of(code)[code]
+
+    def get(self, code, default=None):
+        return self.shard_of(code).get(code, default)
+
+    def __iter__(self):
+        for index in range(len(self.recordShards)):
+            yield from self.shard(index).codes
+
+    def keys(self):
+        """Mọi mã trong gói (nạp lần lượt mọi shard)"""
+        return list(self)
+
+    def random_code(self, rng):
+        """Một mã ngẫu nhiên đều trên cả gói: chọn shard theo số mục rồi chọn trong shard (chỉ nạp một shard)"""
+        index = bisect.bisect_right(self.cumulativeCounts, rng.randrange(self.entryCount))
+        return rng.choice(self.shard(index).codes)
+
+    def svg_path(self, countryCode):
+        """Đường dẫn SVG của một mục, tính từ mẫu trong manifest (không liệt kê thư mục); None nếu gói không có ảnh"""
+        if self.svgTemplate is None:
+            return None
+        shard = record_shard_index(countryCode, len(self.recordShards))
+        return os.path.join(self.root, self.svgTemplate.format(shard=f"{shard:04d}", code=countryCode))
+
+    def name_shard_key(self, folded):
+        """Khóa của shard tên chứa tên đã fold là folded (None nếu không shard nào có thể chứa nó)"""
+        return shard_key_for(self.nameShards, folded)
+
+    def name_shard_keys(self, prefix):
+        """Khóa các shard tên có thể chứa tên đã fold bắt đầu bằng prefix, theo thứ tự khóa"""
+        key = self.name_shard_key(prefix)
+        if key is not None and not key.endswith("_"):
+            return [key]
+        start = bisect.bisect_left(self.nameShardKeys, prefix)
+        end = bisect.bisect_left(self.nameShardKeys, prefix + "\uffff")
+        return self.nameShardKeys[start:end]
+
+    def read_name_shard(self, key):
+        """[(tên hiển thị, mã)] của shard tên có khóa key, đã sắp theo tên chuẩn hóa (rỗng nếu không có)"""
+        shard = self.nameShards.get(key)
+        if shard is None:
+            return []
+        with open(os.path.join(self.root, shard["file"]), "r", encoding="utf-8") as f:
+            return [tuple(entry) for entry in json.load(f)]
+
+    def read_fuzzy_shard(self, key):
+        """FuzzyIndex.state() của shard tên key, được dựng sẵn lúc ghi gói (None nếu không có)"""
+        shard = self.nameShards.get(key)
+        if shard is None:
+            return None
+        with open(os.path.join(self.root, shard["fuzzyFile"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def typo_shard_index(self, typoKey):
+        """Shard lỗi gõ chứa typoKey: mỗi shard giữ một đoạn liên tiếp các khóa đã sắp xếp (-1 nếu đứng trước mọi shard)"""
+        return bisect.bisect_right(self.typoShardStarts, typoKey) - 1
+
+    def read_typo_shard(self, index):
+        """(khóa lỗi gõ, [[tên đã fold, tên hiển thị, mã]]) của shard lỗi gõ thứ index"""
+        with open(os.path.join(self.root, self.typoShards[index]["file"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+class PackNameIndex:
+    """
+    Autocomplete và tra tên cho DatasetPack, cùng giao diện với PrefixIndex (search) và FuzzyIndex (resolve).
+    Shard tên có tối đa NAME_SHARD_SIZE tên và kèm FuzzyIndex dựng sẵn lúc ghi gói, nên mỗi truy vấn chỉ đọc
+    vài shard nhỏ và không dựng chỉ mục nào: độ trễ theo kích thước shard chứ không theo cả gói.
+    Lỗi gõ nằm sau khóa shard được sửa ngay trong shard tên như FuzzyIndex. Lỗi gõ ở đầu tên có thể đưa
+    truy vấn sang shard tên khác, nên được tra qua chỉ mục lỗi gõ (typo_keys) cũng dựng sẵn và chia shard
+    theo tiền tố: mỗi truy vấn chỉ đọc tối đa MAX_NAME_KEY_LENGTH + 1 shard nhỏ của chỉ mục này.
+    Các mục trùng tên được ghi với tên hiển thị riêng (disambiguated_name); gõ đúng tên chung trả về tất cả.
+    """
+
+    def __init__(self, pack, max_loaded_shards=MAX_LOADED_SHARDS):
+        self.pack = pack
+        self.maxLoadedShards = max_loaded_shards
+        self.shards = OrderedDict() # (khóa, PrefixIndex), LRU
+        self.fuzzyShards = OrderedDict() # (khóa, FuzzyIndex), LRU
+        self.typoIndexes = OrderedDict() # (chỉ số shard lỗi gõ, dict của read_typo_shard), LRU
+
+    def _cached(self, cache, key, load):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+        value = load(key)
+        cache[key] = value
+        if len(cache) > self.maxLoadedShards:
+            cache.popitem(last=False)
+        return value
+
+    def _shard(self, key):
+        return self._cached(self.shards, key, lambda key: PrefixIndex(self.pack.read_name_shard(key)))
+
+    def _fuzzy_shard(self, key):
+        return self._cached(self.fuzzyShards, key, lambda key: FuzzyIndex.from_state(self.pack.read_fuzzy_shard(key)))
+
+    def _typo_index(self, key):
+        return self._cached(self.typoIndexes, key, self.pack.read_typo_shard)
+
+    def __len__(self):
+        return len(self.pack)
+
+    def search_values(self, prefix, limit=None):
+        """Các shard được đọc lần lượt theo thứ tự khóa cho tới khi đủ limit kết quả"""
+        folded = fold_name(prefix)
+        if not folded:
+            return []
+        results = []
+        for key in self.pack.name_shard_keys(folded):
+            results += self._shard(key).search_values(prefix, None if limit is None else limit - len(results))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def search(self, prefix, limit=None):
+        return [name for name, _ in self.search_values(prefix, limit)]
+
+    def lookup(self, query, limit=5):
+        folded = fold_name(query)
+        if not folded:
+            return []
+        best = {} # (mã, (khoảng cách, tên hiển thị))
+        key = self.pack.name_shard_key(folded)
+        if key is not None:
+            for code, name, distance in self._fuzzy_shard(key).lookup(query, limit):
+                best[code] = (distance, name)
+        maxDistance = min(TYPO_MAX_DISTANCE, allowed_distance(folded))
+        if maxDistance > 0 and not any(distance == 0 for distance, _ in best.values()):
+            for typoKey in typo_keys(folded):
+                shard = self.pack.typo_shard_index(typoKey)
+                if shard < 0:
+                    continue
+                for candidate, name, code in self._typo_index(shard).get(typoKey, ()):
+                    distance = edit_distance(folded, candidate, maxDistance)
+                    if distance <= maxDistance and (code not in best or (distance, name) < best[code]):
+                        best[code] = (distance, name)
+        results = sorted(best.items(), key=lambda item: item[1])[:limit]
+        return [(code, name, distance) for code, (distance, name) in results]
+
+    def resolve(self, query):
+        matches = self.lookup(query, limit=3)
+        if not matches:
+            return None, []
+        if len(matches) == 1 or matches[0][2] < matches[1][2]:
+            return matches[0][0], matches
+        return None, matches
+
+def write_pack(path, records, name, shard_size=DEFAULT_SHARD_SIZE, svg_path=None, svg_for=None, name_shard_size=NAME_SHARD_SIZE):
+    """
+    Ghi một gói từ danh sách record (dict như trong country.json); manifest được ghi sau cùng nên
+    gói dở dang không bao giờ mở được. name_shard_size là số tên tối đa của shard tên / số mục của shard lỗi gõ. svg_for(record, đường dẫn) nếu có sẽ được gọi để ghi ảnh từng mục
+    theo mẫu svg_path; nếu không thì svg_path (nếu có) phải trỏ tới ảnh có sẵn.
+    """
+    shardCount = max(1, math.ceil(len(records) / shard_size))
+    recordBuckets = [[] for _ in range(shardCount)]
+    nameCounts = {}
+    for record in records:
+        folded = fold_name(record["Country Name"])
+        nameCounts[folded] = nameCounts.get(folded, 0) + 1
+    # (tên đã fold, tên hiển thị, mã, là alias): mục trùng tên được hiển thị bằng disambiguated_name,
+    # còn tên chung là alias của từng mục để gõ đúng tên đó vẫn hỏi lại được "Did you mean ...?"
+    nameEntries = []
+    for record in records:
+        code = record["Country Code"].lower()
+        shard = record_shard_index(code, shardCount)
+        recordBuckets[shard].append(record)
+        name = record["Country Name"]
+        folded = fold_name(name)
+        if nameCounts[folded] > 1:
+            nameEntries.append((folded, disambiguated_name(name, code), code, True))
+            name = disambiguated_name(name, code)
+        nameEntries.append((fold_name(name), name, code, False))
+        if svg_for is not None:
+            svg_for(record, os.path.join(path, svg_path.format(shard=f"{shard:04d}", code=code)))
+
+    manifest = {
+        "format": PACK_FORMAT,
+        "version": PACK_VERSION,
+        "name": name,
+        "entryCount": len(records),
+        "recordShards": [],
+        "nameShards": {},
+        "typoShards": [],
+        "svgPath": svg_path,
+    }
+    for shard, bucket in enumerate(recordBuckets):
+        file = f"records/{shard:04d}.json"
+        _write_json(os.path.join(path, file), bucket)
+        manifest["recordShards"].append({"file": file, "count": len(bucket)})
+    # Shard tên kèm FuzzyIndex dựng sẵn để lúc chơi không phải sinh biến thể xóa trên UI thread
+    # Alias nằm ở shard của tên chung, có thể khác shard của tên hiển thị
+    for number, (key, bucket) in enumerate(sorted(split_name_shards(nameEntries, name_shard_size).items())):
+        entries = sorted(((name, code) for _, name, code, alias in bucket if not alias), key=lambda entry: normalize_name(entry[0]))
+        fuzzy = FuzzyIndex(entries, max_distance=TYPO_MAX_DISTANCE)
+        for folded, name, code, alias in bucket:
+            if alias:
+                fuzzy.add_alias(folded, name, code)
+        file = f"names/{number:04d}.json"
+        fuzzyFile = f"names/{number:04d}.fuzzy.json"
+        _write_json(os.path.join(path, file), entries)
+        _write_json(os.path.join(path, fuzzyFile), fuzzy.state())
+        manifest["nameShards"][key] = {"file": file, "fuzzyFile": fuzzyFile, "count": len(entries)}
+    # Chỉ mục lỗi gõ: các khóa typo_keys đã sắp xếp, cắt thành đoạn khoảng name_shard_size mục (một khóa không bị chia đôi)
+    typoEntries = sorted((typoKey, folded, name, code) for folded, name, code, _ in nameEntries for typoKey in typo_keys(folded))
+    typoBuckets = [] # [khóa đầu tiên, (khóa, mục), số mục]
+    for typoKey, group in itertools.groupby(typoEntries, key=lambda entry: entry[0]):
+        group = [[folded, name, code] for _, folded, name, code in group]
+        if not typoBuckets or typoBuckets[-1][2] >= name_shard_size:
+            typoBuckets.append([typoKey, {}, 0])
+        typoBuckets[-1][1][typoKey] = group
+        typoBuckets[-1][2] += len(group)
+    for number, (start, index, count) in enumerate(typoBuckets):
+        file = f"typos/{number:04d}.json"
+        _write_json(os.path.join(path, file), index)
+        manifest["typoShards"].append({"start": start, "file": file, "count": count})
+    _write_json(os.path.join(path, MANIFEST_NAME), manifest)
+    return manifest
+
+SYLLABLES = (
+    "ka", "lo", "mi", "ra", "ten", "vor", "sa", "bel", "dun", "fi", "gar", "hal", "is", "jo", "kel",
+    "lin", "mar", "nor", "os", "pe", "quin", "ros", "sil", "tor", "ul", "ven", "wes", "yar", "zen", "al",
+    "bra", "cor", "del", "eth", "fen", "gil", "har", "ith", "lor", "mon", "nev", "or", "por", "ran",
+)
+DUPLICATE_NAME_RATE = 0.02 # Tỉ lệ mục giả lập trùng tên với một mục trước đó, như các quận / thành phố cùng tên
+PLACE_SUFFIXES = ("", "", "", " Hills", " Bay", " Falls", " Springs", " Valley", " Heights", " Point", " Harbor", " Ridge")
+
+def synthetic_records(count, seed=0):
+    """count mục giả lập: tên ghép từ âm tiết (khoảng DUPLICATE_NAME_RATE trùng tên mục khác), tâm phân bố đều trên mặt cầu"""
+    rng = random.Random(seed)
+    width = len(str(count))
+    names = set()
+    records = []
+    for i in range(count):
+        while True:
+            if records and rng.random() < DUPLICATE_NAME_RATE:
+                name = rng.choice(records)["Country Name"]
+                break
+            name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() + rng.choice(PLACE_SUFFIXES)
+            if name not in names:
+                break
+        names.add(name)
+        records.append({
+            "Country Code": f"r{i:0{width}d}",
+            "Country Name": name,
+            "Latitude": round(math.degrees(math.asin(rng.uniform(-1, 1))), 4),
+            "Longitude": round(rng.uniform(-180, 180), 4),
+            "Area": round(rng.lognormvariate(7, 1.5), 1),
+            "Population": int(rng.lognormvariate(10, 2)),
+        })
+    return records
+
+def write_synthetic_svg(record, path):
+    """Một hình đa giác ngẫu nhiên (cố định theo mã) làm ảnh của mục giả lập"""
+    rng = random.Random(record["Country Code"])
+    vertexCount = rng.randint(12, 40)
+    points = []
+    for i in range(vertexCount):
+        angle = 2 * math.pi * i / vertexCount
+        radius = rng.uniform(25, 45)
+        points.append(f"{50 + radius * math.cos(angle):.1f},{50 + radius * math.sin(angle):.1f}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><polygon points="{" ".join(points)}"/></svg>')
+
+def generate_synthetic_pack(path, count, seed=0, shard_size=DEFAULT_SHARD_SIZE, with_svgs=False):
+    records = synthetic_records(count, seed)
+    if with_svgs:
+        return write_pack(path, records, f"synthetic-{count}", shard_size, SYNTHETIC_SVG_PATH, write_synthetic_svg)
+    return write_pack(path, records, f"synthetic-{count}", shard_size)
+
+def pack_from_country_json(path, json_path=COUNTRY_DATA_PATH, image_path=COUNTRY_IMAGE_PATH, shard_size=DEFAULT_SHARD_SIZE):
+    """Gói từ country.json; ảnh trỏ tới thư mục SVG hiện có (đường dẫn tương đối) thay vì sao chép"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    svg_path = os.path.join(os.path.relpath(image_path, path), "{code}.svg")
+    return write_pack(path, records, os.path.splitext(os.path.basename(json_path))[0], shard_size, svg_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build dataset packs for large region catalogs")
+    parser.add_argument("path", help="pack directory")
+    parser.add_argument("--generate", type=int, metavar="COUNT", help="write a synthetic pack with COUNT entries")
+    parser.add_argument("--from-json", metavar="JSON", help="write a pack from a country.json-style file")
+    parser.add_argument("--with-svgs", action="store_true", help="also write a generated SVG for every synthetic entry")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.generate:
+        generate_synthetic_pack(args.path, args.generate, args.seed, args.shard_size, args.with_svgs)
+    elif args.from_json:
+        pack_from_country_json(args.path, args.from_json, shard_size=args.shard_size)
+    if args.generate or args.from_json:
+        print(f"Wrote {args.path} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    pack = DatasetPack(args.path)
+    print(f"{pack.name}: {len(pack)} entries in {len(pack.recordShards)} record shards and "
+          f"{len(pack.nameShards)} name shards, opened in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,91 @@
+import random
+from collections import namedtuple
+
+from compute import ARROW_DIRECTIONS, get_distance_and_arrow
+
+# Trạng thái của một lượt đoán
+GUESS_INVALID = "invalid"       # Mã nước không có trong dữ liệu
+GUESS_DUPLICATE = "duplicate"   # Đã đoán nước này trong ván
+GUESS_WRONG = "wrong"           # Đoán sai, có phản hồi khoảng cách/hướng
+GUESS_CORRECT = "correct"       # Đoán đúng, ván kết thúc
+GUESS_FINISHED = "finished"     # Ván đã kết thúc (thắng hoặc bỏ cuộc), không nhận thêm lượt
+
+GuessResult = namedtuple("GuessResult", ["status", "countryCode", "distance", "arrow"])
+
+class GameSession:
+    """
+    Luật chơi tách khỏi giao diện: chọn nước bí mật, nhận lượt đoán, trả phản hồi, thắng / bỏ cuộc.
+    Không phụ thuộc Tk nên chạy được headless (mô phỏng, kiểm thử).
+    Mỗi lượt đoán chỉ cấp phát đúng một GuessResult; các cấu trúc trạng thái được dùng lại giữa các ván.
+    """
+
+    def __init__(self, countryData, distanceTable=None, rng=None):
+        self.countryData = countryData
+        self.distanceTable = distanceTable
+        # Gói dữ liệu lớn (DatasetPack) tự chọn mã ngẫu nhiên mà không phải nạp toàn bộ danh sách mã
+        self.codes = None if hasattr(countryData, "random_code") else list(countryData.keys())
+        self.rng = rng if rng is not None else random.Random()
+
+        self.secretCode = None
+        self.guesses = [] # Mã nước đã đoán theo thứ tự
+        self.guessedSet = set()
+        self.won = False
+        self.finished = False
+
+        self.distances = None # Hàng phản hồi của nước bí mật trong distanceTable
+        self.arrows = None
+
+    def pick_secret(self):
+        """Chọn ngẫu nhiên một nước (chưa bắt đầu ván)"""
+        if self.codes is None:
+            return self.countryData.random_code(self.rng)
+        return self.rng.choice(self.codes)
+
+    def start(self, secretCode=None):
+        """Bắt đầu ván mới với secretCode (hoặc chọn ngẫu nhiên); trả về mã nước bí mật"""
+        if secretCode is None:
+            secretCode = self.pick_secret()
+        self.secretCode = secretCode
+        self.guesses.clear()
+        self.guessedSet.clear()
+        self.won = False
+        self.finished = False
+        if self.distanceTable is not None and secretCode in self.distanceTable.index:
+            self.distances, self.arrows = self.distanceTable.distances_from(secretCode)
+        else:
+            self.distances = self.arrows = None
+        return secretCode
+
+    @property
+    def secretData(self):
+        return self.countryData[self.secretCode]
+
+    def feedback(self, countryCode):
+        """(khoảng cách km, mũi tên) từ countryCode tới nước bí mật"""
+        if self.distances is not None:
+            i = self.distanceTable.index.get(countryCode)
+            if i is not None:
+                return self.distances.item(i), ARROW_DIRECTIONS[self.arrows.item(i)]
+        return get_distance_and_arrow(self.countryData[countryCode], self.countryData[self.secretCode])
+
+    def submit(self, countryCode):
+        """Nhận một lượt đoán (mã nước) và trả về GuessResult"""
+        if self.finished:
+            return GuessResult(GUESS_FINISHED, countryCode, None, None)
+        if countryCode not in self.countryData:
+            return GuessResult(GUESS_INVALID, countryCode, None, None)
+        if countryCode in self.guessedSet:
+            return GuessResult(GUESS_DUPLICATE, countryCode, None, None)
+
+        self.guesses.append(countryCode)
+        self.guessedSet.add(countryCode)
+        distance, arrow = self.feedback(countryCode)
+        if countryCode == self.secretCode:
+            self.won = True
+            self.finished = True
+            return GuessResult(GUESS_CORRECT, countryCode, distance, arrow)
+        return GuessResult(GUESS_WRONG, countryCode, distance, arrow)
+
+    def give_up(self):
+        self.finished = True
+        self.won = False
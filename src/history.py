@@ -0,0 +1,283 @@
+import argparse
+import copy
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+HISTORY_PATH = "./src/assets/history.sqlite3"
+HISTORY_SCHEMA_VERSION = 1
+FLUSH_DELAY_S = 1.0 # Gom các ván kết thúc trong khoảng này vào một transaction
+MAX_BATCH_SIZE = 64
+
+# Một ván đã kết thúc; guesses: [(mã nước, khoảng cách km, mũi tên)] theo thứ tự đoán
+RoundRecord = namedtuple("RoundRecord", ["secret", "guesses", "won", "startedAt", "duration"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    secret TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    guess_count INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guesses (
+    round_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    distance REAL,
+    arrow TEXT,
+    PRIMARY KEY (round_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summary (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    current_streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS histogram (
+    guess_count INTEGER PRIMARY KEY,
+    wins INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS country_stats (
+    code TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    total_guesses INTEGER NOT NULL,
+    best_guesses INTEGER
+);
+"""
+
+class HistoryError(Exception):
+    """Không mở được lịch sử chơi (file hỏng, thư mục chỉ đọc, schema mới hơn); bên gọi không cần biết tới sqlite3"""
+
+def round_from_session(session, startedAt, duration):
+    """RoundRecord của ván vừa kết thúc trong một GameSession"""
+    guesses = [(code, *session.feedback(code)) for code in session.guesses]
+    return RoundRecord(session.secretCode, guesses, session.won, startedAt, duration)
+
+class HistoryStats:
+    """
+    Các số liệu tổng hợp được cập nhật dần theo từng ván (apply), không bao giờ quét lại toàn bộ lịch sử:
+    đọc tỉ lệ thắng, chuỗi thắng, phân bố số lượt đoán hay thống kê của một nước đều là O(1).
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.currentStreak = 0
+        self.bestStreak = 0
+        self.histogram = {} # (số lượt đoán của ván thắng, số ván)
+        self.countries = {} # (mã nước bí mật, [số ván, số ván thắng, tổng lượt đoán, ít lượt nhất khi thắng])
+
+    @property
+    def winRate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    def apply(self, record):
+        guessCount = len(record.guesses)
+        self.games += 1
+        if record.won:
+            self.wins += 1
+            self.currentStreak += 1
+            self.bestStreak = max(self.bestStreak, self.currentStreak)
+            self.histogram[guessCount] = self.histogram.get(guessCount, 0) + 1
+        else:
+            self.currentStreak = 0
+        country = self.countries.setdefault(record.secret, [0, 0, 0, None])
+        country[0] += 1
+        country[2] += guessCount
+        if record.won:
+            country[1] += 1
+            country[3] = guessCount if country[3] is None else min(country[3], guessCount)
+
+    def country(self, countryCode):
+        """(số ván, số ván thắng, tổng lượt đoán, ít lượt nhất khi thắng) của một nước"""
+        return tuple(self.countries.get(countryCode, (0, 0, 0, None)))
+
+    @classmethod
+    def load(cls, connection):
+        """Đọc các bảng tổng hợp (kích thước theo số nước, không theo số ván đã chơi)"""
+        stats = cls()
+        row = connection.execute("SELECT games, wins, current_streak, best_streak FROM summary WHERE id = 0").fetchone()
+        if row is not None:
+            stats.games, stats.wins, stats.currentStreak, stats.bestStreak = row
+        stats.histogram = dict(connection.execute("SELECT guess_count, wins FROM histogram"))
+        stats.countries = {
+            code: [games, wins, total, best]
+            for code, games, wins, total, best in connection.execute(
+                "SELECT code, games, wins, total_guesses, best_guesses FROM country_stats"
+            )
+        }
+        return stats
+
+    def save_round(self, connection, record):
+        """Ghi các dòng tổng hợp mà record vừa làm thay đổi (gọi sau apply, trong cùng transaction)"""
+        connection.execute(
+            "INSERT OR REPLACE INTO summary (id, games, wins, current_streak, best_streak) VALUES (0, ?, ?, ?, ?)",
+            (self.games, self.wins, self.currentStreak, self.bestStreak),
+        )
+        guessCount = len(record.guesses)
+        if record.won:
+            connection.execute(
+                "INSERT OR REPLACE INTO histogram (guess_count, wins) VALUES (?, ?)",
+                (guessCount, self.histogram[guessCount]),
+            )
+        connection.execute(
+            "INSERT OR REPLACE INTO country_stats (code, games, wins, total_guesses, best_guesses) VALUES (?, ?, ?, ?, ?)",
+            (record.secret, *self.countries[record.secret]),
+        )
+
+class PlayHistory:
+    """
+    Lịch sử chơi trong SQLite: bảng rounds / guesses chỉ được thêm vào, các bảng tổng hợp
+    (summary, histogram, country_stats) được cập nhật trong cùng transaction với ván mới.
+    record() chỉ cập nhật số liệu trong bộ nhớ rồi đưa ván vào hàng đợi; một writer thread
+    gom các ván trong FLUSH_DELAY_S thành một transaction nên UI thread không bao giờ chờ đĩa.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            # Sau khi mở, kết nối chỉ được writer thread dùng (hoặc luồng gọi khi chưa có writer)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self._migrate()
+            self.stats = HistoryStats.load(self.connection) # Bản của UI thread
+        except (OSError, sqlite3.Error) as e:
+            raise HistoryError(f"Could not open play history {path}: {e}") from e
+        self.writerStats = copy.deepcopy(self.stats) # Bản của writer thread, đi kèm các dòng đã ghi
+        self.queue = queue.Queue()
+        self.writer = None
+
+    def _migrate(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > HISTORY_SCHEMA_VERSION:
+            raise HistoryError(f"{self.path} was written by a newer version (schema {version})")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+
+    def record(self, record):
+        """Ghi nhận một ván đã kết thúc; trả về ngay, việc ghi xuống đĩa diễn ra trên writer thread"""
+        self.stats.apply(record)
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._run_writer, name="history-writer", daemon=True)
+            self.writer.start()
+        self.queue.put(record)
+
+    def _run_writer(self):
+        while True:
+            batch = []
+            controls = []
+            item = self.queue.get()
+            deadline = time.monotonic() + FLUSH_DELAY_S
+            while True:
+                if isinstance(item, RoundRecord):
+                    batch.append(item)
+                else:
+                    controls.append(item) # Event của flush() hoặc None của close(): ghi ngay
+                if controls or len(batch) >= MAX_BATCH_SIZE:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for control in controls:
+                if control is None:
+                    return
+                control.set()
+
+    def _write(self, batch):
+        try:
+            with self.connection:
+                for record in batch:
+                    cursor = self.connection.execute(
+                        "INSERT INTO rounds (secret, won, guess_count, started_at, duration) VALUES (?, ?, ?, ?, ?)",
+                        (record.secret, int(record.won), len(record.guesses), record.startedAt, record.duration),
+                    )
+                    self.connection.executemany(
+                        "INSERT INTO guesses (round_id, position, code, distance, arrow) VALUES (?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid, position, code, distance, arrow)
+                         for position, (code, distance, arrow) in enumerate(record.guesses)],
+                    )
+                    self.writerStats.apply(record)
+                    self.writerStats.save_round(self.connection, record)
+        except sqlite3.Error as e:
+            # Transaction đã rollback: nạp lại số liệu từ đĩa để bản của writer khớp với file
+            print(f"Could not write play history {self.path}: {e}")
+            self.writerStats = HistoryStats.load(self.connection)
+
+    def flush(self):
+        """Chờ tới khi mọi ván đã record() được ghi xuống đĩa"""
+        if self.writer is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def rebuild_aggregates(self):
+        """Tính lại các bảng tổng hợp từ rounds / guesses (sửa chữa; không dùng khi đang có writer)"""
+        stats = HistoryStats()
+        with self.connection:
+            for table in ("summary", "histogram", "country_stats"):
+                self.connection.execute(f"DELETE FROM {table}")
+            rounds = self.connection.execute("SELECT id, secret, won, started_at, duration FROM rounds ORDER BY id").fetchall()
+            for roundId, secret, won, startedAt, duration in rounds:
+                guesses = self.connection.execute(
+                    "SELECT code, distance, arrow FROM guesses WHERE round_id = ? ORDER BY position", (roundId,)
+                ).fetchall()
+                record = RoundRecord(secret, guesses, bool(won), startedAt, duration)
+                stats.apply(record)
+                stats.save_round(self.connection, record)
+        self.stats = stats
+        self.writerStats = copy.deepcopy(stats)
+        return len(rounds)
+
+    def recent_rounds(self, limit=10):
+        """Các ván gần nhất: [(bí mật, thắng, số lượt, lúc bắt đầu, thời lượng giây)]"""
+        return self.connection.execute(
+            "SELECT secret, won, guess_count, started_at, duration FROM rounds ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def close(self):
+        """Ghi nốt các ván đang chờ rồi đóng file"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the local play history")
+    parser.add_argument("--path", default=HISTORY_PATH)
+    parser.add_argument("--recent", type=int, default=10, help="number of recent rounds to list")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the aggregate tables from the round log")
+    args = parser.parse_args()
+
+    history = PlayHistory(args.path)
+    if args.rebuild:
+        start = time.perf_counter()
+        count = history.rebuild_aggregates()
+        print(f"Rebuilt aggregates from {count} rounds in {time.perf_counter() - start:.2f}s")
+
+    stats = history.stats
+    print(f"Played {stats.games}, won {stats.wins} ({stats.winRate:.0%}), "
+          f"current streak {stats.currentStreak}, best streak {stats.bestStreak}")
+    for guessCount in sorted(stats.histogram):
+        print(f"  {guessCount:3d} guesses: {stats.histogram[guessCount]}")
+    for secret, won, guessCount, startedAt, duration in history.recent_rounds(args.recent):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(startedAt))
+        print(f"  {when}  {secret}  {'won' if won else 'gave up'} after {guessCount} guesses in {duration:.0f}s")
+    history.close()
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+def ctk_image_nbytes(image):
+    """
+    Ước lượng bộ nhớ một CTkImage chiếm: ảnh PIL gốc cộng bản PhotoImage
+    mà Tk giữ khi hiển thị (4 byte/pixel). light/dark dùng chung một ảnh nên chỉ tính một lần.
+    """
+    pil_image = image.cget("light_image")
+    width, height = image.cget("size")
+    return pil_image.width * pil_image.height * len(pil_image.getbands()) + width * height * 4
+
+class ImageCache:
+    """
+    Cache LRU giới hạn theo tổng số byte.
+    Khóa bị pin (ví dụ ảnh của nước bí mật hiện tại) không bao giờ bị loại,
+    kể cả khi riêng chúng đã vượt quá ngân sách.
+    """
+
+    def __init__(self, maxBytes, sizeof=ctk_image_nbytes):
+        self.maxBytes = maxBytes
+        self.sizeof = sizeof
+        self.currentBytes = 0
+        self.entries = OrderedDict() # (key, (value, nbytes)), cũ nhất ở đầu
+        self.pinned = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = self.sizeof(value)
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.currentBytes -= old[1]
+        self.entries[key] = (value, nbytes)
+        self.currentBytes += nbytes
+        self._evict()
+
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return default
+        self.currentBytes -= entry[1]
+        self.pinned.discard(key)
+        return entry[0]
+
+    def pin(self, key):
+        self.pinned.add(key)
+
+    def unpin(self, key):
+        self.pinned.discard(key)
+        self._evict()
+
+    def _evict(self):
+        """Loại các mục ít dùng nhất (bỏ qua mục bị pin) cho tới khi về dưới ngân sách"""
+        if self.currentBytes <= self.maxBytes:
+            return
+        for key in list(self.entries):
+            if self.currentBytes <= self.maxBytes:
+                break
+            if key in self.pinned:
+                continue
+            _, nbytes = self.entries.pop(key)
+            self.currentBytes -= nbytes
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.currentBytes,
+            "maxBytes": self.maxBytes,
+            "pinned": len(self.pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
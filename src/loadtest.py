@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter, deque
+
+from country_table import CountryTable
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin"
+
+class HttpClient:
+    """Một kết nối HTTP/1.1 keep-alive tối giản để tạo tải, không cần thư viện ngoài"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None, headers=None):
+        """Trả về (status, headers, body bytes)"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        if payload is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        statusLine, *headerLines = head.decode("latin-1").split("\r\n")
+        responseHeaders = {}
+        for line in headerLines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                responseHeaders[name.strip().lower()] = value.strip()
+        length = int(responseHeaders.get("content-length", 0))
+        responseBody = await self.reader.readexactly(length) if length else b""
+        return int(statusLine.split(" ", 2)[1]), responseHeaders, responseBody
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class LoadTest:
+    """
+    Mở trước sessions phiên để server luôn giữ nhiều phiên sống cùng lúc, rồi connections kết nối
+    keep-alive lần lượt đoán một lượt (nước ngẫu nhiên chưa đoán) cho từng phiên theo vòng tròn.
+    Mỗi phiên tải ảnh hai lần: lần đầu lấy PNG, lần sau gửi If-None-Match và mong nhận 304.
+    """
+
+    def __init__(self, host, port, sessions, connections, codes, max_guesses=None, seed=0):
+        self.host = host
+        self.port = port
+        self.sessionCount = sessions
+        self.connectionCount = connections
+        self.codes = codes
+        self.maxGuesses = max_guesses
+        self.rng = random.Random(seed)
+        self.latencies = {} # (loại request, [giây])
+        self.statuses = Counter()
+        self.queue = deque()
+        self.gamesFinished = 0
+
+    async def timed(self, client, kind, method, path, payload=None, headers=None):
+        start = time.perf_counter()
+        status, responseHeaders, body = await client.request(method, path, payload, headers)
+        self.latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        self.statuses[f"{kind} {status}"] += 1
+        return status, responseHeaders, body
+
+    async def open_sessions(self, client, count):
+        for _ in range(count):
+            _, _, body = await self.timed(client, "create", "POST", "/api/sessions")
+            state = json.loads(body)
+            order = list(self.codes)
+            self.rng.shuffle(order)
+            if self.maxGuesses:
+                order = order[:self.maxGuesses] # Bỏ dở ván sau maxGuesses lượt
+            self.queue.append({"id": state["session"], "order": order, "imageChecked": False})
+
+    async def play(self, client):
+        while self.queue:
+            session = self.queue.popleft()
+            if not session["imageChecked"]:
+                path = f"/api/sessions/{session['id']}/image"
+                status, headers, _ = await self.timed(client, "image", "GET", path)
+                if status == 200:
+                    await self.timed(client, "image-etag", "GET", path, headers={"If-None-Match": headers["etag"]})
+                session["imageChecked"] = True
+            code = session["order"].pop()
+            _, _, body = await self.timed(client, "guess", "POST", f"/api/sessions/{session['id']}/guesses", {"code": code})
+            if json.loads(body).get("status") == "correct" or not session["order"]:
+                self.gamesFinished += 1
+            else:
+                self.queue.append(session)
+
+    async def run(self):
+        clients = [HttpClient(self.host, self.port) for _ in range(self.connectionCount)]
+        await asyncio.gather(*(client.connect() for client in clients))
+        try:
+            perClient = [self.sessionCount // len(clients) + (i < self.sessionCount % len(clients)) for i in range(len(clients))]
+            start = time.perf_counter()
+            await asyncio.gather(*(self.open_sessions(client, count) for client, count in zip(clients, perClient)))
+            _, _, body = await clients[0].request("GET", "/healthz")
+            liveSessions = json.loads(body)["sessions"]
+            await asyncio.gather(*(self.play(client) for client in clients))
+            elapsed = time.perf_counter() - start
+        finally:
+            for client in clients:
+                client.close()
+        return elapsed, liveSessions
+
+    def report(self, elapsed, liveSessions):
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:,.0f} req/s), "
+              f"{self.gamesFinished} sessions played, {liveSessions} live sessions at peak")
+        for kind, values in self.latencies.items():
+            values = sorted(values)
+            p = lambda q: values[min(len(values) - 1, int(len(values) * q))] * 1000
+            print(f"  {kind:<11} n={len(values):<7} p50 {p(0.5):7.2f} ms  p95 {p(0.95):7.2f} ms  "
+                  f"p99 {p(0.99):7.2f} ms  mean {statistics.fmean(values) * 1000:7.2f} ms")
+        print("  statuses: " + ", ".join(f"{key} x{count}" for key, count in sorted(self.statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for python src/main.py --serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sessions", type=int, default=5000, help="game sessions kept open at the same time")
+    parser.add_argument("--connections", type=int, default=100, help="concurrent keep-alive connections")
+    parser.add_argument("--max-guesses", type=int, default=10, help="guesses per session before abandoning it (0: play to the end)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    codes = CountryTable.load(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH).codes
+    test = LoadTest(args.host, args.port, args.sessions, args.connections, codes, args.max_guesses, args.seed)
+    elapsed, liveSessions = asyncio.run(test.run())
+    test.report(elapsed, liveSessions)
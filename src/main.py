@@ -1,11 +1,18 @@
+import time
+STARTUP_TIME = time.perf_counter() # Mốc cho --startup-profile, đặt trước mọi import nặng
+
+import argparse
+import os
 import customtkinter as ctk
-from PIL import Image
-import cairosvg
-import io
-import json
-import random
+from concurrent.futures import ThreadPoolExecutor
 
-from compute import get_distance_and_arrow
+from asset_bundle import load_aliases, load_country_table
+from compute import DistanceTable
+from game_session import GUESS_CORRECT, GUESS_DUPLICATE, GameSession
+from image_cache import ImageCache
+import render
+from render import has_country_svg, load_country_image, load_country_image_with_preview, preview_image, set_svg_resolver
+from search import FuzzyIndex, PrefixIndex, normalize_name
 
 BACKGROUND_COLOR = "#1e1e1e"
 TEXT_COLOR = "#ffffff"
@@ -15,65 +22,204 @@ FONT_SMALL = ("Arial", 18, "bold")
 FONT_ERROR = ("Arial", 16, "bold")
 
 COUNTRY_DATA_PATH = "./src/assets/country.json"
-COUNTRY_IMAGE_PATH = "./src/assets/countries/"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin" # Bản nhị phân của country.json, tự tạo lại khi JSON đổi
+DISTANCE_TABLE_PATH = "./src/assets/distance_table.npz"
+COUNTRY_ALIASES_PATH = "./src/assets/country_aliases.json"
+
+PREFETCH_POLL_MS = 50 # Chu kỳ kiểm tra kết quả render nền
+IMAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Ngân sách bộ nhớ cho cache ảnh quốc gia
+
+SUGGESTION_LIMIT = 20 # Số gợi ý tối đa hiển thị cho mỗi lần gõ
+SUGGESTION_DEBOUNCE_MS = 60 # Gộp các phím gõ liên tiếp trong khoảng này thành một lần cập nhật
+GUESS_ROW_POOL_SIZE = 20 # Số hàng lượt đoán giữ lại để dùng cho ván sau
+
+GAME_IMAGE_SIZE = 400
+END_IMAGE_SIZE = 300
 
 # Set customtkinter appearance
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+class StartupProfiler:
+    """Ghi thời gian (wall time) của từng giai đoạn khởi động cho --startup-profile"""
+
+    def __init__(self, startTime):
+        self.startTime = startTime
+        self.lastTime = startTime
+        self.phases = [] # (tên giai đoạn, giây)
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.lastTime))
+        self.lastTime = now
+
+    def report(self):
+        print("Startup profile:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<12} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':<12} {(self.lastTime - self.startTime) * 1000:8.1f} ms")
+
 class GameApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, imageCacheBytes=IMAGE_CACHE_MAX_BYTES, startupProfiler=None, tracer=None, packPath=None):
         super().__init__()
         self.title("Game Application")
         self.geometry("1920x1080")
         self.config(bg=BACKGROUND_COLOR)
-
-        # Load assets
-        self.countryData = {} # (countryCode, data) (data: [Country Name, Latitude, Longitude, Population, Area])
+        self.startupProfiler = startupProfiler
+        self.mark_startup("tk init")
+        self.tracer = tracer
+        self.lagProbe = None
+        if tracer is not None:
+            self.enable_tracing(tracer) # Trước khi tạo widget để command/bind trỏ tới bản được bọc
+
+        # Assets được nạp sau lần vẽ đầu tiên (finish_startup)
+        self.packPath = packPath # Thư mục DatasetPack (--pack) thay cho country.json
+        self.countryData = None # CountryTable, dùng như dict (countryCode, record) (record: [Country Name, Latitude, Longitude, Population, Area])
         self.countryNametoCode = {} # (countryName.lower(), countryCode)
-        self.countryImages = {} # Cache for country SVG images (countryCode, SvgImage)
-        self.load_assets()
+        self.distanceTable = None # Bảng khoảng cách/hướng tính sẵn cho mọi cặp nước
+        self.countryNameIndex = None # Chỉ mục tiền tố cho autocomplete
+        self.countryResolver = None # Chỉ mục tra tên gần đúng (gõ sai, bỏ dấu, tên khác)
+        self.session = None # GameSession: luật chơi của ván hiện tại, không phụ thuộc Tk
+        self.history = None # PlayHistory: lịch sử chơi và số liệu tổng hợp, ghi trên thread riêng
+        self.countryImages = ImageCache(imageCacheBytes) # LRU cache for country images ((countryCode, size), CTkImage)
+
+        # Prefetch nước bí mật của ván kế tiếp trên worker thread
+        self.prefetchExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.nextCountry = None
+        self.renderFutures = {} # (countryCode, Future) các ảnh GAME_IMAGE_SIZE đang render trên worker
 
         # Secret country for the current game
         self.secretCountry = None
         self.secretCountryData = None
         self.secretCountryImage = None
+        self.showingPreview = False # secretCountryImage đang là ảnh tạm, được thay khi render xong
+        self.roundStartedAt = None # time.time() lúc bắt đầu ván, lưu vào lịch sử
+        self.roundStartClock = None # perf_counter() lúc bắt đầu ván, để tính thời lượng
 
         # Main frames
         self.startScreen = None
         self.gameScreen = None
         self.endScreen = None
         self.howToPlayScreen = None
+        self.currentScreen = None # Frame đang được pack
+
+        # Các widget của màn hình kết thúc được cập nhật mỗi ván
+        self.endTitleLabel = None
+        self.endResultLabel = None
+        self.endImageLabel = None
+        self.endAnswerLabel = None
+        self.endInfoLabel = None
+        self.endStatsLabel = None
 
         self.entry = None
+        self.countryImageLabel = None
         self.listBoxGuessed = None # List box những nước đã đoán
-        self.guessedCountries = [] # List of guessed country codes
+        self.guessRows = [] # Các hàng đang hiển thị, theo thứ tự đoán
+        self.guessRowPool = [] # Các hàng đã ẩn, chờ dùng lại
+        self.emptyGuessLabel = None
 
         self.selectedIndex = -1
         self.textBoxFrame = None        
         self.textBoxSuggestions = None # List box suggest countries
         self.curSuggestions = []
+        self.suggestionLines = [] # Các dòng đang có trong textBoxSuggestions
+        self.suggestionsVisible = False
+        self.suggestionJob = None # after() id của lần cập nhật gợi ý đang chờ
 
         self.toastLabel = None  # Toast notification label
 
         self.show_start_screen()
+        # Màn hình chính hiện lên trước, dữ liệu được nạp ngay sau đó khi event loop rảnh
+        self.after_idle(self.finish_startup)
+
+    def enable_tracing(self, tracer):
+        """Bọc các handler, callback after() và hàm render để ghi thời gian (chỉ dùng với --trace)"""
+        from tracing import TRACED_HANDLERS, TRACED_RENDER_FUNCTIONS, EventLoopProbe
+        tracer.instrument(self, TRACED_HANDLERS)
+        tracer.instrument_after(self)
+        tracer.instrument_module(render, TRACED_RENDER_FUNCTIONS)
+        self.lagProbe = EventLoopProbe(self, tracer)
+        self.lagProbe.start()
+
+    def mark_startup(self, phase):
+        if self.startupProfiler is not None:
+            self.startupProfiler.mark(phase)
+
+    def finish_startup(self):
+        self.update_idletasks() # Đảm bảo màn hình chính đã được vẽ
+        self.mark_startup("first paint")
+        self.ensure_assets_loaded()
+        self.mark_startup("asset load")
+        if self.startupProfiler is not None:
+            self.startupProfiler.report()
+            self.startupProfiler = None
+
+    def ensure_assets_loaded(self):
+        """Nạp dữ liệu nếu chưa nạp (người chơi có thể bấm Play trước khi finish_startup chạy)"""
+        if self.countryData is None:
+            if self.packPath is not None:
+                self.load_pack(self.packPath)
+            else:
+                self.load_assets()
+            self.open_history()
+            self.prefetch_next_country()
 
     def load_assets(self):
-        # Load country data from JSON
-        with open(COUNTRY_DATA_PATH, "r") as f:
-            data = json.load(f)
-
-        for country in data:
-            countryInfo = country.copy()
-            key = (countryInfo.pop("Country Code")).lower()
-            self.countryData[key] = countryInfo
-            self.countryNametoCode[countryInfo["Country Name"].lower()] = key
+        # Load country data (bundle hoặc snapshot nhị phân nếu còn khớp, nếu không thì từ JSON)
+        self.countryData = load_country_table(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+        for code, name in zip(self.countryData.codes, self.countryData.names):
+            self.countryNametoCode[name.lower()] = code
+
+        self.distanceTable = DistanceTable.load_or_build(self.countryData, DISTANCE_TABLE_PATH)
+        self.countryNameIndex = PrefixIndex(zip(self.countryData.names, self.countryData.codes))
+
+        aliases = load_aliases(COUNTRY_ALIASES_PATH)
+        self.countryResolver = FuzzyIndex(zip(self.countryData.names, self.countryData.codes), aliases)
+
+        self.session = GameSession(self.countryData, self.distanceTable)
+
+    def load_pack(self, path):
+        """
+        Nạp một DatasetPack: chỉ đọc manifest, các shard dữ liệu / tên được đọc khi lần đầu cần tới.
+        Không dựng bảng khoảng cách (N x N không khả thi với hàng chục nghìn mục), phản hồi được tính trực tiếp.
+        """
+        from dataset_pack import DatasetPack, PackNameIndex
+        pack = DatasetPack(path)
+        self.countryData = pack
+        self.distanceTable = None
+        self.countryNameIndex = PackNameIndex(pack)
+        self.countryResolver = self.countryNameIndex # Tên khớp chính xác cũng được tra qua đây
+        self.session = GameSession(pack)
+        set_svg_resolver(pack.svg_path)
+
+    def open_history(self):
+        """Mở lịch sử chơi; lỗi (file hỏng, thư mục chỉ đọc) chỉ làm mất tính năng thống kê"""
+        from history import HISTORY_PATH, HistoryError, PlayHistory # Import muộn: sqlite3 không nằm trên đường khởi động
+        path = HISTORY_PATH if self.packPath is None else os.path.join(self.packPath, os.path.basename(HISTORY_PATH))
+        try:
+            self.history = PlayHistory(path)
+        except HistoryError as e:
+            print(f"Play history disabled: {e}")
+
+    def destroy(self):
+        if self.lagProbe is not None:
+            self.lagProbe.stop()
+        self.prefetchExecutor.shutdown(wait=False, cancel_futures=True)
+        if self.history is not None:
+            self.history.close() # Ghi nốt các ván còn trong hàng đợi
+            self.history = None
+        super().destroy()
 
     def clear_screen(self):
-        for screen in [self.startScreen, self.gameScreen, self.endScreen, self.howToPlayScreen]:
-            if screen is not None:
-                screen.destroy()
-                screen = None
+        """Ẩn màn hình hiện tại; các màn hình chỉ được tạo một lần và giữ lại để dùng tiếp"""
+        if self.currentScreen is not None:
+            self.currentScreen.pack_forget()
+            self.currentScreen = None
+
+    def show_screen(self, screen):
+        self.clear_screen()
+        screen.pack(expand=True, fill="both")
+        self.currentScreen = screen
 
     def show_toast(self, message):
         if self.toastLabel:
@@ -97,9 +243,12 @@ class GameApp(ctk.CTk):
 
     # Show screen methods
     def show_start_screen(self):
-        self.clear_screen()
+        if self.startScreen is None:
+            self.build_start_screen()
+        self.show_screen(self.startScreen)
+
+    def build_start_screen(self):
         self.startScreen = ctk.CTkFrame(self, fg_color=BACKGROUND_COLOR)
-        self.startScreen.pack(expand=True, fill="both")
 
         # Title
         title_label = ctk.CTkLabel(
@@ -162,14 +311,22 @@ class GameApp(ctk.CTk):
         exit_button.place(relx=0.5, rely=0.65, anchor="center")
 
     def show_game_screen(self):
+        self.ensure_assets_loaded()
         self.clear_screen()
         self.setup_new_game()
-        self.create_game_widget()
+        if self.gameScreen is None:
+            self.create_game_widget()
+        else:
+            self.reset_game_widget()
+        self.show_screen(self.gameScreen)
 
     def show_how_to_play_screen(self):
-        self.clear_screen()
+        if self.howToPlayScreen is None:
+            self.build_how_to_play_screen()
+        self.show_screen(self.howToPlayScreen)
+
+    def build_how_to_play_screen(self):
         self.howToPlayScreen = ctk.CTkFrame(self, fg_color=BACKGROUND_COLOR)
-        self.howToPlayScreen.pack(expand=True, fill="both")
 
         # Create scrollable frame for content
         scrollable = ctk.CTkScrollableFrame(
@@ -371,78 +528,101 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
         back_button.pack(pady=30)
 
     def show_end_screen(self, win):
-        self.clear_screen()
-        self.endScreen = ctk.CTkFrame(self, fg_color=BACKGROUND_COLOR)
-        self.endScreen.pack(expand=True, fill="both")
+        if self.endScreen is None:
+            self.build_end_screen()
+        self.update_end_screen(win)
+        self.show_screen(self.endScreen)
 
+    def update_end_screen(self, win):
+        """Chỉ cập nhật phần thay đổi theo ván: tiêu đề, kết quả, ảnh và thông tin nước bí mật"""
         if win:
             # Win screen
-            title_label = ctk.CTkLabel(
-                self.endScreen,
-                text="🎉 Congratulations! 🎉",
-                font=("Arial", 28, "bold"),
-                text_color="#4ade80"
-            )
-            title_label.pack(pady=10)
-
-            result_label = ctk.CTkLabel(
-                self.endScreen,
-                text=f"You guessed it in {len(self.guessedCountries)} tries!",
-                font=("Arial", 18),
-                text_color=TEXT_COLOR
-            )
-            result_label.pack(pady=5)
+            self.endTitleLabel.configure(text="🎉 Congratulations! 🎉", text_color="#4ade80")
+            self.endResultLabel.configure(text=f"You guessed it in {len(self.session.guesses)} tries!")
         else:
             # Lose screen
-            title_label = ctk.CTkLabel(
-                self.endScreen,
-                text="😢 Game Over 😢",
-                font=("Arial", 28, "bold"),
-                text_color=COLOR_ERROR
-            )
-            title_label.pack(pady=10)
-
-            result_label = ctk.CTkLabel(
-                self.endScreen,
-                text="Better luck next time!",
-                font=("Arial", 18),
-                text_color=TEXT_COLOR
-            )
-            result_label.pack(pady=5)
+            self.endTitleLabel.configure(text="😢 Game Over 😢", text_color=COLOR_ERROR)
+            self.endResultLabel.configure(text="Better luck next time!")
 
         # Display the secret country image (smaller size)
-        # Resize image to 300x300 for end screen with white background
-        svg_path = f"{COUNTRY_IMAGE_PATH}{self.secretCountry}.svg"
-        png_data = cairosvg.svg2png(url=svg_path, output_width=300, output_height=300, background_color='white')
-        pil_image = Image.open(io.BytesIO(png_data))
-        smaller_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(300, 300))
-        
-        svg_label = ctk.CTkLabel(self.endScreen, image=smaller_image, text="")
-        svg_label.pack(pady=10)
+        # Resize image to 300x300 for end screen (resample từ ảnh 400x400 đã có, không render lại SVG)
+        if self.showingPreview: # Ảnh đầy đủ chưa xong: thu nhỏ ảnh tạm, store_prefetched_image sẽ thay sau
+            previewImage = self.secretCountryImage.cget("light_image")
+            endImage = ctk.CTkImage(light_image=previewImage, dark_image=previewImage, size=(END_IMAGE_SIZE, END_IMAGE_SIZE))
+        else:
+            endImage = self.get_country_image(self.secretCountry, END_IMAGE_SIZE)
+        self.endImageLabel.configure(image=endImage)
+
+        self.endAnswerLabel.configure(text=f"The answer was: {self.secretCountryData['Country Name']}")
+
+        info_text = f"Population: {self.secretCountryData['Population']:,}  |  Area: {self.secretCountryData['Area']:,} km²  |  Coordinates: {self.secretCountryData['Latitude']:.2f}°, {self.secretCountryData['Longitude']:.2f}°"
+        self.endInfoLabel.configure(text=info_text)
+        self.endStatsLabel.configure(text=self.stats_text())
+
+    def stats_text(self):
+        """Số liệu tổng hợp cho màn hình kết thúc, đọc thẳng từ history.stats (không truy vấn đĩa)"""
+        if self.history is None:
+            return ""
+        stats = self.history.stats
+        lines = [f"Played {stats.games}  |  Win rate {stats.winRate:.0%}  |  Streak {stats.currentStreak} (best {stats.bestStreak})"]
+        if stats.histogram:
+            lines.append("Guesses to win:  " + "   ".join(f"{count}: {stats.histogram[count]}" for count in sorted(stats.histogram)))
+        games, wins, _, best = stats.country(self.secretCountry)
+        if games > 1:
+            lines.append(f"{self.secretCountryData['Country Name']}: won {wins} of {games}" + (f", best {best} guesses" if best else ""))
+        return "\n".join(lines)
+
+    def build_end_screen(self):
+        self.endScreen = ctk.CTkFrame(self, fg_color=BACKGROUND_COLOR)
+
+        self.endTitleLabel = ctk.CTkLabel(
+            self.endScreen,
+            text="",
+            font=("Arial", 28, "bold")
+        )
+        self.endTitleLabel.pack(pady=10)
+
+        self.endResultLabel = ctk.CTkLabel(
+            self.endScreen,
+            text="",
+            font=("Arial", 18),
+            text_color=TEXT_COLOR
+        )
+        self.endResultLabel.pack(pady=5)
+
+        self.endImageLabel = ctk.CTkLabel(self.endScreen, text="")
+        self.endImageLabel.pack(pady=10)
 
         # Display the answer
-        answer_label = ctk.CTkLabel(
+        self.endAnswerLabel = ctk.CTkLabel(
             self.endScreen,
-            text=f"The answer was: {self.secretCountryData['Country Name']}",
+            text="",
             font=("Arial", 22, "bold"),
             text_color="#60a5fa"
         )
-        answer_label.pack(pady=5)
+        self.endAnswerLabel.pack(pady=5)
 
         # Display additional country information
         info_frame = ctk.CTkFrame(self.endScreen, fg_color="#2b2b2b", corner_radius=10)
         info_frame.pack(pady=8, padx=20)
 
-        info_text = f"Population: {self.secretCountryData['Population']:,}  |  Area: {self.secretCountryData['Area']:,} km²  |  Coordinates: {self.secretCountryData['Latitude']:.2f}°, {self.secretCountryData['Longitude']:.2f}°"
-        
-        info_label = ctk.CTkLabel(
+        self.endInfoLabel = ctk.CTkLabel(
             info_frame,
-            text=info_text,
+            text="",
             font=("Arial", 14),
             text_color=TEXT_COLOR,
             justify="center"
         )
-        info_label.pack(padx=20, pady=10)
+        self.endInfoLabel.pack(padx=20, pady=10)
+
+        self.endStatsLabel = ctk.CTkLabel(
+            self.endScreen,
+            text="",
+            font=("Arial", 14),
+            text_color="#9ca3af",
+            justify="center"
+        )
+        self.endStatsLabel.pack(pady=5)
 
         # Buttons frame
         button_frame = ctk.CTkFrame(self.endScreen, fg_color="transparent")
@@ -478,25 +658,112 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
     def setup_new_game(self):
         """"Thiết lập trò chơi mới"""
         self.clear_screen()
-        self.secretCountry = random.choice(list(self.countryData.keys()))
-        print(f"Secret country selected: {self.countryData[self.secretCountry]['Country Name']}")
-        if (self.secretCountry in self.countryImages):
-            print("SVG image loaded for the secret country.")
+        if self.nextCountry is None:
+            self.prefetch_next_country()
+        if self.secretCountry is not None:
+            self.countryImages.unpin((self.secretCountry, GAME_IMAGE_SIZE))
+        self.secretCountry = self.nextCountry
+        self.countryImages.pin((self.secretCountry, GAME_IMAGE_SIZE)) # Ảnh đang hiển thị không được bị loại
+        self.session.start(self.secretCountry)
+        self.roundStartedAt = time.time()
+        self.roundStartClock = time.perf_counter()
+        self.secretCountryData = self.session.secretData
+        image = self.countryImages.get((self.secretCountry, GAME_IMAGE_SIZE))
+        if image is not None:
+            self.showingPreview = False
         else:
-            svg_path = f"{COUNTRY_IMAGE_PATH}{self.secretCountry}.svg"
-            png_data = cairosvg.svg2png(url=svg_path, output_width=400, output_height=400, background_color='white')
-            pil_image = Image.open(io.BytesIO(png_data))
-            self.countryImages[self.secretCountry] = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(400, 400))
-        self.secretCountryData = self.countryData[self.secretCountry]
-        self.secretCountryImage = self.countryImages[self.secretCountry]
-
-        self.guessedCountries = []
+            # Worker chưa xong: không chờ, hiển thị ảnh tạm rồi thay khi render xong (poll_prefetch)
+            image = self.get_preview_image(self.secretCountry, GAME_IMAGE_SIZE)
+        self.secretCountryImage = image
+
         self.selectedIndex = -1
         self.curSuggestions = []
 
+        # Render sẵn ván sau trong lúc người chơi đang đoán ván này
+        self.prefetch_next_country()
+
+    def prefetch_next_country(self):
+        """Chọn trước nước bí mật của ván sau và render ảnh 400x400 trên worker thread"""
+        self.nextCountry = self.session.pick_secret()
+        if (self.nextCountry, GAME_IMAGE_SIZE) in self.countryImages:
+            self.countryImages.pin((self.nextCountry, GAME_IMAGE_SIZE))
+            return
+        if has_country_svg(self.nextCountry): # Mục không có ảnh: setup_new_game dùng ô màu, không có gì để render
+            self.request_full_image(self.nextCountry)
+
+    def request_full_image(self, countryCode):
+        """Đưa việc render ảnh GAME_IMAGE_SIZE của một nước cho worker (bỏ qua nếu đang render)"""
+        if countryCode in self.renderFutures:
+            return
+        future = self.prefetchExecutor.submit(load_country_image_with_preview, countryCode, GAME_IMAGE_SIZE)
+        self.renderFutures[countryCode] = future
+        self.after(PREFETCH_POLL_MS, self.poll_prefetch, countryCode, future)
+
+    def poll_prefetch(self, countryCode, future):
+        """Nhận kết quả prefetch trên Tk main thread (Tk không thread-safe)"""
+        if self.renderFutures.get(countryCode) is not future:
+            return # Kết quả đã được lấy hoặc đã bị thay thế
+        if not future.done():
+            self.after(PREFETCH_POLL_MS, self.poll_prefetch, countryCode, future)
+            return
+        self.store_prefetched_image(countryCode, future)
+
+    def store_prefetched_image(self, countryCode, future):
+        """Bọc ảnh PIL từ worker thành CTkImage, đưa vào countryImages và thay ảnh tạm nếu đang hiển thị"""
+        del self.renderFutures[countryCode]
+        try:
+            pil_image = future.result()
+        except Exception as e:
+            # Ảnh tạm (nếu có) được giữ nguyên; get_country_image sẽ thử render lại khi cần
+            print(f"Prefetch failed for {countryCode}: {e}")
+            return
+        key = (countryCode, GAME_IMAGE_SIZE)
+        self.countryImages[key] = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(GAME_IMAGE_SIZE, GAME_IMAGE_SIZE))
+        if countryCode in (self.nextCountry, self.secretCountry):
+            self.countryImages.pin(key) # Giữ lại tới khi ván sau dùng tới
+        if countryCode == self.secretCountry and self.showingPreview:
+            self.showingPreview = False
+            self.secretCountryImage = self.countryImages[key]
+            if self.countryImageLabel is not None:
+                self.countryImageLabel.configure(image=self.secretCountryImage)
+            if self.endScreen is not None and self.currentScreen is self.endScreen:
+                self.endImageLabel.configure(image=self.get_country_image(countryCode, END_IMAGE_SIZE))
+
+    def get_preview_image(self, countryCode, size):
+        """
+        Ảnh tạm (không bao giờ render SVG) cho nước chưa có ảnh đầy đủ trong bộ nhớ,
+        đồng thời bảo đảm worker đang render ảnh đầy đủ để thay vào sau.
+        """
+        pil_image, complete = preview_image(countryCode, size)
+        self.showingPreview = not complete
+        if self.showingPreview:
+            self.request_full_image(countryCode)
+        image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(size, size))
+        if complete:
+            self.countryImages[(countryCode, size)] = image
+        return image
+
+    def get_country_image(self, countryCode, size):
+        """
+        Lấy CTkImage của một nước ở kích thước size.
+        Bản nhỏ hơn được resample từ ảnh GAME_IMAGE_SIZE đang có trong bộ nhớ nên không tốn công render SVG.
+        """
+        image = self.countryImages.get((countryCode, size))
+        if image is not None:
+            return image
+
+        baseImage = self.countryImages.get((countryCode, GAME_IMAGE_SIZE)) if size < GAME_IMAGE_SIZE else None
+        if baseImage is not None:
+            # Gọi qua module để --trace (instrument_module thay render.derive_image) đo được cả lần resample này
+            pil_image = render.derive_image(baseImage.cget("light_image"), size)
+        else:
+            pil_image = load_country_image(countryCode, size)
+        image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(size, size))
+        self.countryImages[(countryCode, size)] = image
+        return image
+
     def create_game_widget(self):
         self.gameScreen = ctk.CTkFrame(self, fg_color=BACKGROUND_COLOR)
-        self.gameScreen.pack(expand=True, fill="both")
 
         # entry frame
         entryFrame = ctk.CTkFrame(
@@ -544,7 +811,7 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
             font=FONT_SMALL,
             width=100,
             height=40,
-            command=lambda: self.show_end_screen(win=False),
+            command=self.give_up,
             fg_color=COLOR_ERROR,
             hover_color="#cc3333",
             corner_radius=6
@@ -556,8 +823,8 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
         self.entry.bind('<Up>', lambda event: self.navigateUp())
         
         # SVG image của nước bí mật
-        svg_label = ctk.CTkLabel(self.gameScreen, image=self.secretCountryImage, text="")
-        svg_label.pack(pady=20)
+        self.countryImageLabel = ctk.CTkLabel(self.gameScreen, image=self.secretCountryImage, text="")
+        self.countryImageLabel.pack(pady=20)
 
         # Frame cha để giới hạn chiều rộng
         scrollableFrame = ctk.CTkFrame(self.gameScreen, fg_color="transparent", width=800, height=400)
@@ -567,6 +834,9 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
         # List box các nước đã đoán        
         self.listBoxGuessed = ctk.CTkScrollableFrame(scrollableFrame, label_text="Countries Guessed")
         self.listBoxGuessed.pack(fill="both", expand=True)
+        self.emptyGuessLabel = ctk.CTkLabel(self.listBoxGuessed, text="No countries guessed yet...", text_color="gray")
+        self.guessRows = []
+        self.guessRowPool = []
         self.updateGuessList()
         
         # Text box gợi ý các nước
@@ -586,108 +856,187 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
         self.textBoxFrame.lift()  
         self.textBoxFrame.place_forget()  # Ẩn đi ban đầu
         self.curSuggestions = []
+        self.suggestionLines = []
+        self.suggestionsVisible = False
 
         self.textBoxSuggestions.bind('<Button-1>', self.on_select)
 
+    def reset_game_widget(self):
+        """Đưa màn hình chơi đã có về trạng thái ván mới thay vì tạo lại toàn bộ widget"""
+        self.countryImageLabel.configure(image=self.secretCountryImage)
+        self.entry.delete(0, 'end')
+        self.cancel_suggestion_update()
+        self.hide_suggestions()
+        self.curSuggestions = []
+        self.updateGuessList()
+
+    def give_up(self):
+        self.session.give_up()
+        self.record_round()
+        self.show_end_screen(win=False)
+
+    def record_round(self):
+        """Đưa ván vừa kết thúc vào lịch sử; chỉ cập nhật số liệu trong bộ nhớ, việc ghi đĩa ở writer thread"""
+        if self.history is not None:
+            from history import round_from_session
+            duration = time.perf_counter() - self.roundStartClock
+            self.history.record(round_from_session(self.session, self.roundStartedAt, duration))
+
     def updateGuessList(self):
-        for widget in self.listBoxGuessed.winfo_children():
-            widget.destroy()
-        
-        if (not self.guessedCountries):
-            label = ctk.CTkLabel(self.listBoxGuessed, text="No countries guessed yet...", text_color="gray")
-            label.pack(pady=5)
+        """
+        Đồng bộ danh sách hiển thị với self.session.guesses.
+        Chỉ thêm hàng cho các lượt đoán mới (lên đầu danh sách) nên chi phí không tăng theo số lượt đã đoán.
+        """
+        if len(self.guessRows) > len(self.session.guesses):
+            self.resetGuessList() # Ván mới
+
+        if not self.session.guesses:
+            self.emptyGuessLabel.pack(pady=5)
+            return
+        self.emptyGuessLabel.pack_forget()
+
+        for countryCode in self.session.guesses[len(self.guessRows):]:
+            self.addGuessRow(countryCode)
+
+    def resetGuessList(self):
+        """Ẩn mọi hàng và trả về pool để dùng lại ở ván sau"""
+        for row in self.guessRows:
+            row[0].pack_forget()
+            if len(self.guessRowPool) < GUESS_ROW_POOL_SIZE:
+                self.guessRowPool.append(row)
+            else:
+                row[0].destroy()
+        self.guessRows = []
+
+    def createGuessRow(self):
+        """Tạo một hàng (frame, nhãn tên nước, nhãn khoảng cách, nhãn mũi tên) chưa được pack"""
+        guessFrame = ctk.CTkFrame(
+            self.listBoxGuessed,
+            fg_color="#70e7fb",
+            corner_radius=8,
+            height=45
+        )
+
+        # Cấu hình grid để expand
+        guessFrame.columnconfigure(0, weight=3)  # Column 0 (tên nước) chiếm nhiều nhất
+        guessFrame.columnconfigure(1, weight=1)  # Column 1 (khoảng cách)
+        guessFrame.columnconfigure(2, weight=0)  # Column 2 (mũi tên) - width cố định
+        guessFrame.rowconfigure(0, weight=1)
+
+        # Label tên nước với cờ
+        countryLabel = ctk.CTkLabel(
+            guessFrame, 
+            text="",
+            font=("Arial", 14),
+            text_color="#2b2b2b",
+            anchor="w"
+        )
+        countryLabel.grid(row=0, column=0, padx=15, pady=8, sticky="w")
+
+        # Label khoảng cách
+        distanceLabel = ctk.CTkLabel(
+            guessFrame, 
+            text="",
+            font=("Arial", 14),
+            text_color="#2b2b2b",
+            anchor="center"
+        )
+        distanceLabel.grid(row=0, column=1, padx=10, pady=8, sticky="e")
+
+        # Label mũi tên với background xanh dương
+        arrowFrame = ctk.CTkFrame(
+            guessFrame,
+            fg_color="#5c9fd6",
+            corner_radius=6,
+            width=40,
+            height=35
+        )
+        arrowFrame.grid(row=0, column=2, padx=8, pady=5, sticky="e")
+        arrowFrame.grid_propagate(False)
+
+        arrowLabel = ctk.CTkLabel(
+            arrowFrame,
+            text="",
+            font=("Arial", 20, "bold"),
+            text_color="white"
+        )
+        arrowLabel.place(relx=0.5, rely=0.5, anchor="center")
+
+        return (guessFrame, countryLabel, distanceLabel, arrowLabel)
+
+    def addGuessRow(self, countryCode):
+        """Điền thông tin một lượt đoán vào hàng lấy từ pool (hoặc hàng mới) rồi đặt lên đầu danh sách"""
+        distance, arrow = self.session.feedback(countryCode)
+
+        row = self.guessRowPool.pop() if self.guessRowPool else self.createGuessRow()
+        guessFrame, countryLabel, distanceLabel, arrowLabel = row
+        countryLabel.configure(text=f"{self.countryData[countryCode]['Country Name']}")
+        distanceLabel.configure(text=f"~ {distance}km")
+        arrowLabel.configure(text=arrow)
+
+        if self.guessRows:
+            guessFrame.pack(fill="x", padx=10, pady=3, before=self.guessRows[-1][0])
         else:
-            for countryCode in reversed(self.guessedCountries):
-                countryName = self.countryData[countryCode]["Country Name"]
-                guessFrame = ctk.CTkFrame(
-                    self.listBoxGuessed,
-                    fg_color="#70e7fb",
-                    corner_radius=8,
-                    height=45
-                )
-                guessFrame.pack(fill="x", padx=10, pady=3)
-
-                # Cấu hình grid để expand
-                guessFrame.columnconfigure(0, weight=3)  # Column 0 (tên nước) chiếm nhiều nhất
-                guessFrame.columnconfigure(1, weight=1)  # Column 1 (khoảng cách)
-                guessFrame.columnconfigure(2, weight=0)  # Column 2 (mũi tên) - width cố định
-                guessFrame.rowconfigure(0, weight=1)
-
-                # Label tên nước với cờ
-                countryLabel = ctk.CTkLabel(
-                    guessFrame, 
-                    text=f"{countryName}",
-                    font=("Arial", 14),
-                    text_color="#2b2b2b",
-                    anchor="w"
-                )
-                countryLabel.grid(row=0, column=0, padx=15, pady=8, sticky="w")
-
-                distance, arrow = get_distance_and_arrow(self.countryData[countryCode], self.secretCountryData)
-
-                # Label khoảng cách
-                distanceLabel = ctk.CTkLabel(
-                    guessFrame, 
-                    text=f"~ {distance}km",
-                    font=("Arial", 14),
-                    text_color="#2b2b2b",
-                    anchor="center"
-                )
-                distanceLabel.grid(row=0, column=1, padx=10, pady=8, sticky="e")
-
-                # Label mũi tên với background xanh dương
-                arrowFrame = ctk.CTkFrame(
-                    guessFrame,
-                    fg_color="#5c9fd6",
-                    corner_radius=6,
-                    width=40,
-                    height=35
-                )
-                arrowFrame.grid(row=0, column=2, padx=8, pady=5, sticky="e")
-                arrowFrame.grid_propagate(False)
-
-                arrowLabel = ctk.CTkLabel(
-                    arrowFrame,
-                    text=arrow,
-                    font=("Arial", 20, "bold"),
-                    text_color="white"
-                )
-                arrowLabel.place(relx=0.5, rely=0.5, anchor="center")
+            guessFrame.pack(fill="x", padx=10, pady=3)
+        self.guessRows.append(row)
 
     def on_key_release(self, event):
-        """Xử lý khi người dùng nhập từ"""
+        """Xử lý khi người dùng nhập từ: gộp các phím gõ liên tiếp, chỉ cập nhật gợi ý khi ngừng gõ"""
         if (event and event.keysym in ['Up', 'Down']):
             return
-        prefix = self.entry.get().strip().lower()
-        
-        # Xóa danh sách gợi ý cũ
-        self.textBoxSuggestions.configure(state="normal")
-        self.textBoxSuggestions.delete("1.0", "end")
-        
-        if prefix:
-            # Tìm các từ có prefix khớp
-            suggestions = []
-            for countryCode, data in self.countryData.items():
-                countryName = data["Country Name"]
-                if countryName.lower().startswith(prefix):
-                    suggestions.append(countryName)
-            
-            # Hiển thị gợi ý trong textbox
-            if suggestions:
-                self.curSuggestions = suggestions
-                for suggestion in suggestions:
-                    self.textBoxSuggestions.insert("end", suggestion + "\n")
-                self.textBoxFrame.place(relx=0.5, rely=0.095, anchor="n", x=-110)
-                self.textBoxFrame.lift()
-            else:
-                self.curSuggestions = []
-                self.textBoxSuggestions.insert("end", "No suggestions found.")
-                self.textBoxFrame.place(relx=0.5, rely=0.095, anchor="n", x=-110)
-                self.textBoxFrame.lift()
+        self.cancel_suggestion_update()
+        self.suggestionJob = self.after(SUGGESTION_DEBOUNCE_MS, self.update_suggestions)
+
+    def cancel_suggestion_update(self):
+        if self.suggestionJob is not None:
+            self.after_cancel(self.suggestionJob)
+            self.suggestionJob = None
+
+    def update_suggestions(self):
+        """Tính lại gợi ý cho nội dung entry và chỉ sửa những dòng thay đổi trong textbox"""
+        self.suggestionJob = None
+        prefix = normalize_name(self.entry.get())
+        if not prefix:
+            self.hide_suggestions()
+            return
+
+        # Tìm các từ có prefix khớp (bisect trên chỉ mục đã sắp xếp)
+        suggestions = self.countryNameIndex.search(prefix, SUGGESTION_LIMIT)
+        lines = suggestions if suggestions else ["No suggestions found."]
+
+        if lines != self.suggestionLines:
+            # Giữ highlight trên cùng một nước nếu nó vẫn còn trong danh sách mới
+            selected = None
+            if 0 <= self.selectedIndex < len(self.curSuggestions):
+                selected = self.curSuggestions[self.selectedIndex]
+            self.selectedIndex = suggestions.index(selected) if selected in suggestions else -1
+
+            self.textBoxSuggestions.configure(state="normal")
+            from difflib import SequenceMatcher # Import muộn, chỉ cần khi danh sách gợi ý đổi
+            opcodes = SequenceMatcher(None, self.suggestionLines, lines, autojunk=False).get_opcodes()
+            for tag, i1, i2, j1, j2 in reversed(opcodes): # Sửa từ dưới lên để chỉ số dòng phía trên không đổi
+                if tag == "equal":
+                    continue
+                if i2 > i1:
+                    self.textBoxSuggestions.delete(f"{i1 + 1}.0", f"{i2 + 1}.0")
+                if j2 > j1:
+                    self.textBoxSuggestions.insert(f"{i1 + 1}.0", "".join(line + "\n" for line in lines[j1:j2]))
+            self.textBoxSuggestions.configure(state="disabled")
+            self.suggestionLines = lines
+            self.curSuggestions = suggestions
+            self.highlight_selection()
         else:
-            self.textBoxFrame.place_forget() 
-        
-        self.textBoxSuggestions.configure(state="disabled")
+            self.curSuggestions = suggestions
+
+        if not self.suggestionsVisible:
+            self.textBoxFrame.place(relx=0.5, rely=0.095, anchor="n", x=-110)
+            self.textBoxFrame.lift()
+            self.suggestionsVisible = True
+
+    def hide_suggestions(self):
+        if self.suggestionsVisible:
+            self.textBoxFrame.place_forget()
+            self.suggestionsVisible = False
 
     def highlight_selection(self):
         """Highlight dòng được chọn"""
@@ -754,22 +1103,32 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
 
     def pressEnter(self): # Press Enter
         """Xử lý khi nhấn nút Enter"""
-        print(self.entry.get())
-        if (self.entry.get().strip().lower() in self.countryNametoCode):
-            countryCode = self.countryNametoCode[self.entry.get().strip().lower()]
-            
-            if countryCode not in self.guessedCountries: # Nếu chưa đoán nước này
-                self.guessedCountries.append(countryCode)
-                self.updateGuessList()
-            else:
+        if self.currentScreen is not self.gameScreen:
+            return # <Return> được bind ở cửa sổ chính, bỏ qua khi không ở màn hình chơi
+        countryCode = self.countryNametoCode.get(self.entry.get().strip().lower())
+        if countryCode is None:
+            # Không khớp chính xác: thử sửa lỗi gõ / tên khác
+            countryCode, matches = self.countryResolver.resolve(self.entry.get())
+            if countryCode is None and matches:
+                names = " or ".join(name for _, name, _ in matches)
+                self.trigger_error_toast(f"Did you mean {names}?")
+                return
+
+        if countryCode is not None:
+            result = self.session.submit(countryCode)
+            if result.status == GUESS_DUPLICATE: # Đã đoán nước này
                 self.trigger_error_toast("You already guessed this country!")
+            else:
+                self.updateGuessList()
 
             self.entry.delete(0, 'end')
-            self.textBoxFrame.place_forget()
+            self.cancel_suggestion_update()
+            self.hide_suggestions()
             self.selectedIndex = -1
             self.curSuggestions = []
 
-            if (countryCode == self.secretCountry):
+            if (result.status == GUESS_CORRECT):
+                self.record_round()
                 self.show_end_screen(win=True)
                 return
         
@@ -778,7 +1137,40 @@ If the distance gets smaller, you're getting closer to the correct answer!""",
 
 
 if __name__ == "__main__":
-    app = GameApp()
+    parser = argparse.ArgumentParser(description="Worldle clone")
+    parser.add_argument("--startup-profile", action="store_true", help="print wall time per startup phase")
+    parser.add_argument("--trace", metavar="PATH", help="record handler timings and event-loop lag to a Chrome trace JSON file")
+    parser.add_argument("--pack", metavar="DIR", help="play a dataset pack (see dataset_pack.py) instead of the country list")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP game server instead of the desktop app")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve")
+    parser.add_argument("--port", type=int, default=8080, help="port for --serve")
+    args = parser.parse_args()
+
+    if args.serve:
+        from server import run_server
+        run_server(args.host, args.port)
+        raise SystemExit
+
+    profiler = None
+    if args.startup_profile:
+        profiler = StartupProfiler(STARTUP_TIME)
+        profiler.mark("imports")
+
+    tracer = None
+    if args.trace:
+        from tracing import Tracer
+        tracer = Tracer()
+
+    app = GameApp(startupProfiler=profiler, tracer=tracer, packPath=args.pack)
     app.mainloop()
 
+    if tracer is not None:
+        tracer.save(args.trace)
+        print(f"Trace written to {args.trace}")
+        for name, count, totalMs, longestMs in tracer.summary():
+            print(f"  {name:<36} {count:6d} calls {totalMs:10.1f} ms total {longestMs:8.1f} ms max")
+        lag = app.lagProbe.percentiles()
+        if lag:
+            print(f"  event loop lag: p50 {lag['p50']:.1f} ms, p95 {lag['p95']:.1f} ms, max {lag['max']:.1f} ms")
+
     
\ No newline at end of file
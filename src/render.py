@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+
+from asset_bundle import get_asset_bundle, svg_entry
+
+# cairosvg (kéo theo cairocffi, cssselect2, tinycss2...) và PIL chỉ được import khi thực sự render,
+# để việc import module này không làm chậm lúc khởi động game.
+
+COUNTRY_IMAGE_PATH = "./src/assets/countries/"
+SIMPLIFIED_IMAGE_PATH = "./src/assets/countries_simplified/" # Output của simplify_svg.py
+RASTER_CACHE_PATH = "./src/assets/.raster_cache/"
+
+BASE_IMAGE_SIZE = 400 # Kích thước render gốc, các kích thước nhỏ hơn được resample từ đây
+PREVIEW_IMAGE_SIZE = 64 # Ảnh thu nhỏ hiển thị tạm trong lúc ảnh đầy đủ đang render
+PLACEHOLDER_COLOR = "#e5e7eb" # Khi chưa có cả ảnh thu nhỏ trong cache
+SVG_DPI = 96 # Giống mặc định của cairosvg.svg2png
+# FORMAT_ARGB32 của cairo là số 32 bit theo byte order của máy, alpha đã nhân sẵn vào màu
+# (PIL không có raw mode bỏ nhân alpha cho thứ tự ARGB; ảnh game có nền đặc nên không ảnh hưởng)
+CAIRO_RAW_MODE = "BGRa" if sys.byteorder == "little" else "ARGB"
+
+_svgHashes = {} # (svg_path, (mtime_ns, size, sha1))
+_svgResolver = None # Hàm (mã -> đường dẫn SVG) của gói dữ liệu đang chơi, None khi chơi bộ quốc gia mặc định
+
+def set_svg_resolver(resolver):
+    """Lấy SVG theo resolver (ví dụ DatasetPack.svg_path) thay vì COUNTRY_IMAGE_PATH và bundle quốc gia"""
+    global _svgResolver
+    _svgResolver = resolver
+
+def _country_bundle():
+    """Bundle quốc gia, trừ khi đang chơi một gói dữ liệu khác (mã của gói có thể trùng mã nước)"""
+    return get_asset_bundle() if _svgResolver is None else None
+
+def country_svg_path(countryCode):
+    """Ưu tiên SVG đã được đơn giản hóa nếu có, nếu không dùng SVG gốc"""
+    if _svgResolver is not None:
+        return _svgResolver(countryCode)
+    simplified_path = f"{SIMPLIFIED_IMAGE_PATH}{countryCode}.svg"
+    if os.path.exists(simplified_path):
+        return simplified_path
+    return f"{COUNTRY_IMAGE_PATH}{countryCode}.svg"
+
+def has_country_svg(countryCode):
+    """Mục có SVG để render không (False với gói dữ liệu không kèm ảnh)"""
+    return country_svg_path(countryCode) is not None
+
+def render_svg(svg_path, size, background_color="white", svg_data=None):
+    """
+    Raster hóa một file SVG (hoặc nội dung svg_data nếu có) thành ảnh PIL kích thước size x size.
+    Vẽ thẳng vào ImageSurface của cairo rồi đọc buffer điểm ảnh của nó, không qua PNG:
+    chỉ còn một lượt đổi thứ tự kênh BGRA (premultiplied) của cairo sang RGBA của PIL.
+    """
+    from cairosvg.parser import Tree
+    from cairosvg.surface import PNGSurface
+    from PIL import Image
+    tree = Tree(bytestring=bytes(svg_data)) if svg_data is not None else Tree(url=svg_path)
+    surface = PNGSurface(tree, None, SVG_DPI, output_width=size, output_height=size, background_color=background_color)
+    cairoSurface = surface.cairo
+    cairoSurface.flush()
+    pil_image = Image.frombuffer(
+        "RGBA", (cairoSurface.get_width(), cairoSurface.get_height()), cairoSurface.get_data(),
+        "raw", CAIRO_RAW_MODE, cairoSurface.get_stride(), 1
+    )
+    cairoSurface.finish()
+    return pil_image
+
+def render_country_image(countryCode, size, background_color="white"):
+    """
+    Raster hóa SVG của một quốc gia thành ảnh PIL kích thước size x size.
+    Không đụng tới Tk nên có thể gọi từ worker thread.
+    """
+    bundle = _country_bundle()
+    svg_data = bundle.svg(countryCode) if bundle is not None else None
+    if svg_data is not None:
+        return render_svg(None, size, background_color, svg_data)
+    return render_svg(country_svg_path(countryCode), size, background_color)
+
+def svg_content_hash(svg_path):
+    """SHA-1 nội dung file SVG, chỉ đọc lại file khi mtime/kích thước thay đổi"""
+    stat = os.stat(svg_path)
+    cached = _svgHashes.get(svg_path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    with open(svg_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    _svgHashes[svg_path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+def country_svg_digest(countryCode):
+    """Khóa nội dung SVG của một nước: crc trong chỉ mục bundle nếu có, nếu không thì SHA-1 file"""
+    bundle = _country_bundle()
+    if bundle is not None and svg_entry(countryCode) in bundle:
+        return bundle.digest(svg_entry(countryCode))
+    return svg_content_hash(country_svg_path(countryCode))[:16]
+
+def raster_cache_path(countryCode, size, background_color="white"):
+    """Đường dẫn file PNG trong cache, khóa theo hash SVG + kích thước + màu nền"""
+    digest = country_svg_digest(countryCode)
+    background = str(background_color).lstrip("#").lower()
+    return f"{RASTER_CACHE_PATH}{countryCode}-{digest[:16]}-{size}-{background}.png"
+
+def derive_image(base_image, size):
+    """Tạo bản nhỏ hơn từ ảnh gốc bằng resample, không cần parse lại SVG"""
+    from PIL import Image
+    return base_image.resize((size, size), Image.LANCZOS)
+
+def _read_cached_image(cache_path):
+    from PIL import Image
+    try:
+        pil_image = Image.open(cache_path)
+        pil_image.load()
+        return pil_image
+    except (OSError, ValueError):
+        return None # Chưa có trong cache hoặc file hỏng
+
+def _write_cached_image(cache_path, pil_image):
+    try:
+        os.makedirs(RASTER_CACHE_PATH, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        pil_image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, cache_path) # Ghi nguyên tử, không để lại file dở dang
+    except OSError as e:
+        print(f"Could not write raster cache {cache_path}: {e}")
+
+def load_cached_image(countryCode, size, background_color="white"):
+    """Ảnh đã có sẵn trong bundle hoặc cache trên đĩa, None nếu phải render (hàm này không bao giờ render SVG)"""
+    bundle = _country_bundle()
+    packed = bundle.raster(countryCode, size, background_color) if bundle is not None else None
+    if packed is not None:
+        from PIL import Image
+        pil_image = Image.open(io.BytesIO(packed))
+        pil_image.load()
+        return pil_image
+    return _read_cached_image(raster_cache_path(countryCode, size, background_color))
+
+def load_country_image(countryCode, size, background_color="white"):
+    """
+    Lấy ảnh quốc gia từ bundle (nếu có ảnh đóng gói sẵn) hoặc cache trên đĩa, nếu chưa có thì tạo rồi ghi vào cache.
+    Mỗi nước chỉ render SVG một lần ở BASE_IMAGE_SIZE, kích thước nhỏ hơn được resample từ ảnh gốc.
+    Asset SVG đổi nội dung thì khóa đổi theo nên không cần xóa cache thủ công.
+    """
+    pil_image = load_cached_image(countryCode, size, background_color)
+    if pil_image is not None:
+        return pil_image
+
+    cache_path = raster_cache_path(countryCode, size, background_color)
+    if size < BASE_IMAGE_SIZE:
+        pil_image = derive_image(load_country_image(countryCode, BASE_IMAGE_SIZE, background_color), size)
+    else:
+        pil_image = render_country_image(countryCode, size, background_color)
+    _write_cached_image(cache_path, pil_image)
+    return pil_image
+
+def load_country_image_with_preview(countryCode, size, background_color="white"):
+    """
+    Như load_country_image, đồng thời ghi thêm ảnh thu nhỏ PREVIEW_IMAGE_SIZE vào cache (nếu chưa có)
+    từ chính ảnh vừa lấy được, để lần sau nước này được hiển thị tạm ngay mà không phải chờ render.
+    """
+    pil_image = load_country_image(countryCode, size, background_color)
+    bundle = _country_bundle()
+    if bundle is None or bundle.raster(countryCode, PREVIEW_IMAGE_SIZE, background_color) is None:
+        preview_path = raster_cache_path(countryCode, PREVIEW_IMAGE_SIZE, background_color)
+        if not os.path.exists(preview_path):
+            _write_cached_image(preview_path, derive_image(pil_image, PREVIEW_IMAGE_SIZE))
+    return pil_image
+
+def preview_image(countryCode, size, background_color="white"):
+    """
+    Ảnh tạm size x size cho một nước, luôn rẻ bất kể SVG phức tạp tới đâu:
+    ảnh đầy đủ hoặc ảnh thu nhỏ phóng to nếu đã có trong cache, nếu không thì một ô màu PLACEHOLDER_COLOR.
+    Trả về (ảnh PIL, True nếu không còn ảnh nào tốt hơn để chờ: ảnh đầy đủ, hoặc ô màu khi mục không có SVG).
+    """
+    from PIL import Image
+    if not has_country_svg(countryCode):
+        return Image.new("RGB", (size, size), PLACEHOLDER_COLOR), True
+    pil_image = load_cached_image(countryCode, size, background_color)
+    if pil_image is not None:
+        return pil_image, True
+    thumbnail = load_cached_image(countryCode, PREVIEW_IMAGE_SIZE, background_color)
+    if thumbnail is not None:
+        return thumbnail.resize((size, size), Image.BILINEAR), False
+    return Image.new("RGB", (size, size), PLACEHOLDER_COLOR), False
+
+def load_country_png(countryCode, size, background_color="white"):
+    """Nội dung PNG (bytes) của ảnh quốc gia, cho server gửi thẳng mà không encode lại"""
+    bundle = _country_bundle()
+    packed = bundle.raster(countryCode, size, background_color) if bundle is not None else None
+    if packed is not None:
+        return bytes(packed)
+    pil_image = load_country_image(countryCode, size, background_color)
+    try:
+        with open(raster_cache_path(countryCode, size, background_color), "rb") as f:
+            return f.read()
+    except OSError: # Không ghi được cache: mã hóa PNG từ ảnh trong bộ nhớ
+        buffer = io.BytesIO()
+        pil_image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+def _warm_one(countryCode, sizes, background_color):
+    for size in sorted(sizes, reverse=True): # Ảnh gốc trước, bản nhỏ resample từ nó
+        if not os.path.exists(raster_cache_path(countryCode, size, background_color)):
+            load_country_image(countryCode, size, background_color)
+    return countryCode
+
+def warm_cache(sizes=None, background_color="white", jobs=None):
+    """Render trước toàn bộ SVG trong COUNTRY_IMAGE_PATH vào cache trên đĩa (mặc định 400, 300 và ảnh thu nhỏ)"""
+    from concurrent.futures import ProcessPoolExecutor
+    sizes = sizes or (BASE_IMAGE_SIZE, 300, PREVIEW_IMAGE_SIZE)
+    countryCodes = sorted(
+        name[:-4] for name in os.listdir(COUNTRY_IMAGE_PATH) if name.endswith(".svg")
+    )
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_warm_one, code, sizes, background_color) for code in countryCodes]
+        for future in futures:
+            print(f"Cached {future.result()}")
+    return len(countryCodes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Country silhouette raster cache")
+    parser.add_argument("--warm", action="store_true", help="render every country SVG into the disk cache")
+    parser.add_argument("--size", type=int, action="append", help="output size to cache (default: 400, 300 and 64)")
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    if args.warm:
+        start = time.perf_counter()
+        count = warm_cache(sizes=tuple(args.size) if args.size else None, jobs=args.jobs)
+        print(f"Warmed {count} countries in {time.perf_counter() - start:.1f}s")
+    else:
+        parser.print_help()
@@ -0,0 +1,217 @@
+import bisect
+import unicodedata
+
+def normalize_name(name):
+    """Chuẩn hóa tên để so khớp: bỏ khoảng trắng hai đầu, chữ thường"""
+    return name.strip().lower()
+
+class PrefixIndex:
+    """
+    Chỉ mục tìm theo tiền tố trên mảng tên đã chuẩn hóa và sắp xếp.
+    Mỗi truy vấn là một lần bisect O(log N) rồi đọc tối đa limit kết quả liền kề,
+    nên thời gian phụ thuộc vào số kết quả chứ không phải kích thước danh mục.
+    Kết quả được xếp hạng theo thứ tự chữ cái của tên đã chuẩn hóa.
+    """
+
+    def __init__(self, entries):
+        """entries: iterable các cặp (tên hiển thị, giá trị), ví dụ (Country Name, countryCode)"""
+        rows = sorted((normalize_name(name), name, value) for name, value in entries)
+        self.keys = [row[0] for row in rows]
+        self.names = [row[1] for row in rows]
+        self.values = [row[2] for row in rows]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _range_start(self, prefix):
+        return bisect.bisect_left(self.keys, prefix)
+
+    def search(self, prefix, limit=None):
+        """Trả về tối đa limit tên hiển thị có tiền tố prefix (đã chuẩn hóa)"""
+        return [name for name, _ in self.search_values(prefix, limit)]
+
+    def search_values(self, prefix, limit=None):
+        """Giống search nhưng trả về các cặp (tên hiển thị, giá trị)"""
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        results = []
+        i = self._range_start(prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            results.append((self.names[i], self.values[i]))
+            if limit is not None and len(results) >= limit:
+                break
+            i += 1
+        return results
+
+def fold_name(name):
+    """
+    Chuẩn hóa mạnh hơn cho so khớp gần đúng: bỏ dấu, chữ thường,
+    bỏ dấu câu và khoảng trắng ("Viet Nam", "viet-nam" và "Việt Nam" đều thành "vietnam").
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    return "".join(ch for ch in decomposed if ch.isalnum())
+
+def _deletes(word, max_distance):
+    """Mọi chuỗi thu được khi xóa tối đa max_distance ký tự của word (kể cả chính nó)"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for w in frontier:
+            for i in range(len(w)):
+                next_frontier.add(w[:i] + w[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+def edit_distance(a, b, max_distance):
+    """
+    Khoảng cách Damerau-Levenshtein (optimal string alignment) giữa a và b.
+    Trả về max_distance + 1 ngay khi chắc chắn vượt ngưỡng.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        rowMin = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1) # Đảo hai ký tự liền kề
+            current[j] = value
+            rowMin = min(rowMin, value)
+        if rowMin > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def allowed_distance(query):
+    """Tên càng ngắn càng ít lỗi được chấp nhận để tránh khớp nhầm ("iran"/"iraq")"""
+    if len(query) < 3:
+        return 0
+    if len(query) <= 5:
+        return 1
+    return 2
+
+class FuzzyIndex:
+    """
+    Tra tên gần đúng kiểu SymSpell: lúc dựng chỉ mục, mỗi tên (đã fold, cắt còn prefix_length ký tự)
+    được sinh mọi biến thể xóa tối đa max_distance ký tự. Lúc tra, biến thể xóa của truy vấn
+    chỉ ra một nhóm nhỏ ứng viên, rồi mới tính khoảng cách thật trên nhóm đó,
+    nên không phải quét toàn bộ danh mục.
+    Nhiều giá trị có thể dùng chung một tên (hai thành phố "Springfield"): tra đúng tên đó trả về tất cả.
+    """
+
+    def __init__(self, entries, aliases=None, max_distance=2, prefix_length=7):
+        """
+        entries: iterable các cặp (tên hiển thị, giá trị).
+        aliases: dict (tên khác, giá trị), ví dụ {"USA": "us"}; tên hiển thị của alias là tên chính của giá trị.
+        """
+        self.maxDistance = max_distance
+        self.prefixLength = prefix_length
+        self.keys = [] # Tên đã fold
+        self.names = [] # Tên hiển thị
+        self.values = []
+        self.exact = {} # (tên đã fold, [id])
+        self.deletes = {} # (biến thể xóa của prefix, [id])
+
+        primaryNames = {}
+        for name, value in entries:
+            primaryNames.setdefault(value, name)
+            self._add(fold_name(name), name, value)
+        for alias, value in (aliases or {}).items():
+            if value in primaryNames:
+                self.add_alias(alias, primaryNames[value], value)
+
+    def add_alias(self, alias, name, value):
+        """Cho phép tra value bằng alias; kết quả hiển thị là name"""
+        self._add(fold_name(alias), name, value)
+
+    def state(self):
+        """Toàn bộ chỉ mục dưới dạng dict thuần (JSON được), để dựng sẵn offline rồi nạp bằng from_state"""
+        return {
+            "maxDistance": self.maxDistance,
+            "prefixLength": self.prefixLength,
+            "keys": self.keys,
+            "names": self.names,
+            "values": self.values,
+            "deletes": self.deletes,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Nạp chỉ mục đã dựng sẵn: không sinh lại biến thể xóa nên chi phí chỉ là đọc dữ liệu"""
+        index = cls.__new__(cls)
+        index.maxDistance = state["maxDistance"]
+        index.prefixLength = state["prefixLength"]
+        index.keys = state["keys"]
+        index.names = state["names"]
+        index.values = state["values"]
+        index.deletes = state["deletes"]
+        index.exact = {}
+        for termId, key in enumerate(index.keys):
+            index.exact.setdefault(key, []).append(termId)
+        return index
+
+    def _add(self, key, name, value):
+        if not key:
+            return
+        termIds = self.exact.setdefault(key, [])
+        if any(self.values[termId] == value for termId in termIds):
+            return
+        termId = len(self.keys)
+        self.keys.append(key)
+        self.names.append(name)
+        self.values.append(value)
+        termIds.append(termId)
+        for variant in _deletes(key[:self.prefixLength], self.maxDistance):
+            self.deletes.setdefault(variant, []).append(termId)
+
+    def lookup(self, query, limit=5):
+        """
+        Trả về tối đa limit cặp (giá trị, tên hiển thị, khoảng cách), khoảng cách tăng dần.
+        Khớp chính xác (sau khi fold) luôn đứng đầu với khoảng cách 0.
+        """
+        key = fold_name(query)
+        if not key:
+            return []
+        termIds = self.exact.get(key)
+        if termIds:
+            return [(self.values[termId], self.names[termId], 0) for termId in termIds[:limit]]
+
+        maxDistance = min(self.maxDistance, allowed_distance(key))
+        if maxDistance == 0:
+            return []
+
+        candidates = set()
+        for variant in _deletes(key[:self.prefixLength], maxDistance):
+            candidates.update(self.deletes.get(variant, ()))
+
+        best = {} # (giá trị, (khoảng cách, tên hiển thị)) - alias và tên chính chỉ tính một lần
+        for termId in candidates:
+            distance = edit_distance(key, self.keys[termId], maxDistance)
+            if distance > maxDistance:
+                continue
+            value = self.values[termId]
+            ranked = (distance, self.names[termId])
+            if value not in best or ranked < best[value]:
+                best[value] = ranked
+
+        results = sorted(best.items(), key=lambda item: item[1])[:limit]
+        return [(value, name, distance) for value, (distance, name) in results]
+
+    def resolve(self, query):
+        """
+        Trả về (giá trị, danh sách gợi ý): giá trị là kết quả khớp tốt nhất nếu nó rõ ràng,
+        ngược lại là None kèm danh sách ứng viên ngang nhau để hỏi lại người chơi.
+        """
+        matches = self.lookup(query, limit=3)
+        if not matches:
+            return None, []
+        if len(matches) == 1 or matches[0][2] < matches[1][2]:
+            return matches[0][0], matches
+        return None, matches
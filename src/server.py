@@ -0,0 +1,303 @@
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+from asset_bundle import load_aliases, load_country_table
+from compute import ARROW_DIRECTIONS, DistanceTable
+from game_session import GUESS_CORRECT, GUESS_DUPLICATE, GUESS_FINISHED, GUESS_INVALID, GUESS_WRONG
+from render import BASE_IMAGE_SIZE, country_svg_digest, load_country_png
+from search import FuzzyIndex
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin"
+DISTANCE_TABLE_PATH = "./src/assets/distance_table.npz"
+COUNTRY_ALIASES_PATH = "./src/assets/country_aliases.json"
+
+SESSION_TTL_SECONDS = 30 * 60 # Phiên không có request nào trong khoảng này thì bị xóa
+SESSION_SWEEP_SECONDS = 30
+MAX_SESSIONS = 200_000
+KEEP_ALIVE_SECONDS = 15 # Đóng kết nối keep-alive rảnh quá lâu
+MAX_HEADER_BYTES = 8192
+MAX_BODY_BYTES = 4096
+
+GUESS_AMBIGUOUS = "ambiguous" # Tên gõ sai khớp ngang nhau nhiều nước, cần người chơi chọn lại
+
+class ServerSession:
+    """Trạng thái gọn của một ván trên server: chỉ số nước bí mật và các chỉ số đã đoán"""
+    __slots__ = ("secret", "guesses", "finished", "won", "lastSeen")
+
+    def __init__(self, secret, now):
+        self.secret = secret
+        self.guesses = [] # Chỉ số nước theo thứ tự đoán
+        self.finished = False
+        self.won = False
+        self.lastSeen = now
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class GameServer:
+    """
+    Server HTTP/1.1 tối giản trên asyncio (không cần thư viện ngoài), mỗi kết nối có keep-alive.
+    Luật chơi giống GameSession nhưng phiên chỉ giữ vài số nguyên nên chứa được rất nhiều phiên;
+    phản hồi lấy thẳng từ DistanceTable, ảnh PNG được render một lần rồi giữ trong bộ nhớ kèm ETag.
+    """
+
+    def __init__(self, countryData, distanceTable, resolver, session_ttl=SESSION_TTL_SECONDS,
+                 max_sessions=MAX_SESSIONS, rng=None):
+        self.countryData = countryData
+        self.distanceTable = distanceTable
+        self.resolver = resolver
+        self.sessionTtl = session_ttl
+        self.maxSessions = max_sessions
+        self.rng = rng if rng is not None else random.Random()
+        self.sessions = OrderedDict() # (id, ServerSession), cũ nhất ở đầu để dọn phiên hết hạn nhanh
+        self.images = {} # (countryCode, size) -> (png bytes, etag)
+        self.imageJobs = {} # (countryCode, size) -> asyncio.Future, gộp các request cùng ảnh khi đang render
+        self.requestCount = 0
+
+    # Phiên chơi
+    def create_session(self):
+        now = time.monotonic()
+        self.expire_sessions(now)
+        if len(self.sessions) >= self.maxSessions:
+            self.sessions.popitem(last=False) # Bỏ phiên lâu nhất không dùng
+        sessionId = secrets.token_urlsafe(12)
+        self.sessions[sessionId] = ServerSession(self.rng.randrange(len(self.countryData)), now)
+        return sessionId
+
+    def get_session(self, sessionId):
+        session = self.sessions.get(sessionId)
+        if session is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Unknown or expired session")
+        session.lastSeen = time.monotonic()
+        self.sessions.move_to_end(sessionId)
+        return session
+
+    def expire_sessions(self, now=None):
+        """Xóa các phiên quá hạn; phiên được sắp theo lần dùng cuối nên chỉ duyệt phần đã hết hạn"""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        while self.sessions:
+            sessionId, session = next(iter(self.sessions.items()))
+            if now - session.lastSeen < self.sessionTtl:
+                break
+            del self.sessions[sessionId]
+            expired += 1
+        return expired
+
+    def resolve_guess(self, payload):
+        """Mã nước từ {"code": "vn"} hoặc {"guess": "Viet Nam"}; trả về (mã hoặc None, gợi ý)"""
+        code = payload.get("code")
+        if isinstance(code, str):
+            code = code.strip().lower()
+            return (code if code in self.countryData else None), []
+        name = payload.get("guess")
+        if not isinstance(name, str) or not name.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Expected a 'guess' name or a 'code'")
+        return self.resolver.resolve(name)
+
+    def submit_guess(self, session, payload):
+        if session.finished:
+            return {"status": GUESS_FINISHED}
+        code, matches = self.resolve_guess(payload)
+        if code is None:
+            if matches:
+                return {"status": GUESS_AMBIGUOUS, "suggestions": [name for _, name, _ in matches]}
+            return {"status": GUESS_INVALID}
+
+        guess = self.countryData.index[code]
+        if guess in session.guesses:
+            return {"status": GUESS_DUPLICATE, "code": code}
+        session.guesses.append(guess)
+        result = {
+            "code": code,
+            "name": self.countryData.names[guess],
+            "distance": self.distanceTable.distances.item(session.secret, guess),
+            "arrow": ARROW_DIRECTIONS[self.distanceTable.arrows.item(session.secret, guess)],
+            "guessCount": len(session.guesses),
+        }
+        if guess == session.secret:
+            session.finished = session.won = True
+            result["status"] = GUESS_CORRECT
+        else:
+            result["status"] = GUESS_WRONG
+        return result
+
+    def session_state(self, sessionId, session):
+        state = {
+            "session": sessionId,
+            "finished": session.finished,
+            "won": session.won,
+            "guesses": [self.countryData.codes[i] for i in session.guesses],
+            "imageUrl": f"/api/sessions/{sessionId}/image",
+        }
+        if session.finished:
+            state["answer"] = self.countryData.codes[session.secret]
+            state["answerName"] = self.countryData.names[session.secret]
+        return state
+
+    # Ảnh
+    async def country_png(self, countryCode, size):
+        """PNG và ETag của ảnh nước; render (hoặc đọc cache đĩa) trên thread khác đúng một lần"""
+        key = (countryCode, size)
+        cached = self.images.get(key)
+        if cached is not None:
+            return cached
+        job = self.imageJobs.get(key)
+        if job is None:
+            loop = asyncio.get_running_loop()
+            job = loop.run_in_executor(None, self._load_png, countryCode, size)
+            self.imageJobs[key] = job
+        try:
+            cached = await asyncio.shield(job)
+        finally:
+            self.imageJobs.pop(key, None)
+        self.images[key] = cached
+        return cached
+
+    @staticmethod
+    def _load_png(countryCode, size):
+        data = load_country_png(countryCode, size) # Bundle, cache trên đĩa, hoặc render rồi ghi vào cache
+        # ETag theo nội dung SVG + kích thước: không để lộ mã nước trong header
+        etag = f'"{country_svg_digest(countryCode)}-{size}"'
+        return data, etag
+
+    # HTTP
+    async def handle_request(self, method, path, headers, body):
+        """Trả về (status, headers, body bytes)"""
+        self.requestCount += 1
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+
+        if parts == ["healthz"] and method == "GET":
+            return self.json_response({"sessions": len(self.sessions), "requests": self.requestCount})
+        if parts[:2] != ["api", "sessions"]:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Not found")
+
+        if len(parts) == 2 and method == "POST":
+            sessionId = self.create_session()
+            return self.json_response(self.session_state(sessionId, self.sessions[sessionId]), HTTPStatus.CREATED)
+        if len(parts) < 3:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed")
+
+        sessionId = parts[2]
+        session = self.get_session(sessionId)
+        action = parts[3] if len(parts) > 3 else None
+        if action is None and method == "GET":
+            return self.json_response(self.session_state(sessionId, session))
+        if action == "guesses" and method == "POST":
+            return self.json_response(self.submit_guess(session, self.parse_json(body)))
+        if action == "give-up" and method == "POST":
+            session.finished = True
+            return self.json_response(self.session_state(sessionId, session))
+        if action == "image" and method == "GET":
+            data, etag = await self.country_png(self.countryData.codes[session.secret], BASE_IMAGE_SIZE)
+            imageHeaders = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+            if headers.get("if-none-match") == etag:
+                return HTTPStatus.NOT_MODIFIED, imageHeaders, b""
+            imageHeaders["Content-Type"] = "image/png"
+            return HTTPStatus.OK, imageHeaders, data
+        raise HttpError(HTTPStatus.NOT_FOUND, "Not found")
+
+    @staticmethod
+    def parse_json(body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return payload
+
+    @staticmethod
+    def json_response(payload, status=HTTPStatus.OK):
+        return status, {"Content-Type": "application/json"}, json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    async def handle_connection(self, reader, writer):
+        """Một kết nối: đọc lần lượt các request (keep-alive) cho tới khi client đóng hoặc rảnh quá lâu"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    break
+                keepAlive = await self.serve_one(head, reader, writer)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_one(self, head, reader, writer):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            self.write_response(writer, HTTPStatus.BAD_REQUEST, {}, b"", False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        keepAlive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        try:
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+            body = await reader.readexactly(length) if length else b""
+            status, responseHeaders, responseBody = await self.handle_request(method, path, headers, body)
+        except HttpError as e:
+            status, responseHeaders, responseBody = self.json_response({"error": e.message}, e.status)
+        except ValueError:
+            status, responseHeaders, responseBody = self.json_response({"error": "Bad request"}, HTTPStatus.BAD_REQUEST)
+        except Exception as e: # Lỗi render (thiếu cairo...) không được làm sập server
+            status, responseHeaders, responseBody = self.json_response({"error": str(e)}, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.write_response(writer, status, responseHeaders, responseBody, keepAlive)
+        return keepAlive
+
+    @staticmethod
+    def write_response(writer, status, headers, body, keepAlive):
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keepAlive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def sweep_sessions(self):
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_SECONDS)
+            self.expire_sessions()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+        sweeper = asyncio.create_task(self.sweep_sessions())
+        print(f"Serving on http://{host}:{port} ({len(self.countryData)} countries)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+def load_server(session_ttl=SESSION_TTL_SECONDS):
+    countryData = load_country_table(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+    distanceTable = DistanceTable.load_or_build(countryData, DISTANCE_TABLE_PATH)
+    resolver = FuzzyIndex(zip(countryData.names, countryData.codes), load_aliases(COUNTRY_ALIASES_PATH))
+    return GameServer(countryData, distanceTable, resolver, session_ttl)
+
+def run_server(host="127.0.0.1", port=8080, session_ttl=SESSION_TTL_SECONDS):
+    server = load_server(session_ttl)
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,312 @@
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import statistics
+import time
+
+from render import COUNTRY_IMAGE_PATH, SIMPLIFIED_IMAGE_PATH, BASE_IMAGE_SIZE
+
+PATH_DATA_RE = re.compile(r'(<path\b[^>]*?\sd=")([^"]*)(")', re.S)
+POLYGON_POINTS_RE = re.compile(r'(<polygon\b[^>]*?\spoints=")([^"]*)(")', re.S)
+SVG_TAG_RE = re.compile(r'<svg\b[^>]*>', re.S)
+VIEWBOX_RE = re.compile(r'\sviewBox="([^"]*)"')
+LENGTH_RE = r'\s{}="\s*((?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(?:px)?\s*"' # Chỉ nhận số trần hoặc px
+# Nhận mọi chữ cái để lệnh không hỗ trợ (C, Q, A...) bị báo lỗi thay vì bị bỏ qua và đọc nhầm tọa độ
+TOKEN_RE = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+def parse_path_data(d):
+    """
+    Tách thuộc tính d (chỉ gồm lệnh đoạn thẳng M/L/H/V/Z như asset Vemaps)
+    thành danh sách (points, closed) với tọa độ tuyệt đối.
+    Lệnh đường cong / cung (C, S, Q, T, A) làm raise ValueError: simplify_all giữ nguyên file đó.
+    """
+    tokens = TOKEN_RE.findall(d)
+    rings = []
+    points = []
+    closed = False
+    x = y = 0.0
+    startX = startY = 0.0
+    command = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            command = token
+            i += 1
+            if command in "Zz":
+                closed = True
+                x, y = startX, startY
+                continue
+            if command not in "MmLlHhVv":
+                raise ValueError(f"Unsupported path command: {command}")
+            continue
+
+        if command in "Mm":
+            dx, dy = float(tokens[i]), float(tokens[i + 1])
+            i += 2
+            if points:
+                rings.append((points, closed))
+            x, y = (x + dx, y + dy) if command == "m" else (dx, dy)
+            startX, startY = x, y
+            points = [(x, y)]
+            closed = False
+            command = "l" if command == "m" else "L" # Cặp tọa độ tiếp theo là lineto ngầm định
+            continue
+        if command in "Ll":
+            dx, dy = float(tokens[i]), float(tokens[i + 1])
+            i += 2
+            x, y = (x + dx, y + dy) if command == "l" else (dx, dy)
+        elif command in "Hh":
+            value = float(tokens[i])
+            i += 1
+            x = x + value if command == "h" else value
+        elif command in "Vv":
+            value = float(tokens[i])
+            i += 1
+            y = y + value if command == "v" else value
+        else:
+            raise ValueError(f"Unexpected number in path data: {token}")
+        points.append((x, y))
+
+    if points:
+        rings.append((points, closed))
+    return rings
+
+def parse_polygon_points(text):
+    values = [float(v) for v in TOKEN_RE.findall(text)]
+    return [(values[i], values[i + 1]) for i in range(0, len(values) - 1, 2)]
+
+def simplify_polyline(points, tolerance):
+    """Ramer-Douglas-Peucker dạng lặp (không đệ quy) để chịu được path hàng chục nghìn điểm"""
+    if len(points) <= 2:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    toleranceSq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[first]
+        x2, y2 = points[last]
+        dx, dy = x2 - x1, y2 - y1
+        lengthSq = dx * dx + dy * dy
+        maxDistSq = -1.0
+        index = -1
+        for k in range(first + 1, last):
+            px, py = points[k]
+            if lengthSq == 0:
+                distSq = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                distSq = cross * cross / lengthSq
+            if distSq > maxDistSq:
+                maxDistSq = distSq
+                index = k
+        if maxDistSq > toleranceSq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+def simplify_ring(points, closed, tolerance):
+    if not closed or len(points) < 4:
+        return simplify_polyline(points, tolerance)
+    # Vòng kín: cắt tại điểm xa điểm đầu nhất để RDP không gộp mất cả vòng
+    x0, y0 = points[0]
+    far = max(range(len(points)), key=lambda k: (points[k][0] - x0) ** 2 + (points[k][1] - y0) ** 2)
+    head = simplify_polyline(points[:far + 1], tolerance)
+    tail = simplify_polyline(points[far:] + [points[0]], tolerance)
+    return head + tail[1:-1]
+
+def format_number(value, decimals):
+    text = f"{value:.{decimals}f}" if decimals > 0 else str(int(round(value)))
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return "0" if text in ("", "-", "-0") else text
+
+def join_numbers(values):
+    """Ghép số theo kiểu SVG nén: bỏ dấu phẩy khi số sau bắt đầu bằng dấu trừ hoặc ta có thể phân tách được"""
+    out = []
+    for value in values:
+        if out and not value.startswith("-") and not (value.startswith(".") and "." in out[-1]):
+            out.append(",")
+        out.append(value)
+    return "".join(out)
+
+def encode_path(rings, quantum, decimals):
+    """
+    Lượng tử hóa tọa độ tuyệt đối về lưới quantum rồi ghi delta tương đối,
+    nên sai số không cộng dồn dọc theo path.
+    """
+    parts = []
+    for points, closed in rings:
+        grid = [(round(x / quantum), round(y / quantum)) for x, y in points]
+        deduped = [grid[0]]
+        for p in grid[1:]:
+            if p != deduped[-1]:
+                deduped.append(p)
+        if closed and len(deduped) > 1 and deduped[-1] == deduped[0]:
+            deduped.pop()
+        gx, gy = deduped[0]
+        parts.append("M" + join_numbers([format_number(gx * quantum, decimals), format_number(gy * quantum, decimals)]))
+        numbers = []
+        for px, py in deduped[1:]:
+            numbers.append(format_number((px - gx) * quantum, decimals))
+            numbers.append(format_number((py - gy) * quantum, decimals))
+            gx, gy = px, py
+        if numbers:
+            parts.append("l" + join_numbers(numbers))
+        if closed:
+            parts.append("z")
+    return "".join(parts)
+
+def user_units_per_pixel(svg_text, output_size):
+    """
+    Số đơn vị user-space ứng với 1 pixel output. Có viewBox: viewBox được scale 'meet' vào ô vuông output_size.
+    Không có viewBox: width x height của thẻ <svg> được kéo vào ô output theo từng trục, lấy trục chi tiết hơn.
+    Raise ValueError nếu không suy ra được (thiếu cả hai, hoặc width/height dùng đơn vị khác px).
+    """
+    root = SVG_TAG_RE.search(svg_text)
+    if root is None:
+        raise ValueError("No <svg> element")
+    match = VIEWBOX_RE.search(root.group(0))
+    if match:
+        _, _, width, height = (float(v) for v in match.group(1).replace(",", " ").split())
+        return max(width, height) / output_size
+    lengths = [re.search(LENGTH_RE.format(name), root.group(0)) for name in ("width", "height")]
+    if not all(lengths):
+        raise ValueError("No viewBox and no width/height in px: cannot tell the output scale")
+    width, height = (float(length.group(1)) for length in lengths)
+    if width <= 0 or height <= 0:
+        raise ValueError("Empty width/height")
+    return min(width, height) / output_size
+
+def simplify_svg_text(svg_text, output_size=BASE_IMAGE_SIZE, tolerance_px=0.25, quantum_px=0.1):
+    """Đơn giản hóa hình học của một SVG cho kích thước output cho trước, giữ nguyên phần còn lại của file"""
+    unitsPerPx = user_units_per_pixel(svg_text, output_size)
+    tolerance = tolerance_px * unitsPerPx
+    decimals = max(0, math.ceil(-math.log10(quantum_px * unitsPerPx)))
+    quantum = 10 ** -decimals
+
+    def replace_path(match):
+        rings = parse_path_data(match.group(2))
+        rings = [(simplify_ring(points, closed, tolerance), closed) for points, closed in rings]
+        return match.group(1) + encode_path(rings, quantum, decimals) + match.group(3)
+
+    def replace_polygon(match):
+        points = simplify_ring(parse_polygon_points(match.group(2)), True, tolerance)
+        return match.group(1) + " ".join(
+            f"{format_number(x, decimals)},{format_number(y, decimals)}" for x, y in points
+        ) + match.group(3)
+
+    svg_text = PATH_DATA_RE.sub(replace_path, svg_text)
+    return POLYGON_POINTS_RE.sub(replace_polygon, svg_text)
+
+def time_render(svg_path, size, repeat):
+    from render import render_svg
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = render_svg(svg_path, size)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), image
+
+def pixel_difference(image_a, image_b):
+    """Sai khác trung bình (0-1) giữa hai ảnh grayscale và tỉ lệ pixel lệch hơn 1/4 thang độ xám"""
+    from PIL import ImageChops
+    diff = ImageChops.difference(image_a.convert("L"), image_b.convert("L"))
+    histogram = diff.histogram()
+    total = sum(histogram)
+    mean = sum(level * count for level, count in enumerate(histogram)) / (255 * total)
+    changed = sum(histogram[64:]) / total
+    return mean, changed
+
+def simplify_all(input_dir, output_dir, output_size, tolerance_px, quantum_px, measure, repeat):
+    os.makedirs(output_dir, exist_ok=True)
+    report = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.endswith(".svg"):
+            continue
+        source_path = os.path.join(input_dir, name)
+        target_path = os.path.join(output_dir, name)
+        with open(source_path, encoding="utf-8") as f:
+            original = f.read()
+        try:
+            simplified = simplify_svg_text(original, output_size, tolerance_px, quantum_px)
+        except ValueError as e:
+            # Lệnh path không hỗ trợ hoặc không biết tỉ lệ: chép nguyên file và ghi lý do vào báo cáo
+            simplified = None
+            skipped = str(e)
+            shutil.copyfile(source_path, target_path)
+        else:
+            with open(target_path, "w", encoding="utf-8") as f:
+                f.write(simplified)
+
+        entry = {
+            "file": name,
+            "originalBytes": os.path.getsize(source_path),
+            "simplifiedBytes": os.path.getsize(target_path),
+        }
+        if simplified is None:
+            entry["skipped"] = skipped
+        elif measure:
+            originalTime, originalImage = time_render(source_path, output_size, repeat)
+            simplifiedTime, simplifiedImage = time_render(target_path, output_size, repeat)
+            meanDiff, changed = pixel_difference(originalImage, simplifiedImage)
+            entry.update({
+                "originalRenderMs": round(originalTime * 1000, 2),
+                "simplifiedRenderMs": round(simplifiedTime * 1000, 2),
+                "meanPixelDiff": round(meanDiff, 5),
+                "changedPixels": round(changed, 5),
+            })
+        report.append(entry)
+        print(format_entry(entry))
+    return report
+
+def format_entry(entry):
+    line = f"{entry['file']:>8}  {entry['originalBytes'] / 1024:8.1f} KB -> {entry['simplifiedBytes'] / 1024:7.1f} KB"
+    if "originalRenderMs" in entry:
+        line += (
+            f"  |  {entry['originalRenderMs']:7.1f} ms -> {entry['simplifiedRenderMs']:6.1f} ms"
+            f"  |  diff {entry['meanPixelDiff']:.4f}, changed {entry['changedPixels'] * 100:.2f}%"
+        )
+    if "skipped" in entry:
+        line += f"  |  copied unchanged: {entry['skipped']}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simplify country SVG geometry for a target output resolution")
+    parser.add_argument("--input", default=COUNTRY_IMAGE_PATH, help="directory with the original SVGs")
+    parser.add_argument("--output", default=SIMPLIFIED_IMAGE_PATH, help="directory for the simplified SVGs")
+    parser.add_argument("--size", type=int, default=BASE_IMAGE_SIZE, help="target output size in pixels")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="simplification tolerance in output pixels")
+    parser.add_argument("--quantum", type=float, default=0.1, help="coordinate grid in output pixels")
+    parser.add_argument("--skip-render", action="store_true", help="only report file sizes, do not render")
+    parser.add_argument("--repeat", type=int, default=3, help="renders per file when timing")
+    parser.add_argument("--report", help="write the per-file report as JSON")
+    args = parser.parse_args()
+
+    report = simplify_all(args.input, args.output, args.size, args.tolerance, args.quantum, not args.skip_render, args.repeat)
+
+    originalBytes = sum(e["originalBytes"] for e in report)
+    simplifiedBytes = sum(e["simplifiedBytes"] for e in report)
+    print(f"Total: {originalBytes / 1024:.1f} KB -> {simplifiedBytes / 1024:.1f} KB")
+    measured = [e for e in report if "originalRenderMs" in e]
+    if measured:
+        print(f"Render: {sum(e['originalRenderMs'] for e in measured):.1f} ms -> {sum(e['simplifiedRenderMs'] for e in measured):.1f} ms")
+        worst = max(measured, key=lambda e: e["meanPixelDiff"])
+        print(f"Largest pixel difference: {worst['file']} ({worst['meanPixelDiff']:.4f})")
+    skipped = [e["file"] for e in report if "skipped" in e]
+    if skipped:
+        print(f"Copied unchanged ({len(skipped)}): {', '.join(skipped)}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from compute import ARROW_DIRECTIONS, DistanceTable
+from country_table import CountryTable
+from game_session import GUESS_CORRECT, GameSession
+from solver import METRIC_EXPECTED, Solver
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin"
+DISTANCE_TABLE_PATH = "./src/assets/distance_table.npz"
+
+MODEL_RANDOM = "random"     # Đoán ngẫu nhiên các nước chưa đoán
+MODEL_NEAREST = "nearest"   # Đoán nước khớp nhất với phản hồi của lượt vừa rồi
+MODEL_SOLVER = "solver"     # Dùng Solver trên mọi phản hồi đã thấy
+MODELS = (MODEL_RANDOM, MODEL_NEAREST, MODEL_SOLVER)
+
+class RandomPlayer:
+    """Đoán lần lượt theo một hoán vị ngẫu nhiên, không dùng phản hồi"""
+
+    def __init__(self, context):
+        self.codes = context.countryData.codes
+
+    def play(self, session, rng):
+        order = list(self.codes)
+        rng.shuffle(order)
+        for code in order:
+            if session.submit(code).status == GUESS_CORRECT:
+                break
+        return len(session.guesses)
+
+class NearestPlayer:
+    """
+    Người chơi tham lam: lượt đầu ngẫu nhiên, các lượt sau chọn nước chưa đoán mà nếu nó là đáp án
+    thì phản hồi từ lượt vừa rồi gần với phản hồi thật nhất (cùng mũi tên, khoảng cách lệch ít nhất).
+    Chỉ nhớ phản hồi cuối cùng nên yếu hơn solver, gần với cách người chơi thật hay làm.
+    """
+
+    def __init__(self, context):
+        self.table = context.distanceTable
+        self.codes = context.countryData.codes
+        self.bucketKm = context.distanceBucketKm
+        self.distances = self.perceive(self.table.distances)
+
+    def perceive(self, distances):
+        """Khoảng cách người chơi cảm nhận: giữa nhóm distance_bucket_km nếu có"""
+        if not self.bucketKm:
+            return distances
+        return (np.floor(distances / self.bucketKm) + 0.5) * self.bucketKm
+
+    def play(self, session, rng):
+        remaining = np.ones(len(self.codes), dtype=bool)
+        guess = rng.randrange(len(self.codes))
+        while True:
+            remaining[guess] = False
+            result = session.submit(self.codes[guess])
+            if result.status == GUESS_CORRECT:
+                return len(session.guesses)
+            # Cột guess của bảng [bí mật, đoán]: phản hồi nếu từng nước là đáp án
+            mismatch = np.abs(self.distances[:, guess] - self.perceive(result.distance))
+            mismatch[self.table.arrows[:, guess] != ARROW_DIRECTIONS.index(result.arrow)] += 40000.0
+            mismatch[~remaining] = np.inf
+            guess = int(np.argmin(mismatch))
+
+class SolverPlayer:
+    """Chơi theo Solver (tham lam, tất định), lọc ứng viên bằng phản hồi thật của GameSession"""
+
+    def __init__(self, context):
+        self.solver = context.solver
+        self.metric = context.metric
+        self.codes = context.countryData.codes
+
+    def play(self, session, rng):
+        candidates = self.solver.all_candidates()
+        while True:
+            guess, _ = self.solver.best_guess(candidates, self.metric)
+            code = self.codes[guess]
+            result = session.submit(code)
+            if result.status == GUESS_CORRECT:
+                return len(session.guesses)
+            candidates = self.solver.filter_by_feedback(candidates, code, result.distance, result.arrow)
+
+PLAYER_CLASSES = {MODEL_RANDOM: RandomPlayer, MODEL_NEAREST: NearestPlayer, MODEL_SOLVER: SolverPlayer}
+
+class SimulationContext:
+    """Dữ liệu dùng chung trong một tiến trình: bảng quốc gia, bảng khoảng cách, solver, người chơi"""
+
+    def __init__(self, distance_bucket_km=None, metric=METRIC_EXPECTED, countryData=None, distanceTable=None):
+        # Worker nhận sẵn các bảng từ tiến trình cha, không đọc / ghi file dùng chung
+        self.countryData = countryData if countryData is not None else CountryTable.load(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+        self.distanceTable = distanceTable if distanceTable is not None else DistanceTable.load_or_build(self.countryData, DISTANCE_TABLE_PATH)
+        self.distanceBucketKm = distance_bucket_km
+        self.solver = Solver(self.distanceTable, distance_bucket_km)
+        self.metric = metric
+        self.session = GameSession(self.countryData, self.distanceTable)
+        self.players = {model: cls(self) for model, cls in PLAYER_CLASSES.items()}
+
+_context = None # SimulationContext của tiến trình worker hiện tại
+
+def _init_worker(distance_bucket_km, metric, countryData, distanceTable):
+    global _context
+    _context = SimulationContext(distance_bucket_km, metric, countryData, distanceTable)
+
+def chunk_seed(seed, model, start):
+    """Seed của một khối ván chỉ phụ thuộc vào (seed, model, vị trí khối), không phụ thuộc số worker"""
+    return f"{seed}:{model}:{start}"
+
+def run_chunk(model, start, stop, seed):
+    """
+    Chơi các ván start..stop-1 với model; ván i có nước bí mật codes[i % N] để mọi nước được chơi đều nhau.
+    Chỉ trả về histogram (N, N + 1): số ván của từng nước bí mật theo số lượt đoán.
+    """
+    context = _context
+    codes = context.countryData.codes
+    player = context.players[model]
+    session = context.session
+    rng = random.Random(chunk_seed(seed, model, start))
+    histogram = np.zeros((len(codes), len(codes) + 1), dtype=np.int64)
+    for game in range(start, stop):
+        secretIndex = game % len(codes)
+        session.start(codes[secretIndex])
+        histogram[secretIndex, player.play(session, rng)] += 1
+    return model, stop - start, histogram
+
+def summarize(codes, names, totals, games, elapsed):
+    """Báo cáo JSON từ histogram đã gộp: phân bố số lượt và trung bình theo từng nước"""
+    report = {"elapsedSeconds": round(elapsed, 3), "models": {}}
+    guessCounts = np.arange(len(codes) + 1)
+    for model, histogram in totals.items():
+        perCountry = {}
+        for i, code in enumerate(codes):
+            played = int(histogram[i].sum())
+            if not played:
+                continue
+            nonzero = np.flatnonzero(histogram[i])
+            perCountry[code] = {
+                "name": names[i],
+                "games": played,
+                "meanGuesses": round(float(histogram[i] @ guessCounts) / played, 4),
+                "histogram": {int(k): int(histogram[i, k]) for k in nonzero},
+            }
+        overall = histogram.sum(axis=0)
+        played = int(overall.sum())
+        report["models"][model] = {
+            "games": games[model],
+            "meanGuesses": round(float(overall @ guessCounts) / played, 4) if played else None,
+            "histogram": {int(k): int(overall[k]) for k in np.flatnonzero(overall)},
+            "countries": perCountry,
+        }
+    return report
+
+def write_report(path, report):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def simulate(models, games, output_path, seed=0, jobs=None, chunk_size=2000,
+             distance_bucket_km=None, metric=METRIC_EXPECTED, flush_seconds=5.0):
+    """
+    Chạy games ván cho mỗi model trên một process pool. Kết quả của từng khối được gộp ngay vào
+    histogram tổng và báo cáo được ghi lại ra đĩa mỗi flush_seconds, nên bộ nhớ không tăng theo số ván.
+    """
+    countryData = CountryTable.load(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+    # Dựng / lưu bảng khoảng cách một lần ở đây rồi gửi cho worker qua initargs:
+    # nếu mỗi worker tự load_or_build thì các worker sẽ cùng ghi và đọc một file npz khi cache còn trống
+    distanceTable = DistanceTable.load_or_build(countryData, DISTANCE_TABLE_PATH)
+    codes, names = countryData.codes, countryData.names
+    totals = {model: np.zeros((len(codes), len(codes) + 1), dtype=np.int64) for model in models}
+    played = {model: 0 for model in models}
+    tasks = [(model, start, min(start + chunk_size, games), seed)
+             for model in models for start in range(0, games, chunk_size)]
+
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    lastFlush = start
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(distance_bucket_km, metric, countryData, distanceTable)) as executor:
+        pending = set()
+        nextTask = 0
+        while nextTask < len(tasks) or pending:
+            # Giữ số khối đang chạy có giới hạn thay vì submit hết một lần
+            while nextTask < len(tasks) and len(pending) < jobs * 4:
+                pending.add(executor.submit(run_chunk, *tasks[nextTask]))
+                nextTask += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model, count, histogram = future.result()
+                totals[model] += histogram
+                played[model] += count
+            now = time.perf_counter()
+            if now - lastFlush >= flush_seconds:
+                write_report(output_path, summarize(codes, names, totals, played, now - start))
+                lastFlush = now
+
+    elapsed = time.perf_counter() - start
+    report = summarize(codes, names, totals, played, elapsed)
+    write_report(output_path, report)
+    return report, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play simulator for per-country difficulty statistics")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS), help="player models to simulate")
+    parser.add_argument("--games", type=int, default=13500, help="games per model")
+    parser.add_argument("--output", default="simulation.json", help="JSON report, rewritten while running")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="games per task")
+    parser.add_argument("--bucket-km", type=float, default=None, help="distance resolution the nearest and solver players perceive")
+    parser.add_argument("--metric", default=METRIC_EXPECTED, help="solver metric (expected or entropy)")
+    args = parser.parse_args()
+
+    report, elapsed = simulate(args.models, args.games, args.output, args.seed, args.jobs,
+                               args.chunk_size, args.bucket_km, args.metric)
+    total = sum(model["games"] for model in report["models"].values())
+    for model, summary in report["models"].items():
+        hardest = sorted(summary["countries"].items(), key=lambda item: -item[1]["meanGuesses"])[:3]
+        print(f"{model:>8}: mean {summary['meanGuesses']:.3f} guesses, hardest: "
+              + ", ".join(f"{entry['name']} ({entry['meanGuesses']:.1f})" for _, entry in hardest))
+    print(f"{total} games in {elapsed:.2f}s ({total / elapsed:,.0f} games/s) -> {args.output}")
@@ -0,0 +1,153 @@
+import argparse
+import math
+
+import numpy as np
+
+from compute import ARROW_DIRECTIONS, DistanceTable
+from country_table import CountryTable
+
+COUNTRY_DATA_PATH = "./src/assets/country.json"
+COUNTRY_SNAPSHOT_PATH = "./src/assets/country.bin"
+DISTANCE_TABLE_PATH = "./src/assets/distance_table.npz"
+
+METRIC_EXPECTED = "expected" # Kỳ vọng số ứng viên còn lại
+METRIC_ENTROPY = "entropy"   # Lượng thông tin (bit) của phản hồi
+
+class Solver:
+    """
+    Chọn lượt đoán tiếp theo dựa trên mô hình phản hồi khoảng cách + mũi tên.
+
+    Phản hồi của mọi cặp (đoán g, bí mật s) được tính sẵn một lần thành bảng phân hoạch
+    partitions[g, s]: nhãn nhỏ (< N) sao cho hai nước bí mật có cùng nhãn trên hàng g
+    thì không phân biệt được khi đoán g. Chấm điểm mọi lượt đoán trên tập ứng viên C
+    là một lần bincount O(N * |C|) thay vì O(N^3) nếu làm ngây thơ.
+
+    distance_bucket_km: None dùng đúng khoảng cách hiển thị (0.1 km); đặt số km để mô phỏng
+    người chơi chỉ cảm nhận khoảng cách thô (ví dụ 500 km).
+    """
+
+    def __init__(self, distanceTable, distance_bucket_km=None):
+        self.table = distanceTable
+        self.codes = distanceTable.codes
+        self.count = len(self.codes)
+        self.distanceBucketKm = distance_bucket_km
+
+        # distanceTable là [bí mật, đoán]; solver cần [đoán, bí mật]
+        self.feedbackKeys = self._feedback_keys(distanceTable.distances.T, distanceTable.arrows.T)
+        # Đoán trúng là một phản hồi riêng (khi gộp khoảng cách thô, nước sát bên cũng có thể rơi vào nhóm 0 km)
+        np.fill_diagonal(self.feedbackKeys, -1)
+        self.partitions = np.empty((self.count, self.count), dtype=np.int32)
+        for g in range(self.count):
+            _, self.partitions[g] = np.unique(self.feedbackKeys[g], return_inverse=True)
+        self.rowOffsets = (np.arange(self.count, dtype=np.int64) * self.count)[:, np.newaxis]
+        self._openingGuess = {}
+
+    def _feedback_keys(self, distances, arrows):
+        """Mã hóa (khoảng cách đã lượng tử hóa, chỉ số mũi tên) thành một số nguyên"""
+        if self.distanceBucketKm:
+            distanceKeys = np.floor(distances / self.distanceBucketKm).astype(np.int64)
+        else:
+            distanceKeys = np.rint(distances * 10).astype(np.int64)
+        return distanceKeys * 8 + arrows.astype(np.int64)
+
+    def all_candidates(self):
+        return np.arange(self.count)
+
+    def filter_candidates(self, candidates, guessIndex, secretIndex):
+        """Giữ các ứng viên cho cùng phản hồi với nước bí mật thật khi đoán guessIndex"""
+        row = self.partitions[guessIndex]
+        return candidates[row[candidates] == row[secretIndex]]
+
+    def filter_by_feedback(self, candidates, guessCode, distance, arrow):
+        """Giống filter_candidates nhưng từ phản hồi quan sát được (khoảng cách km, mũi tên hoặc chỉ số mũi tên)"""
+        arrowIndex = ARROW_DIRECTIONS.index(arrow) if isinstance(arrow, str) else int(arrow)
+        key = self._feedback_keys(np.array([distance]), np.array([arrowIndex]))[0]
+        g = self.table.index[guessCode]
+        return candidates[self.feedbackKeys[g, candidates] == key]
+
+    def score_guesses(self, candidates, metric=METRIC_EXPECTED):
+        """
+        Điểm của mọi lượt đoán có thể (N nước) trên tập ứng viên, điểm thấp hơn là tốt hơn.
+        expected: kỳ vọng số ứng viên còn lại (đoán trúng tính là 0 còn lại).
+        entropy: âm lượng thông tin của phản hồi.
+        """
+        size = len(candidates)
+        keys = self.partitions[:, candidates] + self.rowOffsets
+        counts = np.bincount(keys.ravel(), minlength=self.count * self.count).reshape(self.count, self.count)
+        isCandidate = np.zeros(self.count, dtype=bool)
+        isCandidate[candidates] = True
+
+        if metric == METRIC_ENTROPY:
+            p = counts / size
+            with np.errstate(divide="ignore", invalid="ignore"):
+                entropy = -np.where(counts > 0, p * np.log2(p), 0.0).sum(axis=1)
+            # Ưu tiên nhẹ các ứng viên vì có cơ hội thắng ngay
+            return -(entropy + isCandidate / size)
+
+        squares = (counts.astype(np.int64) ** 2).sum(axis=1)
+        return (squares - isCandidate) / size
+
+    def best_guess(self, candidates, metric=METRIC_EXPECTED):
+        """Trả về (chỉ số lượt đoán tốt nhất, điểm)"""
+        if len(candidates) <= 2:
+            return int(candidates[0]), (len(candidates) - 1) / len(candidates)
+        key = (metric, len(candidates))
+        if len(candidates) == self.count and key in self._openingGuess:
+            return self._openingGuess[key]
+        scores = self.score_guesses(candidates, metric)
+        # Cùng điểm thì chọn ứng viên (có thể thắng ngay)
+        isCandidate = np.zeros(self.count, dtype=bool)
+        isCandidate[candidates] = True
+        order = np.lexsort((~isCandidate, scores))
+        best = (int(order[0]), float(scores[order[0]]))
+        if len(candidates) == self.count:
+            self._openingGuess[key] = best
+        return best
+
+    def play(self, secretIndex, metric=METRIC_EXPECTED, max_guesses=None):
+        """Chơi tham lam tới khi đoán trúng; trả về danh sách chỉ số các lượt đoán"""
+        candidates = self.all_candidates()
+        guesses = []
+        while True:
+            guess, _ = self.best_guess(candidates, metric)
+            guesses.append(guess)
+            if guess == secretIndex or (max_guesses and len(guesses) >= max_guesses):
+                return guesses
+            candidates = self.filter_candidates(candidates, guess, secretIndex)
+
+    def expected_guess_counts(self, metric=METRIC_EXPECTED):
+        """Số lượt solver cần cho từng nước bí mật: dict (countryCode, số lượt)"""
+        return {code: len(self.play(i, metric)) for i, code in enumerate(self.codes)}
+
+    def hint(self, session, metric=METRIC_EXPECTED):
+        """Gợi ý nước nên đoán tiếp cho một GameSession đang chơi (dựa trên các phản hồi đã thấy)"""
+        candidates = self.all_candidates()
+        secretIndex = self.table.index[session.secretCode]
+        for code in session.guesses:
+            candidates = self.filter_candidates(candidates, self.table.index[code], secretIndex)
+        guess, _ = self.best_guess(candidates, metric)
+        return self.codes[guess], len(candidates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimal-guess solver for the distance/arrow feedback")
+    parser.add_argument("--metric", choices=[METRIC_EXPECTED, METRIC_ENTROPY], default=METRIC_EXPECTED)
+    parser.add_argument("--bucket-km", type=float, default=None, help="quantize distances to this many km")
+    parser.add_argument("--secret", help="print the solver's game for one country code")
+    args = parser.parse_args()
+
+    countryData = CountryTable.load(COUNTRY_DATA_PATH, COUNTRY_SNAPSHOT_PATH)
+    solver = Solver(DistanceTable.load_or_build(countryData, DISTANCE_TABLE_PATH), args.bucket_km)
+
+    if args.secret:
+        guesses = solver.play(solver.table.index[args.secret.lower()], args.metric)
+        print(" -> ".join(countryData.names[g] for g in guesses))
+    else:
+        counts = solver.expected_guess_counts(args.metric)
+        for code, guesses in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            print(f"{code}  {countryData[code]['Country Name']:<35} {guesses}")
+        average = sum(counts.values()) / len(counts)
+        opening, score = solver.best_guess(solver.all_candidates(), args.metric)
+        print(f"Opening guess: {countryData.names[opening]} (score {score:.3f})")
+        print(f"Average guesses: {average:.3f}, worst: {max(counts.values())} "
+              f"({math.log2(len(counts)):.2f} bits needed to identify one of {len(counts)} countries)")
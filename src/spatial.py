@@ -0,0 +1,243 @@
+import argparse
+import heapq
+import math
+import time
+
+from compute import EARTH_RADIUS_KM
+
+# numpy chỉ được import khi dựng / tra chỉ mục (import muộn như compute.DistanceTable)
+
+LEAF_SIZE = 8 # Số điểm tối đa ở một lá, được tính khoảng cách trực tiếp bằng NumPy
+RADIUS_ROUNDING_KM = 0.05 # Khoảng cách trả về được làm tròn 0.1 km như get_distance_and_arrow
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Khoảng cách Haversine (km, radian vào), cùng thứ tự phép tính với DistanceTable.build"""
+    import numpy as np
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+def unit_vectors(lat, lon):
+    """Tọa độ (radian) -> vector đơn vị 3D; khoảng cách dây cung tăng đơn điệu theo khoảng cách trên mặt cầu"""
+    import numpy as np
+    cosLat = np.cos(lat)
+    return np.stack([cosLat * np.cos(lon), cosLat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_squared(distance_km):
+    """Bình phương độ dài dây cung ứng với khoảng cách distance_km trên mặt cầu"""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return (2 * math.sin(angle / 2))**2
+
+class SphericalIndex:
+    """
+    Chỉ mục k-d tree trên vector đơn vị 3D của tâm các nước, cho truy vấn k nước gần nhất và
+    các nước trong bán kính mà không phải tính khoảng cách tới mọi nước.
+
+    Cây chỉ dùng khoảng cách dây cung để tỉa nhánh (cùng thứ tự với khoảng cách trên mặt cầu);
+    khoảng cách trả về được tính lại bằng haversine_km nên trùng với DistanceTable / get_distance_and_arrow.
+    Cây được lưu dạng mảng phẳng: mỗi nút giữ đoạn [lo, hi) trong self.order và hộp bao của đoạn đó.
+    """
+
+    def __init__(self, codes, latitude, longitude, leaf_size=LEAF_SIZE):
+        import numpy as np
+        self.codes = list(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.lat = np.radians(np.asarray(latitude, dtype=np.float64))
+        self.lon = np.radians(np.asarray(longitude, dtype=np.float64))
+        self.leafSize = leaf_size
+
+        points = unit_vectors(self.lat, self.lon)
+        self.order = np.arange(len(self.codes))
+        self.nodeRange = [] # (lo, hi)
+        self.nodeChildren = [] # (trái, phải), (-1, -1) ở lá
+        self.nodeBox = [] # (min x, min y, min z, max x, max y, max z), số Python để tra nhanh khi duyệt
+        if self.codes:
+            self._build(points, 0, len(self.codes))
+        self.points = points[self.order] # Điểm của mỗi lá nằm liền nhau
+        self.pointLat = self.lat[self.order]
+        self.pointLon = self.lon[self.order]
+
+    @classmethod
+    def from_countries(cls, countryData, leaf_size=LEAF_SIZE):
+        """Dựng từ CountryTable (dùng thẳng các cột tọa độ) hoặc dict (countryCode, record)"""
+        codes = list(countryData.keys())
+        if hasattr(countryData, "latitude"):
+            return cls(codes, countryData.latitude, countryData.longitude, leaf_size)
+        latitude = [countryData[c]["Latitude"] for c in codes]
+        longitude = [countryData[c]["Longitude"] for c in codes]
+        return cls(codes, latitude, longitude, leaf_size)
+
+    def _build(self, points, lo, hi):
+        node = len(self.nodeRange)
+        segment = self.order[lo:hi]
+        lower = points[segment].min(axis=0)
+        upper = points[segment].max(axis=0)
+        self.nodeRange.append((lo, hi))
+        self.nodeBox.append((*lower.tolist(), *upper.tolist()))
+        self.nodeChildren.append((-1, -1))
+        if hi - lo <= self.leafSize:
+            return node
+        axis = int((upper - lower).argmax()) # Chia theo trục trải rộng nhất
+        mid = (lo + hi) // 2
+        self.order[lo:hi] = segment[points[segment, axis].argpartition(mid - lo)]
+        left = self._build(points, lo, mid)
+        right = self._build(points, mid, hi)
+        self.nodeChildren[node] = (left, right)
+        return node
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _box_distance(self, node, x, y, z):
+        """Bình phương khoảng cách từ điểm tới hộp bao của nút (0 nếu điểm nằm trong hộp)"""
+        x0, y0, z0, x1, y1, z1 = self.nodeBox[node]
+        dx = x0 - x if x < x0 else (x - x1 if x > x1 else 0.0)
+        dy = y0 - y if y < y0 else (y - y1 if y > y1 else 0.0)
+        dz = z0 - z if z < z0 else (z - z1 if z > z1 else 0.0)
+        return dx * dx + dy * dy + dz * dz
+
+    def _query_point(self, lat, lon):
+        import numpy as np
+        x, y, z = unit_vectors(np.float64(lat), np.float64(lon)).tolist()
+        return x, y, z
+
+    def _results(self, positions, lat, lon, radius_km=None):
+        """[(mã nước, km làm tròn 0.1)] của các vị trí trong self.points, gần nhất trước (hòa thì theo thứ tự mã)"""
+        import numpy as np
+        positions = np.asarray(positions, dtype=np.intp)
+        distances = np.round(haversine_km(lat, lon, self.pointLat[positions], self.pointLon[positions]), 1)
+        ranked = sorted(zip(distances.tolist(), self.order[positions].tolist()))
+        results = [(self.codes[i], distance) for distance, i in ranked]
+        if radius_km is not None:
+            results = [(code, distance) for code, distance in results if distance <= radius_km]
+        return results
+
+    def nearest(self, latitude, longitude, k=5, exclude=()):
+        """k nước có tâm gần tọa độ (độ) nhất: [(mã nước, km)], bỏ qua các mã trong exclude"""
+        return self._nearest(math.radians(latitude), math.radians(longitude), k, exclude)
+
+    def _nearest(self, lat, lon, k, exclude):
+        if k <= 0 or not self.codes:
+            return []
+        excluded = {self.index[code] for code in exclude if code in self.index}
+        x, y, z = self._query_point(lat, lon)
+        best = [] # max-heap (-bình phương dây cung, vị trí) của k điểm tốt nhất
+        pending = [(0.0, 0)] # min-heap (khoảng cách tới hộp, nút)
+        while pending:
+            boxDistance, node = heapq.heappop(pending)
+            if len(best) == k and boxDistance > -best[0][0]:
+                break # Mọi nút còn lại đều xa hơn điểm thứ k
+            left, right = self.nodeChildren[node]
+            if left >= 0:
+                heapq.heappush(pending, (self._box_distance(left, x, y, z), left))
+                heapq.heappush(pending, (self._box_distance(right, x, y, z), right))
+                continue
+            lo, hi = self.nodeRange[node]
+            offsets = self.points[lo:hi] - (x, y, z)
+            for position, distance in zip(range(lo, hi), (offsets * offsets).sum(axis=1).tolist()):
+                if excluded and self.order[position] in excluded:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, position))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, position))
+        return self._results([position for _, position in best], lat, lon)
+
+    def within(self, latitude, longitude, radius_km, exclude=()):
+        """Mọi nước có tâm cách tọa độ (độ) không quá radius_km (theo khoảng cách đã làm tròn), gần nhất trước"""
+        return self._within(math.radians(latitude), math.radians(longitude), radius_km, exclude)
+
+    def _within(self, lat, lon, radius_km, exclude):
+        if radius_km < 0 or not self.codes:
+            return []
+        excluded = {self.index[code] for code in exclude if code in self.index}
+        x, y, z = self._query_point(lat, lon)
+        # Nới ngưỡng một chút để không lỡ điểm nằm sát biên; haversine_km lọc chính xác ở _results
+        limit = chord_squared(radius_km + RADIUS_ROUNDING_KM) * (1 + 1e-9)
+        positions = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance(node, x, y, z) > limit:
+                continue
+            left, right = self.nodeChildren[node]
+            if left >= 0:
+                stack.extend((left, right))
+                continue
+            lo, hi = self.nodeRange[node]
+            offsets = self.points[lo:hi] - (x, y, z)
+            for position, distance in zip(range(lo, hi), (offsets * offsets).sum(axis=1).tolist()):
+                if distance <= limit and not (excluded and self.order[position] in excluded):
+                    positions.append(position)
+        return self._results(positions, lat, lon, radius_km)
+
+    def nearest_to_country(self, countryCode, k=5):
+        """k nước gần countryCode nhất (không tính chính nó)"""
+        i = self.index[countryCode]
+        return self._nearest(self.lat[i], self.lon[i], k, (countryCode,))
+
+    def within_country(self, countryCode, radius_km):
+        """Các nước khác cách countryCode không quá radius_km"""
+        i = self.index[countryCode]
+        return self._within(self.lat[i], self.lon[i], radius_km, (countryCode,))
+
+def check_against_table(spatialIndex, distanceTable, k=10, radius_km=1500.0):
+    """
+    So kết quả của chỉ mục với truy vấn vét cạn trên DistanceTable cho mọi nước;
+    trả về danh sách mã nước có kết quả khác (rỗng nếu khớp hoàn toàn).
+    """
+    mismatches = []
+    for code in spatialIndex.codes:
+        row = distanceTable.distances[distanceTable.index[code]]
+        others = [(float(row[j]), other) for j, other in enumerate(distanceTable.codes) if other != code]
+        others.sort()
+        expectedNearest = [d for d, _ in others[:k]]
+        expectedWithin = {other for d, other in others if d <= radius_km}
+        nearest = spatialIndex.nearest_to_country(code, k)
+        within = spatialIndex.within_country(code, radius_km)
+        nearestOk = [d for _, d in nearest] == expectedNearest and all(
+            float(row[distanceTable.index[other]]) == d for other, d in nearest
+        )
+        if not nearestOk or {other for other, _ in within} != expectedWithin:
+            mismatches.append(code)
+    return mismatches
+
+
+if __name__ == "__main__":
+    from compute import DistanceTable
+    from country_table import CountryTable
+
+    parser = argparse.ArgumentParser(description="Nearest-country queries over country centroids")
+    parser.add_argument("--country", help="country code to query around")
+    parser.add_argument("--k", type=int, default=5, help="number of nearest countries")
+    parser.add_argument("--radius", type=float, help="list every country within this many km instead")
+    parser.add_argument("--check", action="store_true", help="compare every query against the distance table and time both")
+    parser.add_argument("--json", default="./src/assets/country.json")
+    parser.add_argument("--snapshot", default="./src/assets/country.bin")
+    args = parser.parse_args()
+
+    countryData = CountryTable.load(args.json, args.snapshot)
+    start = time.perf_counter()
+    spatialIndex = SphericalIndex.from_countries(countryData)
+    print(f"Indexed {len(spatialIndex)} countries in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.country:
+        if args.radius is not None:
+            results = spatialIndex.within_country(args.country, args.radius)
+        else:
+            results = spatialIndex.nearest_to_country(args.country, args.k)
+        for code, distance in results:
+            print(f"  {code}  {countryData[code]['Country Name']:<32} {distance:9.1f} km")
+
+    if args.check:
+        table = DistanceTable.build(countryData)
+        mismatches = check_against_table(spatialIndex, table, args.k, args.radius or 1500.0)
+        print(f"{len(spatialIndex.codes) - len(mismatches)}/{len(spatialIndex.codes)} countries match the distance table"
+              + (f"; mismatches: {', '.join(mismatches)}" if mismatches else ""))
+        start = time.perf_counter()
+        for code in spatialIndex.codes:
+            spatialIndex.nearest_to_country(code, args.k)
+        perQuery = (time.perf_counter() - start) / len(spatialIndex.codes) * 1e6
+        print(f"  nearest k={args.k}: {perQuery:.1f} us/query")
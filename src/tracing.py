@@ -0,0 +1,147 @@
+import functools
+import json
+import os
+import threading
+import time
+
+# Chỉ được dùng khi chạy với --trace: lúc tắt không có hàm nào bị bọc nên không tốn gì thêm
+
+TRACED_HANDLERS = (
+    "on_key_release", "update_suggestions", "pressEnter", "updateGuessList",
+    "setup_new_game", "show_game_screen", "show_end_screen", "give_up",
+    "poll_prefetch", "store_prefetched_image", "get_country_image", "get_preview_image",
+    "on_select", "navigateUp", "navigateDown",
+)
+TRACED_RENDER_FUNCTIONS = ("render_svg", "derive_image") # Trong module render, chạy cả trên worker thread
+
+LAG_PROBE_INTERVAL_MS = 100
+
+class Tracer:
+    """
+    Ghi khoảng thời gian (bắt đầu, độ dài) của các hàm được bọc và xuất ra định dạng
+    Chrome trace-event JSON (mở bằng chrome://tracing hoặc https://ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = [] # list.append an toàn giữa các thread trong CPython
+        self.threadNames = {}
+
+    def now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def _thread_id(self):
+        thread = threading.current_thread()
+        self.threadNames.setdefault(thread.ident, thread.name)
+        return thread.ident
+
+    def record(self, name, category, start_us, duration_us, args=None):
+        event = {"name": name, "cat": category, "ph": "X", "ts": start_us, "dur": duration_us,
+                 "pid": self.pid, "tid": self._thread_id()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def counter(self, name, values):
+        self.events.append({"name": name, "ph": "C", "ts": self.now_us(), "pid": self.pid,
+                            "tid": self._thread_id(), "args": values})
+
+    def wrap(self, func, name=None, category="handler"):
+        """Bọc func để mỗi lần gọi được ghi thành một sự kiện; hàm đã bọc thì trả về nguyên"""
+        if getattr(func, "__traced__", False):
+            return func
+        name = name or getattr(func, "__name__", repr(func))
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            start = self.now_us()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, category, start, self.now_us() - start)
+        traced.__traced__ = True
+        return traced
+
+    def instrument(self, obj, names, category="handler"):
+        """Thay các phương thức của obj bằng bản được bọc (gán lên instance, class không bị đổi)"""
+        for name in names:
+            setattr(obj, name, self.wrap(getattr(obj, name), name, category))
+
+    def instrument_module(self, module, names, category="render"):
+        for name in names:
+            setattr(module, name, self.wrap(getattr(module, name), f"{module.__name__}.{name}", category))
+
+    def instrument_after(self, widget):
+        """Bọc mọi callback được đặt lịch qua widget.after / after_idle"""
+        after = widget.after
+        after_idle = widget.after_idle
+
+        def traced_after(ms, func=None, *args):
+            if func is None:
+                return after(ms)
+            return after(ms, self.wrap(func, f"after:{getattr(func, '__name__', 'callback')}", "after"), *args)
+
+        def traced_after_idle(func, *args):
+            return after_idle(self.wrap(func, f"after_idle:{getattr(func, '__name__', 'callback')}", "after"), *args)
+
+        widget.after = traced_after
+        widget.after_idle = traced_after_idle
+
+    def save(self, path):
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in self.threadNames.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, limit=10):
+        """Các sự kiện tốn nhiều thời gian nhất: (tên, số lần, tổng ms, lâu nhất ms)"""
+        totals = {}
+        for event in self.events:
+            if event["ph"] != "X":
+                continue
+            count, total, longest = totals.get(event["name"], (0, 0.0, 0.0))
+            totals[event["name"]] = (count + 1, total + event["dur"], max(longest, event["dur"]))
+        rows = sorted(totals.items(), key=lambda item: -item[1][1])[:limit]
+        return [(name, count, total / 1000, longest / 1000) for name, (count, total, longest) in rows]
+
+class EventLoopProbe:
+    """
+    Đặt lịch một tick mỗi interval_ms và đo tick thực sự chạy trễ bao lâu so với dự kiến.
+    Độ trễ lớn nghĩa là event loop bị một handler nào đó chặn; ghi thành counter trong trace.
+    """
+
+    def __init__(self, widget, tracer, interval_ms=LAG_PROBE_INTERVAL_MS):
+        self.widget = widget
+        self.tracer = tracer
+        self.interval = interval_ms / 1000
+        self.intervalMs = interval_ms
+        self.lags = [] # ms
+        self.expected = None
+        self.job = None
+
+    def start(self):
+        self.expected = time.perf_counter() + self.interval
+        # Gọi after của class để tick không bị instrument_after bọc thêm
+        self.job = type(self.widget).after(self.widget, self.intervalMs, self.tick)
+
+    def tick(self):
+        lagMs = max(0.0, (time.perf_counter() - self.expected) * 1000)
+        self.lags.append(lagMs)
+        self.tracer.counter("event loop lag", {"ms": round(lagMs, 3)})
+        self.start()
+
+    def stop(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def percentiles(self):
+        if not self.lags:
+            return None
+        lags = sorted(self.lags)
+        return {
+            "p50": lags[len(lags) // 2],
+            "p95": lags[min(len(lags) - 1, int(len(lags) * 0.95))],
+            "max": lags[-1],
+        }
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Các module nằm phẳng trong src/ và import lẫn nhau theo tên (như khi chạy python src/main.py)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+COUNTRY_DATA_PATH = os.path.join(ROOT, "src", "assets", "country.json")
+
+@pytest.fixture(scope="session")
+def countryData():
+    from country_table import CountryTable
+    return CountryTable.load(COUNTRY_DATA_PATH) # Không truyền snapshot: test không ghi gì vào assets
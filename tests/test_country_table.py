@@ -0,0 +1,49 @@
+import json
+import os
+
+from country_table import CountryTable
+
+def write_countries(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+def place(code, name, latitude, longitude):
+    return {"Country Code": code, "Country Name": name, "Latitude": latitude, "Longitude": longitude, "Area": 1.5, "Population": 7}
+
+def test_snapshot_round_trips_the_table(tmp_path):
+    jsonPath, snapshotPath = str(tmp_path / "country.json"), str(tmp_path / "country.bin")
+    write_countries(jsonPath, [place("VN", "Việt Nam", 14.06, 108.28), place("FR", "France", 46.23, 2.21)])
+    first = CountryTable.load(jsonPath, snapshotPath)
+    assert os.path.exists(snapshotPath)
+
+    stat = os.stat(jsonPath)
+    cached = CountryTable.load_snapshot(snapshotPath, stat.st_mtime_ns, stat.st_size)
+    assert cached is not None
+    assert cached.codes == first.codes == ["vn", "fr"]
+    assert cached.names == ["Việt Nam", "France"]
+    assert cached["vn"]["Latitude"] == 14.06 and cached["fr"]["Population"] == 7
+
+def test_snapshot_is_rebuilt_when_the_json_changes(tmp_path):
+    jsonPath, snapshotPath = str(tmp_path / "country.json"), str(tmp_path / "country.bin")
+    write_countries(jsonPath, [place("VN", "Việt Nam", 14.06, 108.28)])
+    CountryTable.load(jsonPath, snapshotPath)
+
+    write_countries(jsonPath, [place("VN", "Vietnam", 14.06, 108.28), place("FR", "France", 46.23, 2.21)])
+    stat = os.stat(jsonPath)
+    os.utime(jsonPath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000)) # mtime chắc chắn khác dù hệ thống file thô
+    assert CountryTable.load_snapshot(snapshotPath, os.stat(jsonPath).st_mtime_ns, os.stat(jsonPath).st_size) is None
+
+    table = CountryTable.load(jsonPath, snapshotPath)
+    assert table.codes == ["vn", "fr"] and table["vn"]["Country Name"] == "Vietnam"
+    stat = os.stat(jsonPath)
+    assert CountryTable.load_snapshot(snapshotPath, stat.st_mtime_ns, stat.st_size).names == ["Vietnam", "France"]
+
+def test_corrupt_snapshot_is_ignored(tmp_path):
+    jsonPath, snapshotPath = str(tmp_path / "country.json"), str(tmp_path / "country.bin")
+    write_countries(jsonPath, [place("VN", "Việt Nam", 14.06, 108.28)])
+    CountryTable.load(jsonPath, snapshotPath)
+    with open(snapshotPath, "r+b") as f:
+        f.truncate(os.path.getsize(snapshotPath) - 3)
+    assert CountryTable.load(jsonPath, snapshotPath).codes == ["vn"]
+    stat = os.stat(jsonPath)
+    assert CountryTable.load_snapshot(snapshotPath, stat.st_mtime_ns, stat.st_size) is not None # Đã ghi lại snapshot
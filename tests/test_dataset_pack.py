@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from dataset_pack import (
+    DatasetPack, PackNameIndex, disambiguated_name, record_shard_index, split_name_shards, synthetic_records, write_pack,
+)
+from game_session import GUESS_CORRECT, GameSession
+from search import fold_name
+
+def place(code, name, latitude, longitude):
+    return {"Country Code": code, "Country Name": name, "Latitude": latitude, "Longitude": longitude, "Area": 1.0, "Population": 1}
+
+SPRINGFIELDS = [
+    place("US-IL-SPR", "Springfield", 39.80, -89.64),
+    place("US-MO-SPR", "Springfield", 37.21, -93.29),
+    place("US-MA-SPR", "Springfield", 42.10, -72.59),
+]
+
+@pytest.fixture(scope="module")
+def duplicatePack(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("springfield"))
+    write_pack(path, SPRINGFIELDS + [place("US-MA-BOS", "Boston", 42.36, -71.06)], "springfield", shard_size=2)
+    return DatasetPack(path)
+
+@pytest.fixture(scope="module")
+def syntheticPack(tmp_path_factory):
+    # Shard nhỏ để các shard tên bị chia theo tiền tố dài hơn một ký tự
+    path = str(tmp_path_factory.mktemp("synthetic"))
+    write_pack(path, synthetic_records(3000, seed=1), "synthetic", name_shard_size=32)
+    return DatasetPack(path)
+
+def test_pack_lookup_by_code_reads_only_its_record_shard(syntheticPack):
+    code = syntheticPack.random_code(random.Random(0))
+    assert syntheticPack[code]["Country Code"].lower() == code
+    assert list(syntheticPack.loadedShards) == [record_shard_index(code, len(syntheticPack.recordShards))]
+    assert len(syntheticPack.keys()) == 3000
+
+def test_name_shards_are_bounded_and_prefix_free():
+    entries = [(fold_name(record["Country Name"]), record["Country Name"], record["Country Code"]) for record in synthetic_records(3000, seed=1)]
+    shards = split_name_shards(entries, 32)
+    assert sum(len(group) for group in shards.values()) == len(entries)
+    assert max(len(group) for group in shards.values()) <= 32
+    assert any(len(key) > 1 for key in shards)
+    for key, group in shards.items():
+        for folded, _, _ in group:
+            assert folded.startswith(key.rstrip("_"))
+    keys = [key for key in shards if not key.endswith("_")]
+    assert not any(a != b and b.startswith(a) for a in keys for b in keys)
+
+def test_pack_name_index_resolves_every_name_and_typos_in_the_shard_key(syntheticPack):
+    nameIndex = PackNameIndex(syntheticPack)
+    codes = [syntheticPack.random_code(random.Random(seed)) for seed in range(40)]
+    deepKeys = checked = 0
+    for code in codes:
+        name = syntheticPack[code]["Country Name"]
+        key = syntheticPack.name_shard_key(fold_name(name))
+        assert key is not None and fold_name(name).startswith(key.rstrip("_"))
+        deepKeys += len(key.rstrip("_")) > 2
+        exact = [match[0] for match in nameIndex.lookup(name, 10) if match[2] == 0]
+        assert code in exact
+        if len(exact) > 1:
+            continue # Tên trùng: gõ tên chung luôn được hỏi lại
+        checked += 1
+        # Sai / thiếu ký tự thứ hai nằm trong khóa shard nên truy vấn rơi vào shard khác
+        for typo in (name[0] + ("z" if name[1] != "z" else "y") + name[2:], name[0] + name[2:]):
+            assert code in [match[0] for match in nameIndex.lookup(typo, 10)], typo
+    assert deepKeys > 0 and checked > 30
+
+def test_pack_autocomplete_lists_prefix_matches_across_shards(syntheticPack):
+    nameIndex = PackNameIndex(syntheticPack)
+    results = nameIndex.search("K", 20)
+    assert len(results) == 20
+    assert all(name.lower().startswith("k") for name in results)
+    assert nameIndex.search("Ka", 5) == [name for name in results if name.lower().startswith("ka")][:5]
+
+def test_duplicate_names_get_distinct_display_names(duplicatePack):
+    nameIndex = PackNameIndex(duplicatePack)
+    names = nameIndex.search("Spring", 10)
+    assert sorted(names) == sorted(disambiguated_name("Springfield", record["Country Code"].lower()) for record in SPRINGFIELDS)
+
+    # Tên chung hỏi lại; tên hiển thị riêng (chọn từ gợi ý) chọn đúng từng mục
+    code, matches = nameIndex.resolve("Springfield")
+    assert code is None
+    assert {match[0] for match in matches} == {"us-il-spr", "us-mo-spr", "us-ma-spr"}
+    for record in SPRINGFIELDS:
+        code = record["Country Code"].lower()
+        assert nameIndex.resolve(disambiguated_name("Springfield", code))[0] == code
+    assert nameIndex.resolve("Sprngfield")[0] is None
+    assert nameIndex.resolve("Boston")[0] == "us-ma-bos"
+
+def test_every_duplicate_can_be_won(duplicatePack):
+    nameIndex = PackNameIndex(duplicatePack)
+    session = GameSession(duplicatePack)
+    for record in SPRINGFIELDS:
+        secret = record["Country Code"].lower()
+        session.start(secret)
+        guess = nameIndex.resolve(nameIndex.search(disambiguated_name("Springfield", secret), 1)[0])[0]
+        assert session.submit(guess).status == GUESS_CORRECT
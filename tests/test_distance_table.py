@@ -0,0 +1,16 @@
+from compute import DistanceTable, get_distance_and_arrow
+
+def test_distance_table_matches_get_distance_and_arrow(countryData):
+    table = DistanceTable.build(countryData)
+    for secret in countryData.codes:
+        for guess in countryData.codes:
+            expected = get_distance_and_arrow(countryData[guess], countryData[secret])
+            assert table.lookup(guess, secret) == expected, (guess, secret)
+
+def test_distance_table_is_rebuilt_when_the_file_is_corrupt(countryData, tmp_path):
+    path = str(tmp_path / "distance_table.npz")
+    with open(path, "wb") as f:
+        f.write(b"PK\x03\x04 truncated")
+    table = DistanceTable.load_or_build(countryData, path)
+    assert table.key == DistanceTable.data_key(countryData)
+    assert DistanceTable.load(path).key == table.key
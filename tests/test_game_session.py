@@ -0,0 +1,40 @@
+from compute import DistanceTable, get_distance_and_arrow
+from game_session import GUESS_CORRECT, GUESS_DUPLICATE, GUESS_FINISHED, GUESS_INVALID, GUESS_WRONG, GameSession
+
+def test_game_session_scores_guesses(countryData):
+    session = GameSession(countryData, DistanceTable.build(countryData))
+    session.start("vn")
+
+    result = session.submit("fr")
+    assert result.status == GUESS_WRONG
+    assert (result.distance, result.arrow) == get_distance_and_arrow(countryData["fr"], countryData["vn"])
+    assert session.submit("fr").status == GUESS_DUPLICATE
+    assert session.submit("zz").status == GUESS_INVALID
+    assert session.guesses == ["fr"]
+
+    result = session.submit("vn")
+    assert result.status == GUESS_CORRECT
+    assert result.distance == 0
+    assert session.won and session.finished
+    assert session.submit("iq").status == GUESS_FINISHED
+    assert session.guesses == ["fr", "vn"]
+
+def test_game_session_without_distance_table_gives_the_same_feedback(countryData):
+    withTable = GameSession(countryData, DistanceTable.build(countryData))
+    direct = GameSession(countryData)
+    withTable.start("iq")
+    direct.start("iq")
+    for code in ("ir", "us", "vn"):
+        assert withTable.submit(code) == direct.submit(code)
+
+def test_game_session_give_up_and_restart(countryData):
+    session = GameSession(countryData)
+    session.start("vn")
+    session.submit("fr")
+    session.give_up()
+    assert session.finished and not session.won
+    assert session.submit("vn").status == GUESS_FINISHED
+
+    session.start("fr")
+    assert session.guesses == [] and not session.finished
+    assert session.submit("fr").status == GUESS_CORRECT
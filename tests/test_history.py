@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from game_session import GameSession
+from history import HISTORY_SCHEMA_VERSION, HistoryError, PlayHistory, RoundRecord, round_from_session
+
+def stats_tuple(stats):
+    return stats.games, stats.wins, stats.currentStreak, stats.bestStreak, stats.histogram, stats.countries
+
+ROUNDS = [
+    RoundRecord("vn", [("fr", 9876.5, "→"), ("vn", 0, "🎉")], True, 1000.0, 12.5),
+    RoundRecord("vn", [("vn", 0, "🎉")], True, 1100.0, 3.0),
+    RoundRecord("fr", [("us", 7000.0, "→")], False, 1200.0, 40.0),
+    RoundRecord("fr", [("vn", 9876.5, "←"), ("fr", 0, "🎉")], True, 1300.0, 8.0),
+]
+
+def test_history_aggregates_survive_reopen_and_match_a_rebuild(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    history = PlayHistory(path)
+    for record in ROUNDS:
+        history.record(record)
+    stats = history.stats
+    assert (stats.games, stats.wins, stats.currentStreak, stats.bestStreak) == (4, 3, 1, 2)
+    assert stats.histogram == {2: 2, 1: 1}
+    assert stats.country("vn") == (2, 2, 3, 1)
+    assert stats.country("fr") == (2, 1, 3, 2)
+    assert stats.country("us") == (0, 0, 0, None)
+    history.flush()
+    expected = stats_tuple(stats)
+    history.close()
+
+    reopened = PlayHistory(path)
+    assert stats_tuple(reopened.stats) == expected
+    assert [row[0] for row in reopened.recent_rounds(2)] == ["fr", "fr"]
+    assert reopened.rebuild_aggregates() == len(ROUNDS)
+    assert stats_tuple(reopened.stats) == expected
+    reopened.close()
+
+def test_history_records_a_finished_session(tmp_path, countryData):
+    session = GameSession(countryData)
+    session.start("vn")
+    session.submit("fr")
+    session.submit("vn")
+    history = PlayHistory(str(tmp_path / "history.sqlite3"))
+    history.record(round_from_session(session, 1000.0, 5.0))
+    history.close() # close ghi nốt các ván đang chờ
+    reopened = PlayHistory(str(tmp_path / "history.sqlite3"))
+    assert reopened.recent_rounds() == [("vn", 1, 2, 1000.0, 5.0)]
+    reopened.close()
+
+def test_history_rejects_a_newer_schema(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION + 1}")
+    connection.close()
+    with pytest.raises(HistoryError):
+        PlayHistory(path)
@@ -0,0 +1,36 @@
+from image_cache import ImageCache
+
+def test_image_cache_evicts_least_recently_used_within_budget():
+    cache = ImageCache(10, sizeof=len)
+    cache["a"] = b"xxxx"
+    cache["b"] = b"xxxx"
+    cache.get("a") # "b" thành mục ít dùng nhất
+    cache["c"] = b"xxxx"
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.currentBytes == 8
+    assert cache.evictions == 1
+
+def test_image_cache_replacing_a_key_updates_the_byte_count():
+    cache = ImageCache(10, sizeof=len)
+    cache["a"] = b"xxxx"
+    cache["a"] = b"xx"
+    assert cache.currentBytes == 2
+    assert len(cache) == 1
+
+def test_image_cache_never_evicts_pinned_keys():
+    cache = ImageCache(10, sizeof=len)
+    cache["secret"] = b"xxxxxx"
+    cache.pin("secret")
+    cache["next"] = b"xxxxxx"
+    assert "secret" in cache
+    assert "next" not in cache
+
+    # Mục bị pin vẫn được giữ khi riêng nó đã vượt ngân sách; unpin thì bị loại ngay
+    cache.pin("big") # Pin trước khi thêm, như main làm với ảnh của nước bí mật
+    cache["big"] = b"x" * 20
+    cache["other"] = b"x"
+    assert "secret" in cache and "big" in cache
+    cache.unpin("big")
+    assert "big" not in cache
+    assert cache.currentBytes <= cache.maxBytes
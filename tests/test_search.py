@@ -0,0 +1,41 @@
+import pytest
+
+from search import FuzzyIndex, PrefixIndex
+
+@pytest.fixture(scope="module")
+def resolver(countryData):
+    return FuzzyIndex(zip(countryData.names, countryData.codes), {"USA": "us"})
+
+@pytest.mark.parametrize("query, code", [
+    ("Vietnam", "vn"),
+    ("Vietnm", "vn"),
+    ("Việt Nam", "vn"),
+    ("viet-nam", "vn"),
+    ("Frnace", "fr"),
+    ("usa", "us"),
+])
+def test_fuzzy_index_resolves_typos_and_folded_names(resolver, query, code):
+    assert resolver.resolve(query)[0] == code
+
+def test_fuzzy_index_asks_again_when_matches_tie(resolver):
+    code, matches = resolver.resolve("Irak")
+    assert code is None
+    assert {match[0] for match in matches} == {"iq", "ir"}
+    assert resolver.resolve("Iran")[0] == "ir"
+
+def test_fuzzy_index_rejects_unrelated_names(resolver):
+    assert resolver.resolve("qqqqq") == (None, [])
+
+def test_fuzzy_index_state_round_trip(resolver):
+    restored = FuzzyIndex.from_state(resolver.state())
+    for query in ("Vietnm", "Irak", "Frnace", "usa"):
+        assert restored.lookup(query) == resolver.lookup(query)
+
+def test_prefix_index_lists_names_in_order_and_respects_limit(countryData):
+    index = PrefixIndex(zip(countryData.names, countryData.codes))
+    expected = sorted((name for name in countryData.names if name.lower().startswith("m")), key=str.lower)
+    assert len(expected) > 3
+    assert index.search("M") == expected
+    assert index.search("  m", 3) == expected[:3]
+    assert index.search_values("viet") == [("Vietnam", "vn")]
+    assert index.search("") == [] and index.search("qqq") == []
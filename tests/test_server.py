@@ -0,0 +1,107 @@
+import asyncio
+import json
+import random
+import time
+from http import HTTPStatus
+
+import pytest
+
+from compute import ARROW_DIRECTIONS, DistanceTable, get_distance_and_arrow
+from render import BASE_IMAGE_SIZE
+from search import FuzzyIndex
+from server import GUESS_AMBIGUOUS, GameServer, HttpError
+
+@pytest.fixture
+def server(countryData):
+    resolver = FuzzyIndex(zip(countryData.names, countryData.codes), {"USA": "us"})
+    return GameServer(countryData, DistanceTable.build(countryData), resolver, session_ttl=60, rng=random.Random(0))
+
+def request(server, method, path, payload=None, headers=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    status, responseHeaders, responseBody = asyncio.run(server.handle_request(method, path, headers or {}, body))
+    if responseHeaders.get("Content-Type") == "application/json":
+        return status, json.loads(responseBody)
+    return status, responseHeaders
+
+def new_session(server, secret):
+    status, state = request(server, "POST", "/api/sessions")
+    assert status == HTTPStatus.CREATED
+    assert "answer" not in state # Không lộ đáp án khi ván chưa kết thúc
+    server.sessions[state["session"]].secret = server.countryData.index[secret]
+    return state["session"]
+
+def test_server_plays_a_round(server, countryData):
+    sessionId = new_session(server, "vn")
+    status, result = request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"guess": "Frnace"})
+    assert status == HTTPStatus.OK and result["status"] == "wrong"
+    assert (result["distance"], result["arrow"]) == get_distance_and_arrow(countryData["fr"], countryData["vn"])
+    assert result["arrow"] in ARROW_DIRECTIONS
+
+    assert request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"code": "FR"})[1]["status"] == "duplicate"
+    assert request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"code": "zz"})[1]["status"] == "invalid"
+    ambiguous = request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"guess": "Irak"})[1]
+    assert ambiguous["status"] == GUESS_AMBIGUOUS and len(ambiguous["suggestions"]) == 2
+
+    result = request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"guess": "Việt Nam"})[1]
+    assert result["status"] == "correct" and result["guessCount"] == 2
+    assert request(server, "POST", f"/api/sessions/{sessionId}/guesses", {"code": "us"})[1] == {"status": "finished"}
+
+    state = request(server, "GET", f"/api/sessions/{sessionId}")[1]
+    assert state["won"] and state["guesses"] == ["fr", "vn"] and state["answer"] == "vn"
+
+def test_server_give_up_reveals_the_answer(server):
+    sessionId = new_session(server, "fr")
+    state = request(server, "POST", f"/api/sessions/{sessionId}/give-up")[1]
+    assert state["finished"] and not state["won"] and state["answer"] == "fr"
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("GET", "/nowhere", None, HTTPStatus.NOT_FOUND),
+    ("GET", "/api/sessions", None, HTTPStatus.METHOD_NOT_ALLOWED),
+    ("GET", "/api/sessions/unknown", None, HTTPStatus.NOT_FOUND),
+    ("POST", "/api/sessions/{id}/guesses", b"not json", HTTPStatus.BAD_REQUEST),
+    ("POST", "/api/sessions/{id}/guesses", b"[1]", HTTPStatus.BAD_REQUEST),
+    ("POST", "/api/sessions/{id}/guesses", b"{}", HTTPStatus.BAD_REQUEST),
+])
+def test_server_rejects_bad_requests(server, method, path, body, status):
+    path = path.replace("{id}", new_session(server, "vn"))
+    with pytest.raises(HttpError) as error:
+        asyncio.run(server.handle_request(method, path, {}, body or b""))
+    assert error.value.status == status
+
+def test_server_image_uses_etag(server):
+    sessionId = new_session(server, "vn")
+    server.images[("vn", BASE_IMAGE_SIZE)] = (b"png", '"digest"') # Không cần cairo để render
+    status, headers = request(server, "GET", f"/api/sessions/{sessionId}/image")
+    assert status == HTTPStatus.OK and headers["ETag"] == '"digest"' and headers["Content-Type"] == "image/png"
+    status, _ = request(server, "GET", f"/api/sessions/{sessionId}/image", headers={"if-none-match": '"digest"'})
+    assert status == HTTPStatus.NOT_MODIFIED
+
+def test_server_expires_idle_sessions(server):
+    old = new_session(server, "vn")
+    fresh = new_session(server, "fr")
+    server.sessions[old].lastSeen -= 120
+    server.sessions.move_to_end(fresh)
+    assert server.expire_sessions(time.monotonic()) == 1
+    assert list(server.sessions) == [fresh]
+
+def test_server_keeps_connections_alive(server):
+    async def exchange():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for request in (b"POST /api/sessions HTTP/1.1\r\nContent-Length: 0\r\n\r\n",
+                        b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n"):
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            responses.append((head.split(b"\r\n")[0], json.loads(await reader.readexactly(length))))
+        assert await reader.read() == b"" # Server đóng sau "Connection: close"
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return responses
+
+    created, health = asyncio.run(exchange())
+    assert created[0] == b"HTTP/1.1 201 Created" and "session" in created[1]
+    assert health == (b"HTTP/1.1 200 OK", {"sessions": 1, "requests": 2})
@@ -0,0 +1,43 @@
+import pytest
+
+from simplify_svg import parse_path_data, simplify_all, user_units_per_pixel
+
+# Một đường gần thẳng nhiều điểm: RDP phải bỏ gần hết các điểm ở giữa
+LINE_PATH = "M0,0" + "".join(f"L{x},{0.001 * (x % 2)}" for x in range(1, 200)) + "L200,0Z"
+
+def svg(attributes, d):
+    return f'<svg xmlns="http://www.w3.org/2000/svg" {attributes}><path d="{d}"/></svg>'
+
+def test_scale_comes_from_the_viewbox_or_the_svg_size():
+    assert user_units_per_pixel(svg('viewBox="0 0 800 400"', "M0,0"), 400) == 2.0
+    assert user_units_per_pixel(svg('width="800" height="1600px"', "M0,0"), 400) == 2.0
+    with pytest.raises(ValueError):
+        user_units_per_pixel(svg("", "M0,0"), 400)
+    with pytest.raises(ValueError):
+        user_units_per_pixel(svg('width="100%" height="100%"', "M0,0"), 400)
+
+def test_curve_commands_are_rejected_instead_of_misread():
+    assert parse_path_data("M0,0 L10,0 h5 v5 z") == [([(0, 0), (10, 0), (15, 0), (15, 5)], True)]
+    with pytest.raises(ValueError):
+        parse_path_data("M0,0 C10,0 10,10 0,10 Z")
+
+def test_unsupported_files_are_copied_unchanged_and_reported(tmp_path):
+    source, target = tmp_path / "in", tmp_path / "out"
+    source.mkdir()
+    files = {
+        "aa.svg": svg('viewBox="0 0 200 200"', LINE_PATH),
+        "bb.svg": svg('viewBox="0 0 200 200"', "M0,0 Q100,50 200,0 Z"),
+        "cc.svg": svg('width="200" height="200"', LINE_PATH),
+        "dd.svg": svg("", LINE_PATH),
+    }
+    for name, text in files.items():
+        (source / name).write_text(text, encoding="utf-8")
+
+    report = {entry["file"]: entry for entry in simplify_all(str(source), str(target), 400, 0.25, 0.1, False, 1)}
+    assert sorted(report) == sorted(files)
+    for name in ("aa.svg", "cc.svg"):
+        assert "skipped" not in report[name]
+        assert report[name]["simplifiedBytes"] < report[name]["originalBytes"] / 4
+    for name in ("bb.svg", "dd.svg"):
+        assert report[name]["skipped"]
+        assert (target / name).read_text(encoding="utf-8") == files[name]
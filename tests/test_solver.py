@@ -0,0 +1,54 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from compute import DistanceTable, get_distance_and_arrow
+from game_session import GameSession
+from solver import METRIC_ENTROPY, METRIC_EXPECTED, Solver
+
+@pytest.fixture(scope="module")
+def solver(countryData):
+    return Solver(DistanceTable.build(countryData))
+
+def test_solver_scores_match_a_direct_count(countryData, solver):
+    candidates = np.arange(0, solver.count, 3)
+    scores = solver.score_guesses(candidates, METRIC_EXPECTED)
+    for g, guess in enumerate(solver.codes):
+        groups = Counter(
+            get_distance_and_arrow(countryData[guess], countryData[solver.codes[s]]) if s != g else "win"
+            for s in candidates.tolist()
+        )
+        remaining = sum(size * size for key, size in groups.items() if key != "win")
+        assert scores[g] == pytest.approx(remaining / len(candidates)), guess
+
+@pytest.mark.parametrize("metric", [METRIC_EXPECTED, METRIC_ENTROPY])
+def test_solver_always_finds_the_secret(solver, metric):
+    # Khoảng cách chính xác phân biệt mọi nước nên lượt đầu luôn đủ thông tin
+    counts = solver.expected_guess_counts(metric)
+    assert set(counts) == set(solver.codes)
+    assert max(counts.values()) <= 2
+
+@pytest.mark.parametrize("metric", [METRIC_EXPECTED, METRIC_ENTROPY])
+def test_bucketed_solver_plays_until_the_secret(solver, metric):
+    coarse = Solver(solver.table, distance_bucket_km=1000)
+    for secretIndex in range(0, coarse.count, 7):
+        guesses = coarse.play(secretIndex, metric)
+        assert guesses[-1] == secretIndex
+        assert len(set(guesses)) == len(guesses) <= 10
+
+def test_solver_filters_by_observed_feedback_and_gives_hints(countryData, solver):
+    secret = solver.table.index["vn"]
+    guess = solver.table.index["fr"]
+    distance, arrow = get_distance_and_arrow(countryData["fr"], countryData["vn"])
+    candidates = solver.all_candidates()
+    expected = solver.filter_candidates(candidates, guess, secret)
+    assert secret in expected.tolist()
+    assert solver.filter_by_feedback(candidates, "fr", distance, arrow).tolist() == expected.tolist()
+
+    session = GameSession(countryData)
+    session.start("vn")
+    session.submit("fr")
+    hint, remaining = solver.hint(session)
+    assert remaining == len(expected) == 1
+    assert hint == "vn"
@@ -0,0 +1,29 @@
+import math
+
+import pytest
+
+from compute import DistanceTable
+from spatial import SphericalIndex, check_against_table, haversine_km
+
+@pytest.fixture(scope="module")
+def distanceTable(countryData):
+    return DistanceTable.build(countryData)
+
+@pytest.mark.parametrize("leaf_size", [1, 8])
+@pytest.mark.parametrize("k, radius_km", [(1, 0.0), (10, 1500.0), (40, 6000.0)])
+def test_spatial_queries_match_the_distance_table(countryData, distanceTable, leaf_size, k, radius_km):
+    spatialIndex = SphericalIndex.from_countries(countryData, leaf_size=leaf_size)
+    assert check_against_table(spatialIndex, distanceTable, k, radius_km) == []
+
+def test_spatial_queries_around_a_point(countryData):
+    spatialIndex = SphericalIndex.from_countries(countryData, leaf_size=2)
+    latitude, longitude = 48.0, 2.0 # Gần Paris nhưng không trùng tâm nước nào
+    expected = sorted(
+        (round(float(haversine_km(math.radians(latitude), math.radians(longitude),
+                                  math.radians(countryData[code]["Latitude"]), math.radians(countryData[code]["Longitude"]))), 1), code)
+        for code in countryData.codes
+    )
+    assert spatialIndex.nearest(latitude, longitude, 5) == [(code, distance) for distance, code in expected[:5]]
+    assert spatialIndex.nearest(latitude, longitude, 1, exclude=(expected[0][1],))[0][0] == expected[1][1]
+    assert spatialIndex.within(latitude, longitude, 2000.0) == [(code, distance) for distance, code in expected if distance <= 2000.0]
+    assert spatialIndex.within(latitude, longitude, -1.0) == []